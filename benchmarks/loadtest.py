@@ -0,0 +1,136 @@
+'''
+Load test of the analysis server (grc_utils.server), entirely on localhost.
+
+Starts a server in a subprocess (unless --url or --unix points at a running one), then runs `--clients` threads,
+each with its own keep-alive AnalysisClient, sending lines of the synthetic corpus (see corpus.py) one request at a
+time for `--duration` seconds. Reports throughput and latency percentiles as JSON, with the server's batching stats.
+
+    python benchmarks/loadtest.py --clients 32 --duration 10 --executor process --workers 4
+    python benchmarks/loadtest.py --url http://127.0.0.1:8765 --task has_ambiguous_dichrona_in_open_syllables
+'''
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT) # the checkout's grc_utils
+
+from corpus import ZipfianCorpus
+
+from grc_utils.server import AnalysisClient
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(port, executor, workers, max_delay, max_batch):
+    command = [sys.executable, '-m', 'grc_utils.server', '--port', str(port), '--executor', executor,
+               '--max-delay', str(max_delay), '--max-batch', str(max_batch)]
+    if workers:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    for line in process.stderr: # any warnings, then "serving on ..."
+        if line.startswith('serving on'):
+            return process
+    raise RuntimeError(f"The server exited with status {process.wait()}")
+
+def client_loop(client, texts, task, deadline, latencies, errors):
+    i = 0
+    clock = time.perf_counter
+    while clock() < deadline:
+        start = clock()
+        try:
+            client.analyze(task, texts[i % len(texts)])
+        except Exception:
+            errors.append(1)
+        latencies.append(clock() - start)
+        i += 1
+
+def run(url=None, unix=None, clients=16, duration=5.0, task='syllabify', lines=2000, seed=0):
+    texts = ZipfianCorpus(seed).lines(lines, marked=0.2)
+    results = [[] for _ in range(clients)]
+    errors = []
+    connections = [AnalysisClient(url, unix=unix) for _ in range(clients)]
+    for client in connections:
+        client.health() # connect before the clock starts
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client_loop, args=(client, texts[i::clients] or texts, task, deadline, results[i], errors))
+               for i, client in enumerate(connections)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = connections[0].stats()
+    for client in connections:
+        client.close()
+    latencies = np.array([latency for result in results for latency in result]) * 1e3
+    return {
+        'task': task,
+        'clients': clients,
+        'seconds': elapsed,
+        'requests': int(len(latencies)),
+        'errors': len(errors),
+        'throughput': len(latencies) / elapsed,
+        'latency_ms': {
+            'mean': float(latencies.mean()),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': float(latencies.max()),
+        } if len(latencies) else {},
+        'server_batching': stats['batching'],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the grc_utils analysis server on localhost.")
+    parser.add_argument('--url', default=None, help="a running server (default: start one)")
+    parser.add_argument('--unix', default=None, help="a running server's Unix socket")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--task', default='syllabify')
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread', help="for the started server")
+    parser.add_argument('--workers', type=int, default=None, help="for the started server")
+    parser.add_argument('--max-delay', type=float, default=2.0, help="for the started server, in milliseconds")
+    parser.add_argument('--max-batch', type=int, default=64, help="for the started server")
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if not url and not args.unix:
+        port = free_port()
+        process = start_server(port, args.executor, args.workers, args.max_delay, args.max_batch)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        report = run(url, args.unix, args.clients, args.duration, args.task, args.lines, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    report['meta'] = {'python': platform.python_version(), 'platform': platform.platform(),
+                      'server': {'executor': args.executor, 'workers': args.workers, 'max_delay_ms': args.max_delay,
+                                 'max_batch': args.max_batch} if process else url or args.unix}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+'''
+Benchmarks of the main grc_utils functions on a seeded synthetic corpus (see corpus.py).
+
+Every benchmark calls one function on every item (line or word) of the corpus, timing each call, and reports
+    throughput      items per second over the whole timed pass
+    latency         mean, p50, p95, p99 and max per call, in microseconds
+    peak_memory     peak traced allocation during a separate pass under tracemalloc, in bytes
+Timing and memory passes are separate, since tracemalloc slows every allocation down.
+The report is JSON, with the library version, Python and platform, and the corpus parameters, so that reports from
+different versions can be compared with --compare.
+
+The grc_utils benchmarked is the one installed in the running Python, so that any release can be measured
+(pip install grc-utils==0.2.1 in a fresh environment), or that of this checkout with --checkout.
+Benchmarks of functions that a release does not have yet are skipped.
+
+    python benchmarks/run.py --lines 500 --output results-0.2.1.json
+    python benchmarks/run.py --checkout --only syllabifier,count --compare results-0.2.1.json
+'''
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from corpus import ZipfianCorpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def use_checkout():
+    ''' Benchmark the grc_utils of this checkout rather than the installed one. Call before load_benchmarks(). '''
+    sys.path.insert(0, ROOT)
+
+def library_version():
+    ''' Version of the installed grc-utils distribution. '''
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version('grc-utils')
+    except PackageNotFoundError:
+        return 'unknown'
+
+def optional_module(name):
+    '''
+    grc_utils.<name>, or None if the imported grc_utils does not have it.
+    Only modules inside the imported package count: an editable install's finder would serve its own.
+    '''
+    import grc_utils
+    from importlib import import_module
+    from importlib.util import find_spec
+    spec = find_spec(f'grc_utils.{name}')
+    package = [os.path.abspath(path) for path in grc_utils.__path__]
+    if spec is None or not spec.origin or os.path.dirname(os.path.abspath(spec.origin)) not in package:
+        return None
+    try:
+        return import_module(f'grc_utils.{name}')
+    except ImportError:
+        return None
+
+def load_benchmarks():
+    '''
+    name -> (function, 'lines' or 'words') for the imported grc_utils.
+    The functions of the first releases are always there; later additions are detected.
+    '''
+    from grc_utils.clitics import is_enclitic, is_proclitic
+    from grc_utils.filter_dichrona import (colour_dichrona_in_open_syllables, count_ambiguous_dichrona_in_open_syllables,
+                                           count_dichrona_in_open_syllables, has_ambiguous_dichrona,
+                                           has_ambiguous_dichrona_in_open_syllables)
+    from grc_utils.lower_grc import lower_grc, upper_grc
+    from grc_utils.syllabifier import syllabifier
+    from grc_utils.utils import no_macrons, normalize_word, only_bases
+
+    benchmarks = {
+        'syllabifier': (syllabifier, 'lines'),
+        'syllabifier_word': (syllabifier, 'words'),
+        'no_macrons': (no_macrons, 'lines'),
+        'lower_grc': (lower_grc, 'lines'),
+        'upper_grc': (upper_grc, 'lines'),
+        'only_bases': (only_bases, 'words'),
+        'normalize_word': (normalize_word, 'lines'),
+        'has_ambiguous_dichrona': (has_ambiguous_dichrona, 'words'),
+        'has_ambiguous_dichrona_in_open_syllables': (has_ambiguous_dichrona_in_open_syllables, 'words'),
+        'count_ambiguous_dichrona_in_open_syllables': (count_ambiguous_dichrona_in_open_syllables, 'lines'),
+        'count_dichrona_in_open_syllables': (count_dichrona_in_open_syllables, 'lines'),
+        'colour_dichrona_in_open_syllables': (colour_dichrona_in_open_syllables, 'lines'),
+        'is_enclitic': (is_enclitic, 'words'),
+        'is_proclitic': (is_proclitic, 'words'),
+    }
+    import grc_utils.syllabifier as syllabifier_module
+    if 'comic' in getattr(syllabifier_module, 'CONVENTIONS', {}):
+        benchmarks['syllabifier_comic'] = (lambda line: syllabifier(line, convention='comic'), 'lines')
+    scansion = optional_module('scansion')
+    if scansion is not None:
+        benchmarks['scan_line'] = (scansion.scan_line, 'lines')
+    return benchmarks
+
+def time_calls(function, items):
+    latencies = np.empty(len(items), dtype=np.int64)
+    clock = time.perf_counter_ns
+    start = clock()
+    for i, item in enumerate(items):
+        before = clock()
+        function(item)
+        latencies[i] = clock() - before
+    return clock() - start, latencies
+
+def peak_memory(function, items):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for item in items:
+            function(item)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmark(function, items, repeat=3, warmup=100):
+    '''
+    Best of `repeat` timed passes (by total time), and the peak memory of one traced pass.
+    '''
+    for item in items[:warmup]:
+        function(item)
+    best = None
+    for _ in range(repeat):
+        total, latencies = time_calls(function, items)
+        if best is None or total < best[0]:
+            best = (total, latencies)
+    total, latencies = best
+    microseconds = latencies / 1000
+    return {
+        'items': len(items),
+        'seconds': total / 1e9,
+        'throughput': len(items) / (total / 1e9) if total else float('inf'),
+        'latency_us': {
+            'mean': float(microseconds.mean()),
+            'p50': float(np.percentile(microseconds, 50)),
+            'p95': float(np.percentile(microseconds, 95)),
+            'p99': float(np.percentile(microseconds, 99)),
+            'max': float(microseconds.max()),
+        },
+        'peak_memory': peak_memory(function, items),
+    }
+
+def run(names=None, lines=500, words=5000, seed=0, marked=0.2, vocabulary_size=20000, repeat=3, progress=None):
+    import grc_utils
+    benchmarks = load_benchmarks()
+    corpus = ZipfianCorpus(seed, vocabulary_size)
+    inputs = {
+        'lines': corpus.lines(lines, marked=marked),
+        'words': [word.strip(',·.;') for word in corpus.words(words, random.Random(seed))],
+    }
+    report = {
+        'meta': {
+            'grc_utils': library_version(),
+            'grc_utils_path': os.path.dirname(os.path.abspath(grc_utils.__file__)),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'corpus': {'seed': seed, 'lines': lines, 'words': words, 'marked': marked, 'vocabulary': vocabulary_size},
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+    for name in names or benchmarks:
+        if name not in benchmarks:
+            continue # not in this version
+        function, kind = benchmarks[name]
+        if progress:
+            progress(name)
+        report['results'][name] = dict(run_benchmark(function, inputs[kind], repeat=repeat), unit=kind[:-1])
+    return report
+
+def compare(report, baseline):
+    '''
+    Rows of (name, baseline throughput, throughput, ratio) for the benchmarks both reports have.
+    '''
+    rows = []
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if old:
+            rows.append((name, old['throughput'], result['throughput'], result['throughput'] / old['throughput']))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark grc_utils on a synthetic corpus; writes a JSON report.")
+    parser.add_argument('--only', default=None, help="comma-separated substrings of the benchmarks to run")
+    parser.add_argument('--lines', type=int, default=500)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--marked', type=float, default=0.2, help="share of lines with length markup")
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help="JSON file to write (default: stdout)")
+    parser.add_argument('--compare', default=None, help="earlier JSON report to compare throughput against")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    parser.add_argument('--checkout', action='store_true', help="benchmark this checkout's grc_utils, not the installed one")
+    args = parser.parse_args(argv)
+
+    if args.checkout:
+        use_checkout()
+    benchmarks = load_benchmarks()
+    if args.list:
+        print('\n'.join(benchmarks))
+        return
+    names = list(benchmarks)
+    if args.only:
+        wanted = args.only.split(',')
+        names = [name for name in names if any(part in name for part in wanted)]
+
+    report = run(names, lines=args.lines, words=args.words, seed=args.seed, marked=args.marked,
+                 vocabulary_size=args.vocabulary, repeat=args.repeat,
+                 progress=lambda name: print(f"running {name}", file=sys.stderr))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for name, old, new, ratio in compare(report, baseline):
+            print(f"{name:45} {old:12.0f} -> {new:12.0f} /s  {ratio:6.2f}x", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+'''
+Thread scaling of the batch APIs (grc_utils.parallel) on the synthetic corpus (see corpus.py).
+
+For every benchmark, the corpus is processed by a plain loop and then by thread_map() with each of `--workers`,
+and the report gives the throughput of each run, its speedup over the loop, and whether its results were identical
+to the loop's. On a free-threaded build (GIL disabled) the speedup should grow with the workers; with the GIL
+it stays at about 1, and the one-worker run should be as fast as the loop (thread_map() falls back to the loop).
+The report records whether the GIL was enabled, so that reports from both kinds of builds can be set side by side.
+
+As with run.py, the installed grc_utils is benchmarked, or this checkout's with --checkout. Releases without
+grc_utils.parallel get an equivalent thread map from this script, so their thread safety can be checked too.
+
+    python benchmarks/threads.py --checkout --workers 1,2,4,8 --output threads-3.13t.json
+    python3.13t -X gil=0 benchmarks/threads.py --only syllabifier
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus import ZipfianCorpus
+from run import library_version, optional_module, use_checkout
+
+def gil_enabled():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def _thread_map(function, items, workers, chunk_size):
+    ''' Stand-in for grc_utils.parallel.thread_map on releases without it. '''
+    items = list(items)
+    if workers <= 1:
+        return [function(item) for item in items]
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [result for chunk in pool.map(lambda chunk: [function(item) for item in chunk], chunks) for result in chunk]
+
+def load_benchmarks():
+    ''' (name -> function of a line, thread map) for the imported grc_utils; later additions are detected. '''
+    from grc_utils.filter_dichrona import count_dichrona_in_open_syllables, has_ambiguous_dichrona_in_open_syllables
+    from grc_utils.syllabifier import syllabifier
+    benchmarks = {
+        'syllabifier': syllabifier,
+        'count_dichrona_in_open_syllables': count_dichrona_in_open_syllables,
+        'has_ambiguous_dichrona_in_open_syllables': has_ambiguous_dichrona_in_open_syllables,
+    }
+    import grc_utils.syllabifier as syllabifier_module
+    if 'comic' in getattr(syllabifier_module, 'CONVENTIONS', {}):
+        benchmarks['syllabifier_comic'] = lambda line: syllabifier(line, convention='comic')
+    scansion = optional_module('scansion')
+    if scansion is not None:
+        benchmarks['scan_line'] = lambda line: scansion.scan_line(line).pattern
+    parallel = optional_module('parallel')
+    return benchmarks, _thread_map if parallel is None else parallel.thread_map
+
+def best_time(run, repeat):
+    ''' (best wall time in seconds, results of that run) over `repeat` runs. '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, results)
+    return best
+
+def run_benchmark(function, lines, workers, thread_map, chunk_size=64, repeat=3):
+    for line in lines[:100]:
+        function(line)
+    loop_seconds, expected = best_time(lambda: [function(line) for line in lines], repeat)
+    result = {'items': len(lines), 'loop': {'seconds': loop_seconds, 'throughput': len(lines) / loop_seconds}, 'threads': {}}
+    for n in workers:
+        seconds, results = best_time(lambda: list(thread_map(function, lines, n, chunk_size)), repeat)
+        result['threads'][str(n)] = {
+            'seconds': seconds,
+            'throughput': len(lines) / seconds,
+            'speedup': loop_seconds / seconds,
+            'identical': results == expected,
+        }
+    return result
+
+def run(names=None, lines=2000, seed=0, marked=0.2, workers=(1, 2, 4, 8), chunk_size=64, repeat=3, progress=None):
+    import grc_utils
+    benchmarks, thread_map = load_benchmarks()
+    corpus = ZipfianCorpus(seed).lines(lines, marked=marked)
+    report = {
+        'meta': {
+            'grc_utils': library_version(),
+            'grc_utils_path': os.path.dirname(os.path.abspath(grc_utils.__file__)),
+            'thread_map': 'grc_utils.parallel' if thread_map is not _thread_map else 'stand-in',
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'gil_enabled': gil_enabled(),
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'corpus': {'seed': seed, 'lines': lines, 'marked': marked},
+            'chunk_size': chunk_size,
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+    for name in names or benchmarks:
+        if name not in benchmarks:
+            continue # not in this version
+        if progress:
+            progress(name)
+        report['results'][name] = run_benchmark(benchmarks[name], corpus, workers, thread_map, chunk_size, repeat)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark thread scaling of grc_utils; writes a JSON report.")
+    parser.add_argument('--only', default=None, help="comma-separated substrings of the benchmarks to run")
+    parser.add_argument('--workers', default='1,2,4,8', help="comma-separated thread counts")
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--marked', type=float, default=0.2, help="share of lines with length markup")
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help="JSON file to write (default: stdout)")
+    parser.add_argument('--checkout', action='store_true', help="benchmark this checkout's grc_utils, not the installed one")
+    args = parser.parse_args(argv)
+
+    if args.checkout:
+        use_checkout()
+    names = list(load_benchmarks()[0])
+    if args.only:
+        wanted = args.only.split(',')
+        names = [name for name in names if any(part in name for part in wanted)]
+    workers = [int(n) for n in args.workers.split(',')]
+
+    report = run(names, lines=args.lines, seed=args.seed, marked=args.marked, workers=workers,
+                 chunk_size=args.chunk_size, repeat=args.repeat, progress=lambda name: print(f"running {name}", file=sys.stderr))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    for name, result in report['results'].items():
+        scaling = '  '.join(f"{n}: {run['speedup']:.2f}x{'' if run['identical'] else ' (DIFFERENT)'}"
+                            for n, run in result['threads'].items())
+        print(f"{name:45} {result['loop']['throughput']:10.0f} /s  {scaling}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,59 @@
 from .clitics import *
 from .consonants import *
 from .dichrona import *
+from .document import MacronizedDocument
 from .filter_dichrona import *
 from .grc_numerals import *
+from .instrument import INSTRUMENTATION, instrumented
+from .lexicon import MacronLexicon, build_lexicon, macronize_text
 from .lower_grc import *
+from .markup import AnnotatedText, parse_lengths, parse_markup, strip_markup, to_markup
 from .macrons_map import *
+from .parallel import default_workers, gil_enabled, syllabify_many, thread_map
 from .sort_grc import *
-from .syllabifier import patterns, syllabifier
+from .stream import stream_syllables
+from .syllabifier import CONVENTIONS, Convention, patterns, register_alias, register_convention, syllabifier, syllabify_conventions
 from .utils import *
 from .vowels_long import *
 from .vowels_short import *
 from .vowels import *
 from .weight import *
+
+# Imported on first use (PEP 562): these pull in numpy, asyncio, sqlite3 or http, or are run with python -m,
+# which warns if the package has already imported them.
+_LAZY = {
+    'AsyncAnalyzer': 'aio', 'asyllabify': 'aio', 'asyllabify_lines': 'aio',
+    'align_macronization': 'align',
+    'run_batch': 'batch',
+    'AnalysisCache': 'cache',
+    'feature_matrix': 'features', 'syllable_features': 'features', 'weight_arrays': 'features',
+    'ScansionLattice': 'lattice',
+    'METERS': 'meter', 'Meter': 'meter', 'identify_meter': 'meter', 'match_lines': 'meter',
+    'PatternIndex': 'pattern_index',
+    'Scansion': 'scansion', 'scan_line': 'scansion', 'scan_lines': 'scansion',
+    'AnalysisClient': 'server', 'AnalysisServer': 'server',
+    'SharedTables': 'shared', 'attach_tables': 'shared', 'shared_pool': 'shared', 'worker_tables': 'shared',
+    'SyllableCounts': 'stats', 'corpus_counts': 'stats',
+    'AnnotationStore': 'store', 'AnnotationStoreWriter': 'store', 'write_store': 'store',
+    'SyllableTable': 'syllable_table', 'build_syllable_table': 'syllable_table',
+    'syllable_table_arrays': 'syllable_table', 'use_syllable_table': 'syllable_table',
+    'verify_syllable_table': 'syllable_table',
+    'SyllableVocabulary': 'vocabulary',
+    'ingest_dump': 'wiktionary',
+    'WordIndex': 'word_index', 'build_word_index': 'word_index',
+}
+
+# What `from grc_utils import *` exports: everything imported above, and the lazy names (which that star import loads)
+__all__ = sorted({name for name in globals() if not name.startswith('_')} | set(_LAZY))
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
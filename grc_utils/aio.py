@@ -0,0 +1,268 @@
+'''
+Asyncio-facing API: the analyses run in an executor, never on the event loop, and concurrent small requests
+are coalesced into batches.
+
+Every request (task, convention, text) goes to a Batcher, which collects requests for up to `max_delay` seconds,
+or until it holds `max_batch` texts or `max_batch_chars` characters, and then hands the whole batch to the executor
+as one call. One executor round trip (and, with a process pool, one pickling) is shared by the whole batch,
+and no request waits more than max_delay before its batch is sent. At most `max_in_flight` batches
+run at once; further requests queue up on the loop, which bounds both memory and latency under load.
+A text longer than max_batch_chars is sent on its own straight away.
+
+The executor is
+    'thread'    a ThreadPoolExecutor (default): keeps the loop responsive, but the analyses share the GIL
+    'process'   a ProcessPoolExecutor: scales with cores
+    or any concurrent.futures.Executor.
+
+>> syllables = await asyllabify('ἄνδρα μοι ἔννεπε')
+>> async for syllables in asyllabify_lines(lines):      # in order, `window` texts in flight
+>>     ...
+>> analyzer = AsyncAnalyzer(executor='process', max_workers=8)
+>> await analyzer.run('count_dichrona_in_open_syllables', line)
+'''
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from .filter_dichrona import (colour_dichrona_in_open_syllables, count_ambiguous_dichrona_in_open_syllables,
+                              count_dichrona_in_open_syllables, has_ambiguous_dichrona,
+                              has_ambiguous_dichrona_in_open_syllables)
+from .syllabifier import convention_key, get_rules, syllabifier
+
+# Tasks taking (text, convention)
+TASKS = {
+    'syllabify': lambda text, convention: syllabifier(text, convention=convention),
+    'has_ambiguous_dichrona': has_ambiguous_dichrona,
+    'has_ambiguous_dichrona_in_open_syllables': has_ambiguous_dichrona_in_open_syllables,
+    'count_dichrona_in_open_syllables': count_dichrona_in_open_syllables,
+    'count_ambiguous_dichrona_in_open_syllables': count_ambiguous_dichrona_in_open_syllables,
+    'colour_dichrona_in_open_syllables': colour_dichrona_in_open_syllables,
+}
+
+def run_batch(task, texts, convention=None):
+    '''
+    Runs in the executor: one task over a batch of texts -> list of (True, result) or (False, exception),
+    so that one bad text fails only its own request.
+    '''
+    function = TASKS[task]
+    results = []
+    for text in texts:
+        try:
+            results.append((True, function(text, convention)))
+        except Exception as error:
+            results.append((False, error))
+    return results
+
+class Batcher:
+    '''
+    Coalesces concurrent requests for one (task, convention) into batches. Bound to the event loop it is first used on.
+    '''
+
+    def __init__(self, task, executor, convention=None, max_batch=64, max_batch_chars=20000, max_delay=0.002,
+                 max_in_flight=None):
+        if task not in TASKS:
+            raise ValueError(f"Unknown task {task!r}; choose one of {', '.join(TASKS)}")
+        self.task = task
+        self.convention = convention
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_batch_chars = max_batch_chars
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight or 2 * (os.cpu_count() or 1)
+        self.batches = 0
+        self.requests = 0
+        self._pending = []  # (text, future)
+        self._pending_chars = 0
+        self._timer = None
+        self._slots = None
+
+    async def submit(self, text):
+        if not isinstance(text, str):
+            raise TypeError(f"{self.task} takes a str, not {type(text).__name__}")
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        future = loop.create_future()
+        self.requests += 1
+        if len(text) >= self.max_batch_chars:
+            self._send([(text, future)])
+            return await future
+        self._pending.append((text, future))
+        self._pending_chars += len(text)
+        if len(self._pending) >= self.max_batch or self._pending_chars >= self.max_batch_chars:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        ''' Sends whatever is pending as one batch. '''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            batch, self._pending, self._pending_chars = self._pending, [], 0
+            self._send(batch)
+
+    def _send(self, batch):
+        self.batches += 1
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            try:
+                results = await loop.run_in_executor(self.executor, run_batch, self.task, [text for text, _ in batch],
+                                                     self.convention)
+            except BaseException as error: # e.g. a broken process pool
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                if not isinstance(error, Exception):
+                    raise
+                return
+        for (_, future), (ok, value) in zip(batch, results):
+            if future.done(): # cancelled by its caller meanwhile
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+class AsyncAnalyzer:
+    '''
+    One executor, and one Batcher per event loop and (task, convention). Use as an async context manager, or call close().
+    Batcher options (max_batch, max_batch_chars, max_delay, max_in_flight) are passed through, and `initializer(*initargs)`
+    runs in every worker of an executor the analyzer creates (e.g. use_syllable_table).
+    One analyzer may serve event loops in several threads at once: each loop gets batchers of its own.
+    '''
+
+    def __init__(self, executor='thread', max_workers=None, initializer=None, initargs=(), **batcher_options):
+        if isinstance(executor, Executor):
+            self.executor, self._owned = executor, False
+        elif executor == 'thread':
+            self.executor, self._owned = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='grc_utils',
+                                                            initializer=initializer, initargs=initargs), True
+        elif executor == 'process':
+            self.executor, self._owned = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer,
+                                                             initargs=initargs), True
+        else:
+            raise ValueError(f"executor must be 'thread', 'process' or an Executor, not {executor!r}")
+        self.batcher_options = batcher_options
+        self._batchers = {} # loop -> {(task, convention): Batcher}
+        self._retired = {}  # counts of the batchers of closed loops
+        self._lock = threading.Lock()
+
+    def batcher(self, task, convention=None):
+        '''
+        The Batcher of the running loop for (task, convention): batchers hold futures and semaphores of one loop.
+        The convention is resolved first (ValueError if unknown) and batchers are keyed by its convention_key(),
+        so there are never more of them than tasks times registered conventions, whatever callers send.
+        '''
+        loop = asyncio.get_running_loop()
+        rules = get_rules(convention)
+        key = (task, _convention_key(rules))
+        with self._lock:
+            batchers = self._batchers.get(loop)
+            if batchers is None:
+                self._retire_closed_loops()
+                batchers = self._batchers[loop] = {}
+            batcher = batchers.get(key)
+            if batcher is None:
+                batcher = batchers[key] = Batcher(task, self.executor, rules, **self.batcher_options)
+        return batcher
+
+    async def run(self, task, text, convention=None):
+        return await self.batcher(task, convention).submit(text)
+
+    async def syllabify(self, text, convention=None):
+        return await self.run('syllabify', text, convention)
+
+    async def has_ambiguous_dichrona_in_open_syllables(self, text):
+        return await self.run('has_ambiguous_dichrona_in_open_syllables', text)
+
+    async def map(self, task, texts, convention=None, window=256):
+        '''
+        Async generator of the results for a (sync or async) iterable of texts, in order,
+        with at most `window` texts in flight.
+        '''
+        in_flight = []
+        async for text in _aiter(texts):
+            in_flight.append(asyncio.ensure_future(self.run(task, text, convention)))
+            if len(in_flight) >= window:
+                yield await in_flight.pop(0)
+        try:
+            for future in in_flight:
+                yield await future
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _retire_closed_loops(self):
+        ''' Drops the batchers of closed loops (they reference their loop), keeping their counts. Holds self._lock. '''
+        for loop in [loop for loop in self._batchers if loop.is_closed()]:
+            for key, batcher in self._batchers.pop(loop).items():
+                requests, batches = self._retired.get(key, (0, 0))
+                self._retired[key] = (requests + batcher.requests, batches + batcher.batches)
+
+    def stats(self):
+        ''' Requests and batches per task and convention, summed over all the event loops served. '''
+        with self._lock:
+            counts = dict(self._retired)
+            for batchers in self._batchers.values():
+                for key, batcher in batchers.items():
+                    requests, batches = counts.get(key, (0, 0))
+                    counts[key] = (requests + batcher.requests, batches + batcher.batches)
+        return {f'{task}:{convention}': {'requests': requests, 'batches': batches}
+                for (task, convention), (requests, batches) in counts.items()}
+
+    def close(self, wait=False):
+        if self._owned:
+            self.executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+_convention_key = lru_cache(maxsize=64)(convention_key)
+
+async def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+# ============================
+# Module-level shortcuts
+# ============================
+
+_default = None
+_default_lock = threading.Lock()
+
+def default_analyzer():
+    ''' The shared AsyncAnalyzer behind asyllabify() etc.: a thread pool with default batching. '''
+    global _default
+    with _default_lock: # event loops in several threads must not each create one
+        if _default is None:
+            _default = AsyncAnalyzer()
+        return _default
+
+async def asyllabify(text, convention=None):
+    return await default_analyzer().run('syllabify', text, convention)
+
+async def ahas_ambiguous_dichrona_in_open_syllables(text):
+    return await default_analyzer().run('has_ambiguous_dichrona_in_open_syllables', text)
+
+async def acount_dichrona_in_open_syllables(text):
+    return await default_analyzer().run('count_dichrona_in_open_syllables', text)
+
+def asyllabify_lines(lines, convention=None, window=256):
+    ''' async for over the syllables of every line of a (sync or async) iterable, in order. '''
+    return default_analyzer().map('syllabify', lines, convention, window)
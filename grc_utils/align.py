@@ -0,0 +1,155 @@
+'''
+Per-vowel alignment of an unmacronized text with its macronized version, for evaluating macronizers
+and for producing training labels.
+
+The macronized text is parsed with parse_lengths() (macrons and breves as diacritics, inline ^ and _, or both),
+which leaves its bare text, i.e. no_macrons() of it, and one length code per character. The two base-character streams
+are then walked side by side in a single pass:
+    - identical characters are aligned,
+    - characters with the same base letter but other diacritics are aligned and reported as changed,
+    - characters that are not Greek letters (spaces, punctuation) are skipped on whichever side has them,
+    - anything else counts as a substitution: aligned, and reported as changed.
+Since the macronized text normally differs from the plain one only in its length marks, this is one linear scan.
+
+Every vowel of the plain text gets a label:
+    UNMARKED        a real dichronon the macronized text leaves unmarked
+    LONG / SHORT    a real dichronon marked long / short
+    NON_DICHRONON   any other vowel (η, ω, diphthongs, circumflexes, iota subscripts...)
+
+>> alignment = align_macronization('ἄνδρα μοι ἔννεπε', 'ᾰ̓́νδρᾰ μοι ἔννεπε')
+>> alignment.labels
+>> array([2, 2, 3, 3, 3, 3, 3], dtype=int8)
+>> score(align_macronization(plain, predicted), align_macronization(plain, gold))['long']
+>> {'precision': ..., 'recall': ..., 'f1': ..., 'support': ...}
+'''
+
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+
+from .dichrona import DICHRONA
+from .filter_dichrona import has_iota_adscriptum, is_diphthong
+from .markup import LONG, SHORT, UNMARKED, parse_lengths
+from .utils import base, base_alphabet
+from .vowels import vowel
+
+NON_DICHRONON = 3
+
+LABELS = {UNMARKED: 'unmarked', LONG: 'long', SHORT: 'short', NON_DICHRONON: 'non_dichronon'}
+
+_LETTER = re.compile(base_alphabet)
+
+Alignment = namedtuple('Alignment', ['text', 'positions', 'labels', 'changed'])
+Alignment.__doc__ = '''
+text        the plain text, NFC
+positions   int64 offsets into text of every vowel
+labels      int8 label of every vowel (UNMARKED, LONG, SHORT or NON_DICHRONON)
+changed     int64 offsets into text of characters the macronized text altered beyond marking length
+'''
+
+def real_dichrona(text):
+    '''
+    Bool array: whether each character of the text is a dichronon not part of a diphthong or iota adscriptum,
+    by the same criteria as word_with_real_dichrona().
+    '''
+    result = np.zeros(len(text), dtype=bool)
+    for i, char in enumerate(text):
+        if char not in DICHRONA:
+            continue
+        prev_pair = text[i - 1:i + 1] if i > 0 else ''
+        next_pair = text[i:i + 2] if i < len(text) - 1 else ''
+        if (prev_pair and (is_diphthong(prev_pair) or has_iota_adscriptum(prev_pair))) or \
+           (next_pair and (is_diphthong(next_pair) or has_iota_adscriptum(next_pair))):
+            continue
+        result[i] = True
+    return result
+
+def align_macronization(plain, macronized):
+    '''
+    Aligns an unmacronized text with a macronized version of it. See Alignment.
+    '''
+    plain = unicodedata.normalize('NFC', plain)
+    annotated = parse_lengths(macronized)
+    marked, lengths = annotated.text, annotated.lengths
+
+    aligned = np.zeros(len(plain), dtype=np.int8) # length code of the macronized character aligned to each plain one
+    changed = []
+
+    if plain == marked:
+        aligned[:] = np.frombuffer(lengths, dtype=np.int8)
+    else:
+        i = j = 0
+        while i < len(plain) and j < len(marked):
+            p, m = plain[i], marked[j]
+            if p == m or base(p) == base(m):
+                if p != m:
+                    changed.append(i)
+            elif not _LETTER.match(base(p)):
+                i += 1
+                continue
+            elif not _LETTER.match(base(m)):
+                j += 1
+                continue
+            else:
+                changed.append(i)
+            aligned[i] = lengths[j]
+            i += 1
+            j += 1
+
+    positions = np.array([i for i, char in enumerate(plain) if vowel(char)], dtype=np.int64)
+    dichrona = real_dichrona(plain)[positions] if len(positions) else np.zeros(0, dtype=bool)
+    labels = np.where(dichrona, aligned[positions], NON_DICHRONON).astype(np.int8)
+    return Alignment(plain, positions, labels, np.array(changed, dtype=np.int64))
+
+def align_lines(plain_lines, macronized_lines):
+    '''
+    Aligns two parallel iterables of lines and concatenates the labels of all of them into one int8 array,
+    with int64 `offsets` such that line i is labels[offsets[i]:offsets[i + 1]].
+    '''
+    labels = []
+    offsets = [0]
+    for plain, macronized in zip(plain_lines, macronized_lines):
+        alignment = align_macronization(plain.rstrip('\n'), macronized.rstrip('\n'))
+        labels.append(alignment.labels)
+        offsets.append(offsets[-1] + len(alignment.labels))
+    labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int8)
+    return labels, np.array(offsets, dtype=np.int64)
+
+# ============================
+# Evaluation
+# ============================
+
+def score(predicted, gold):
+    '''
+    Precision, recall and F1 of the LONG and SHORT labels of a macronizer against a gold standard,
+    over the real dichrona of the same plain text. Takes Alignments or label arrays.
+
+    Returns {'long': {...}, 'short': {...}, 'coverage': share of gold-marked dichrona the prediction marks,
+    'accuracy': share of those it marks correctly, 'dichrona': number of real dichrona}.
+    '''
+    predicted = np.asarray(getattr(predicted, 'labels', predicted))
+    gold = np.asarray(getattr(gold, 'labels', gold))
+    if predicted.shape != gold.shape:
+        raise ValueError(f"Label arrays differ in length: {predicted.shape} vs {gold.shape}")
+
+    dichrona = gold != NON_DICHRONON
+    predicted, gold = predicted[dichrona], gold[dichrona]
+
+    result = {}
+    for label in (LONG, SHORT):
+        true_positives = int(np.count_nonzero((predicted == label) & (gold == label)))
+        predicted_count = int(np.count_nonzero(predicted == label))
+        support = int(np.count_nonzero(gold == label))
+        precision = true_positives / predicted_count if predicted_count else 0.0
+        recall = true_positives / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        result[LABELS[label]] = {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+
+    gold_marked = gold != UNMARKED
+    both_marked = gold_marked & (predicted != UNMARKED)
+    result['coverage'] = float(np.count_nonzero(both_marked) / np.count_nonzero(gold_marked)) if gold_marked.any() else 0.0
+    result['accuracy'] = float(np.count_nonzero(both_marked & (predicted == gold)) / np.count_nonzero(both_marked)) if both_marked.any() else 0.0
+    result['dichrona'] = int(np.count_nonzero(dichrona))
+    return result
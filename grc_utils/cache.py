@@ -0,0 +1,232 @@
+'''
+Persistent cache of per-word analyses, shared across runs and worker processes.
+
+Pipelines see the same few hundred thousand word types over and over. AnalysisCache stores, for every word type, under the cache's convention,
+    syllables       its syllables
+    ambiguous       has_ambiguous_dichrona()
+    ambiguous_open  has_ambiguous_dichrona_in_open_syllables()
+    open_dichrona   count_dichrona_in_open_syllables() (the word standing alone, i.e. at line end)
+in an SQLite database in WAL mode, so that any number of processes can read it while one at a time writes.
+Rows are keyed on (version, convention, word), where
+    - word is the canonical form of the word (normalize_word: NFC, oxia to tonos),
+    - version is that of the installed grc-utils plus the cache schema, so that an upgrade never serves stale
+      analyses; rows of other versions are left alone (processes of several versions may share the database)
+      until prune() deletes them,
+    - convention is the name and a digest of the compiled syllabification rules, so that redefining a convention
+      under the same name does not serve stale syllables either.
+Misses are analysed in-process and written back in batches of `flush_every`, in one transaction each.
+Each process keeps its own connection (a connection inherited through fork is abandoned and reopened),
+and the cache pickles as its path, so it can be handed to a multiprocessing pool.
+Within a process, one cache can be shared by any number of threads: the connection and the in-memory maps are
+guarded by a lock, and misses are analysed outside of it.
+
+>> with AnalysisCache('analyses.sqlite') as cache:
+>>     cache.syllables('ἄνδρα')
+>>     cache.analyse_many(words)     # {word: Analysis}, one query per 500 words
+>> ['ἄν', 'δρα']
+>> AnalysisCache('analyses.sqlite').prune()     # after an upgrade, once the old version no longer runs
+>> 48210
+'''
+
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from .filter_dichrona import (count_dichrona_in_open_syllables, has_ambiguous_dichrona,
+                              has_ambiguous_dichrona_in_open_syllables)
+from .instrument import INSTRUMENTATION
+from .syllabifier import convention_key, get_rules, syllabifier
+from .utils import normalize_word
+
+CACHE_SCHEMA = 2
+
+_QUERY_SIZE = 500 # stays below SQLite's default limit of 999 variables per statement
+
+Analysis = namedtuple('Analysis', ['syllables', 'ambiguous', 'ambiguous_open', 'open_dichrona'])
+
+def cache_version():
+    ''' Installed grc-utils version and cache schema, e.g. '0.2.1+cache2'. '''
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            library = version('grc-utils')
+        except PackageNotFoundError:
+            library = 'unknown'
+    except ImportError:
+        library = 'unknown'
+    return f'{library}+cache{CACHE_SCHEMA}'
+
+def analyse_word(word, convention=None):
+    ''' Uncached analysis of one canonical word form. '''
+    syllables = syllabifier(word, convention=convention) or []
+    return Analysis(tuple(syllables), has_ambiguous_dichrona(word, convention),
+                    has_ambiguous_dichrona_in_open_syllables(word, convention), count_dichrona_in_open_syllables(word, convention))
+
+class AnalysisCache:
+
+    def __init__(self, path, convention=None, version=None, flush_every=1000, timeout=60.0):
+        self.path = os.fspath(path)
+        self.rules = get_rules(convention)
+        self.convention = convention_key(self.rules)
+        self.version = version or cache_version()
+        self.flush_every = flush_every
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+        self._connect()
+
+    def __reduce__(self):
+        return (AnalysisCache, (self.path, self.rules, self.version, self.flush_every, self.timeout))
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('''CREATE TABLE IF NOT EXISTS analyses (
+            version TEXT, convention TEXT, word TEXT,
+            syllables TEXT, ambiguous INTEGER, ambiguous_open INTEGER, open_dichrona INTEGER,
+            PRIMARY KEY (version, convention, word)) WITHOUT ROWID''')
+        self._connection = connection
+        self._pid = os.getpid()
+
+    def _db(self):
+        if self._pid != os.getpid():
+            # Forked: the parent's connection must not be used (nor closed) here, and its pending rows are the parent's to write
+            self._pending = {}
+            self._connect()
+        return self._connection
+
+    # ============================
+    # Lookups
+    # ============================
+
+    def _fetch(self, words):
+        found = {}
+        db = self._db()
+        for i in range(0, len(words), _QUERY_SIZE):
+            chunk = words[i:i + _QUERY_SIZE]
+            rows = db.execute(
+                'SELECT word, syllables, ambiguous, ambiguous_open, open_dichrona FROM analyses '
+                f"WHERE version = ? AND convention = ? AND word IN ({', '.join('?' * len(chunk))})",
+                (self.version, self.convention, *chunk))
+            for word, syllables, ambiguous, ambiguous_open, open_dichrona in rows:
+                found[word] = Analysis(tuple(json.loads(syllables)), bool(ambiguous), bool(ambiguous_open), open_dichrona)
+        return found
+
+    def analyse_many(self, words):
+        '''
+        {word: Analysis} for an iterable of words: from memory, then from the database in one query per 500 words,
+        and whatever is still missing is analysed and queued for writing.
+        '''
+        canonical = {word: normalize_word(word) for word in words}
+        results = {}
+        wanted = []
+        with self._lock:
+            for key in set(canonical.values()):
+                analysis = self._memory.get(key)
+                if analysis is None:
+                    wanted.append(key)
+                else:
+                    results[key] = analysis
+            found = self._fetch(wanted) if wanted else {}
+        missing = {key: analyse_word(key, self.rules) for key in wanted if key not in found}
+        misses = len(missing)
+        with self._lock:
+            for key in wanted:
+                analysis = found.get(key) or missing[key]
+                self._memory[key] = results[key] = analysis
+            self._pending.update(missing)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+            self.misses += misses
+            self.hits += len(canonical) - misses
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count('analysis_cache.hits', len(canonical) - misses)
+            INSTRUMENTATION.count('analysis_cache.misses', misses)
+        return {word: results[key] for word, key in canonical.items()}
+
+    def analyse(self, word):
+        return self.analyse_many([word])[word]
+
+    def syllables(self, word):
+        return list(self.analyse(word).syllables)
+
+    def has_ambiguous_dichrona(self, word):
+        return self.analyse(word).ambiguous
+
+    def has_ambiguous_dichrona_in_open_syllables(self, word):
+        return self.analyse(word).ambiguous_open
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    # ============================
+    # Writing
+    # ============================
+
+    def flush(self):
+        ''' Writes the queued analyses in one transaction. Rows another process wrote meanwhile are kept. '''
+        with self._lock:
+            if not self._pending:
+                return
+            db = self._db()
+            rows = [(self.version, self.convention, word, json.dumps(analysis.syllables, ensure_ascii=False),
+                     int(analysis.ambiguous), int(analysis.ambiguous_open), analysis.open_dichrona)
+                    for word, analysis in self._pending.items()]
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.executemany('INSERT OR IGNORE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            self._pending.clear()
+
+    def __len__(self):
+        ''' Stored analyses of this version and convention. '''
+        with self._lock:
+            self.flush()
+            return self._db().execute('SELECT COUNT(*) FROM analyses WHERE version = ? AND convention = ?',
+                                      (self.version, self.convention)).fetchone()[0]
+
+    def prune(self, keep=None):
+        '''
+        Deletes the stored analyses of every version but this cache's (or but those in `keep`), e.g. after an upgrade
+        once no process of the old version uses the database any more. Returns the number of analyses deleted.
+        '''
+        keep = [self.version] if keep is None else list(keep)
+        with self._lock:
+            self.flush()
+            if not keep:
+                return self._db().execute('DELETE FROM analyses').rowcount
+            return self._db().execute(f"DELETE FROM analyses WHERE version NOT IN ({', '.join('?' * len(keep))})",
+                                      keep).rowcount
+
+    def clear(self):
+        ''' Deletes every stored analysis, of all versions and conventions. '''
+        with self._lock:
+            self._pending.clear()
+            self._memory.clear()
+            self._db().execute('DELETE FROM analyses')
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self.flush()
+                self._connection.close()
+            self._connection = None
+            self._pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
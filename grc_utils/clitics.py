@@ -11,7 +11,7 @@ ACUTE = u'\u0301'
 GRAVE = u'\u0300'
 CIRCUMFLEX = u'\u0342'
 
-ACCENTS = [ACUTE, GRAVE, CIRCUMFLEX]
+ACCENTS = (ACUTE, GRAVE, CIRCUMFLEX)
 
 ACCENT_DICT = {ACUTE: 'A',
                GRAVE: 'G',
@@ -39,7 +39,7 @@ def get_accent (syllable):
 
 PUNCTUATION = ".,;·:'<>[]{}()=+\u037e\u0387\u00B7⟨⟩†—"
 
-NORMAL_ENCLITICS = ['μου', 'μοι', 'με', 'μευ', 'σου', 'σοι', 'σε',
+NORMAL_ENCLITICS = ('μου', 'μοι', 'με', 'μευ', 'σου', 'σοι', 'σε',
              'οὑ', 'οἱ', 'ἑ', 'σευ', 'σεο', 'τοι', 'νιν',                #pronouns
              
              'τις', 'τι', 'τινος', 'του', 'τινι', 'τῳ', 'τινα',          #indefinite singulars
@@ -60,9 +60,9 @@ NORMAL_ENCLITICS = ['μου', 'μοι', 'με', 'μευ', 'σου', 'σοι', '
              'φημὶ', 'φησὶ', 'φατὸν', 'φαμὲν', 'φατὲ', 'φασὶ',            #         (grave)
              
              'γε', 'τε', 'τοι', 'περ', 'κε', 'θην', 'ῥα', 'νυ', 'νυν'    #particles
-             ]
+             )
 
-NORMAL_PROCLITICS = ['ὁ', 'ἡ', 'οἱ', 'αἱ', 'ἐν', 'εἰς', 'ἐς',  #traditional enclitics
+NORMAL_PROCLITICS = ('ὁ', 'ἡ', 'οἱ', 'αἱ', 'ἐν', 'εἰς', 'ἐς',  #traditional enclitics
               'ἐξ', 'ἐκ', 'εἰ', 'αἰ', 'ὡς', 'οὐ', 'οὐκ', 'οὐχ',
               
               'ἀμφʼ', 'ἀμφί', 'ἀμφίς', 'ἀμφὶ', 'ἀμφὶς', #prepositions accented on ultima
@@ -95,13 +95,17 @@ NORMAL_PROCLITICS = ['ὁ', 'ἡ', 'οἱ', 'αἱ', 'ἐν', 'εἰς', 'ἐς'
               'οὐ', 'οὐκ', 'οὐχ', 'οὐδ’',
               
               'ἠδʼ', 'ἀλλʼ'
-              ]
+              )
 
-OCT_ENCLITICS = [re.sub('ς|σ', 'ϲ', w) for w in NORMAL_ENCLITICS if re.search('ς|σ', w)]
-OCT_PROCLITICS = [re.sub('ς|σ', 'ϲ', w) for w in NORMAL_PROCLITICS if re.search('ς|σ', w)]
+OCT_ENCLITICS = tuple(re.sub('ς|σ', 'ϲ', w) for w in NORMAL_ENCLITICS if re.search('ς|σ', w))
+OCT_PROCLITICS = tuple(re.sub('ς|σ', 'ϲ', w) for w in NORMAL_PROCLITICS if re.search('ς|σ', w))
 
+# Tuples, so that they can be read from any number of threads; is_enclitic() and is_proclitic() look words up in sets
 ENCLITICS = NORMAL_ENCLITICS + OCT_ENCLITICS
 PROCLITICS = NORMAL_PROCLITICS + OCT_PROCLITICS
+
+_ENCLITIC_SET = frozenset(ENCLITICS)
+_PROCLITIC_SET = frozenset(PROCLITICS)
                  
 APOSTROPHE = u'\u02bc',  #MODIFIER LETTER APOSTROPHE
 
@@ -122,7 +126,7 @@ def is_enclitic (word):
     :param str word: a Greek word
     :rtype: bool
     """
-    return _clean(word) in ENCLITICS
+    return _clean(word) in _ENCLITIC_SET
 
 def is_proclitic (word):
     """Checks whether a word is one of the Greek proclitics. In addition to the 
@@ -139,7 +143,7 @@ def is_proclitic (word):
     :rtype: bool
     """
     w = _clean(word)
-    if w in PROCLITICS:
+    if w in _PROCLITIC_SET:
         return True
     if w.endswith(APOSTROPHE) and get_accent(w) == None and not is_enclitic(w):
         return True
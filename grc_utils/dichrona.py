@@ -27,7 +27,7 @@ NB3 that the following ypsilons are not in the unicode Greek Extended: ᾽Υ, 
 NB3 that polytonic Greek (Greek Extended) escape codes start with 'u1f' (they lie in 1F00—1FFF) whereas monotonic starts with 'u3'.
 Use hex(ord('x')) to get a character x's escape code and chr(0x123) to show the character coded by hex string '0x123'.
 '''
-DICHRONA = {
+DICHRONA = frozenset({
     # CAPITALS
     "\u1f08",  # Ἀ Greek Capital Letter Alpha with Psili
     "\u1f38",  # Ἰ Greek Capital Letter Iota with Psili
@@ -103,4 +103,4 @@ DICHRONA = {
 
     "\u1fd2",  # ῒ Greek Small Letter Iota With Dialytika And Varia
     "\u1fe2",  # ῢ Greek Small Letter Upsilon With Dialytika And Varia
-}
\ No newline at end of file
+})
@@ -0,0 +1,274 @@
+'''
+Incremental analysis of a macronized document that is being edited, e.g. in a macronization editor
+where ^ and _ are added one syllable at a time.
+
+The batch functions count_dichrona_in_open_syllables() and colour_dichrona_in_open_syllables() analyse a line
+word by word, and what a word contributes depends only on
+    - the word itself,
+    - whether it is the last word of the line and, if not, whether the next word starts with a vowel (synapheia).
+MacronizedDocument keeps every line's words and their contributions, caches the analysis of every distinct
+(word, context) pair, and after an edit re-analyses only the words the edit touches and one word on either side
+(the word before depends on the first letter of the edited word, and a word can be split or merged at the edges).
+Their results are spliced into the line's words, the words after them are shifted, and the line and document
+totals are updated by the difference.
+
+Lines are stored normalized (NFC, oxia to tonos) as the batch functions see them, and all offsets refer to these.
+
+>> doc = MacronizedDocument('μῆνιν ἄειδε θεὰ\\nΠηληϊάδεω Ἀχιλῆος')
+>> doc.count
+>> 7
+>> doc.splice(0, 4, 4, '^')     # μῆνι^ν
+>> doc.count
+>> 6
+>> doc.colour_spans(0)
+>> [(3, 4, 'green'), (7, 8, 'red'), (15, 16, 'red')]
+'''
+
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+from .instrument import INSTRUMENTATION
+from .filter_dichrona import annotated_syllables, annotated_words, word_with_real_dichrona
+from .markup import MARK_CHARS, AnnotatedText, parse_markup, to_markup
+from .utils import oxia_to_tonos
+from .vowels import vowel
+from .weight import is_open_syllable_in_word_in_synapheia, open_syllable_in_word
+
+RED = 'red'
+GREEN = 'green'
+
+_ANSI = {RED: '\033[31m{}\033[0m', GREEN: '\033[32m{}\033[0m'}
+
+# start and end are offsets into the bare text of the line, word is an AnnotatedText
+Word = namedtuple('Word', ['start', 'end', 'word', 'count'])
+
+def normalize_line(line):
+    return unicodedata.normalize('NFC', oxia_to_tonos(line))
+
+def _bare_offset(line, position):
+    ''' Offset in the bare text of position `position` of the line with inline markup. '''
+    return position - sum(line.count(mark, 0, position) for mark in MARK_CHARS.values())
+
+def _markup_offset(line, offset):
+    '''
+    Position in the line with inline markup of the character at `offset` of the bare text.
+    0 at the start (marks before the first character belong to no character) and len(line) at the end.
+    '''
+    if offset == 0 or not any(mark in line for mark in MARK_CHARS.values()):
+        return offset
+    positions = [i for i, char in enumerate(line) if char not in MARK_CHARS.values()]
+    return positions[offset] if offset < len(positions) else len(line)
+
+def _changed_span(old, new):
+    ''' (start, old_end, new_end) such that old[start:old_end] was replaced by new[start:new_end]. '''
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    common_end = 0
+    while common_end < limit - start and old[-1 - common_end] == new[-1 - common_end]:
+        common_end += 1
+    return start, len(old) - common_end, len(new) - common_end
+
+# ============================
+# Per-word analysis (cached)
+# ============================
+
+@lru_cache(maxsize=65536)
+def word_count(word, next_starts_with_vowel=None):
+    '''
+    Unmacronized dichrona in open syllables of one word (AnnotatedText), as counted by count_dichrona_in_open_syllables().
+    next_starts_with_vowel is None for the last word of the line.
+    '''
+    list_of_syllables = annotated_syllables(word)
+    next_word = None if next_starts_with_vowel is None else ('α' if next_starts_with_vowel else 'β')
+    count = 0
+    for syllable in list_of_syllables:
+        if syllable.marked or not word_with_real_dichrona(syllable.text):
+            continue
+        if next_word is None:
+            is_open = open_syllable_in_word(syllable, list_of_syllables)
+        else:
+            is_open = is_open_syllable_in_word_in_synapheia(syllable, list_of_syllables, next_word)
+        if is_open:
+            count += 1
+    return count
+
+INSTRUMENTATION.register_cache('document.word_count', word_count)
+
+@lru_cache(maxsize=65536)
+def word_colours(word):
+    '''
+    Tuple with the colour (RED, GREEN or None) of every character of the bare text of the word (AnnotatedText),
+    as given by colour_dichrona_in_open_syllables().
+    '''
+    list_of_syllables = annotated_syllables(word)
+    colours = []
+    for syllable in list_of_syllables:
+        red = (not syllable.marked and word_with_real_dichrona(syllable.text) and
+               open_syllable_in_word(syllable, list_of_syllables))
+        for char, length in zip(syllable.text, syllable.lengths):
+            colours.append(GREEN if length else RED if red and vowel(char) else None)
+    return tuple(colours)
+
+INSTRUMENTATION.register_cache('document.word_colours', word_colours)
+
+def analyse_words(found, offset=0, next_word=None):
+    '''
+    Words (start, end, AnnotatedText) as found by annotated_words() -> tuple of Words, with offsets shifted by `offset`.
+    next_word is the Word that follows the last one in the line, if any.
+    '''
+    words = []
+    for i, (start, end, word) in enumerate(found):
+        if i + 1 < len(found):
+            context = vowel(found[i + 1][2].text[0])
+        else:
+            context = None if next_word is None else vowel(next_word.word.text[0])
+        words.append(Word(start + offset, end + offset, word, word_count(word, context)))
+    return tuple(words)
+
+def analyse_line(line):
+    '''
+    Normalized line -> (AnnotatedText of the line, tuple of Words), with only the words that have a vowel, as in the batch functions.
+    '''
+    annotated, found = annotated_words(line)
+    return annotated, analyse_words(found)
+
+# ============================
+# Document
+# ============================
+
+class MacronizedDocument:
+
+    def __init__(self, text=''):
+        lines = text.split('\n') if isinstance(text, str) else [line.rstrip('\n') for line in text]
+        self._lines = []
+        self._annotated = []
+        self._words = []
+        self._counts = []
+        self.count = 0
+        for line in lines:
+            self.insert_line(len(self._lines), line)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        return self._lines[index]
+
+    @property
+    def text(self):
+        return '\n'.join(self._lines)
+
+    def line_count(self, index):
+        ''' What count_dichrona_in_open_syllables() gives for the line. '''
+        return self._counts[index]
+
+    def counts(self):
+        return list(self._counts)
+
+    # ============================
+    # Edits
+    # ============================
+
+    def set_line(self, index, line):
+        '''
+        Replaces line `index`. Only the words that differ from the old line's, and one word on either side, are analysed again.
+        '''
+        line = normalize_line(line)
+        old = self._lines[index]
+        if line == old:
+            return
+        start, old_end, new_end = _changed_span(old, line)
+        first, last = _bare_offset(old, start), _bare_offset(old, old_end)
+        words = self._words[index]
+        touched = next((i for i, word in enumerate(words) if word.end >= first), len(words))
+        after = next((i for i, word in enumerate(words) if word.start > last), len(words))
+        # the region runs from the word before the touched ones to the word after them, both included
+        low, high = max(touched - 1, 0), min(after + 1, len(words))
+        region_start = words[touched - 1].start if touched else 0
+        old_annotated = self._annotated[index]
+        region_end = words[after].end if after < len(words) else len(old_annotated.text)
+
+        markup_start, markup_end = _markup_offset(old, region_start), _markup_offset(old, region_end)
+        region, found = annotated_words(parse_markup(line[markup_start:markup_end + len(line) - len(old)]))
+        shift = len(region.text) - (region_end - region_start)
+        new_words = analyse_words(found, region_start, words[high] if high < len(words) else None)
+
+        self._words[index] = words[:low] + new_words + tuple(
+            word._replace(start=word.start + shift, end=word.end + shift) for word in words[high:])
+        head, tail = old_annotated.slice(0, region_start), old_annotated.slice(region_end)
+        self._annotated[index] = AnnotatedText(head.text + region.text + tail.text, head.lengths + region.lengths + tail.lengths)
+        self._lines[index] = line
+        difference = sum(word.count for word in new_words) - sum(word.count for word in words[low:high])
+        self._counts[index] += difference
+        self.count += difference
+
+    def insert_line(self, index, line):
+        line = normalize_line(line)
+        annotated, words = analyse_line(line)
+        count = sum(word.count for word in words)
+        self._lines.insert(index, line)
+        self._annotated.insert(index, annotated)
+        self._words.insert(index, words)
+        self._counts.insert(index, count)
+        self.count += count
+
+    def delete_line(self, index):
+        del self._lines[index]
+        del self._annotated[index]
+        del self._words[index]
+        self.count -= self._counts.pop(index)
+
+    def splice(self, index, start, end, replacement):
+        '''
+        Replaces characters start:end of line `index` (e.g. start == end to insert a ^ or _).
+        The replacement may not contain newlines; use insert_line() for those.
+        '''
+        if '\n' in replacement:
+            raise ValueError("Use insert_line() to add lines")
+        line = self._lines[index]
+        self.set_line(index, line[:start] + replacement + line[end:])
+
+    # ============================
+    # Colour
+    # ============================
+
+    def colour_spans(self, index):
+        '''
+        [(start, end, RED or GREEN), ...] for the line, merged into runs, as offsets into the line with its inline markup.
+        RED marks unmacronized dichrona in open syllables and GREEN characters with a length mark.
+        '''
+        positions = [i for i, char in enumerate(self._lines[index]) if char not in MARK_CHARS.values()]
+        spans = []
+        for word in self._words[index]:
+            for offset, colour in enumerate(word_colours(word.word)):
+                if colour is None:
+                    continue
+                position = positions[word.start + offset]
+                if spans and spans[-1][1] == position and spans[-1][2] == colour:
+                    spans[-1] = (spans[-1][0], position + 1, colour)
+                else:
+                    spans.append((position, position + 1, colour))
+        return spans
+
+    def colour_line(self, index):
+        ''' The line with ANSI colours, identical to colour_dichrona_in_open_syllables(line). '''
+        line = self._annotated[index]
+        if not self._lines[index]:
+            return self._lines[index]
+        result = []
+        last_end = 0
+        for word in self._words[index]:
+            result.append(to_markup(line.slice(last_end, word.start)))
+            for char, length, colour in zip(word.word.text, word.word.lengths, word_colours(word.word)):
+                result.append(_ANSI[colour].format(char) if colour else char)
+                if length:
+                    result.append(MARK_CHARS[length])
+            last_end = word.end
+        result.append(to_markup(line.slice(last_end)))
+        return ''.join(result)
+
+    def colour(self):
+        return '\n'.join(self.colour_line(index) for index in range(len(self._lines)))
@@ -0,0 +1,122 @@
+'''
+Per-syllable feature arrays for syllabified lines, for e.g. training sequence-labelling models.
+
+Every syllable gets four int8 features, in this column order:
+    weight      LIGHT (0), HEAVY (1) or AMBIGUOUS (2), i.e. open with an unmarked real dichronon (see weight.py)
+    open        1 if the syllable ends in a vowel, else 0
+    dichronon   1 if the syllable contains a real dichronon, marked or not, else 0
+    accent      ACCENT_NONE, ACCENT_ACUTE, ACCENT_GRAVE or ACCENT_CIRCUMFLEX
+
+A corpus repeats the same few thousand syllables over and over, so features are computed once per
+distinct syllable (interned with a SyllableVocabulary) and gathered for all lines with one NumPy take.
+
+>> arrays = weight_arrays([syllabifier('μῆνιν ἄειδε θεά')])
+>> arrays['weight']
+>> array([1, 2, 2, 1, 0, 0, 2], dtype=int8)
+>> matrix, lengths = feature_matrix(lines, max_len=40)
+>> matrix.shape
+>> (len(lines), 40, 4)
+'''
+
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+from .filter_dichrona import word_with_real_dichrona
+from .instrument import INSTRUMENTATION
+from .markup import strip_markup
+from .utils import only_bases
+from .vocabulary import SyllableVocabulary
+from .vowels import vowel
+from .weight import AMBIGUOUS, HEAVY, LIGHT, long_nucleus
+
+FEATURES = ('weight', 'open', 'dichronon', 'accent')
+
+ACCENT_NONE = 0
+ACCENT_ACUTE = 1
+ACCENT_GRAVE = 2
+ACCENT_CIRCUMFLEX = 3
+
+_ACCENT_MARKS = {'\u0301': ACCENT_ACUTE, '\u0300': ACCENT_GRAVE, '\u0342': ACCENT_CIRCUMFLEX}
+
+@lru_cache(maxsize=65536)
+def syllable_features(syllable):
+    '''
+    (weight, open, dichronon, accent) for one syllable of a syllabified line.
+    >> syllable_features('νι')
+    >> (2, 1, 1, 0)
+    '''
+    base_form = only_bases(strip_markup(syllable))
+    is_open = bool(base_form) and vowel(base_form[-1])
+    dichronon = word_with_real_dichrona(syllable)
+
+    if not base_form:
+        weight = LIGHT
+    elif not is_open or long_nucleus(syllable):
+        weight = HEAVY
+    elif dichronon and '^' not in syllable:
+        weight = AMBIGUOUS
+    else:
+        weight = LIGHT
+
+    accent = ACCENT_NONE
+    for mark in unicodedata.normalize('NFD', syllable):
+        if mark in _ACCENT_MARKS:
+            accent = _ACCENT_MARKS[mark]
+            break
+
+    return weight, int(is_open), int(dichronon), accent
+
+INSTRUMENTATION.register_cache('features.syllable_features', syllable_features)
+
+def feature_table(vocabulary, table=None):
+    '''
+    int8 array of shape (len(vocabulary), 4): the features of every syllable of the vocabulary, by ID.
+    Pass the previous table to only compute the rows of syllables added since.
+    '''
+    done = 0 if table is None else len(table)
+    rows = [syllable_features(vocabulary.syllable(i)) for i in range(done, len(vocabulary))]
+    new = np.array(rows, dtype=np.int8).reshape(-1, len(FEATURES))
+    return new if table is None else np.concatenate([table, new])
+
+# ============================
+# Batch API
+# ============================
+
+def weight_arrays(lines, syllabified=True, vocabulary=None):
+    '''
+    Features of every syllable of every line, in one pass.
+    Lines are syllabifier output, or raw strings with syllabified=False.
+
+    Returns a dict of flat int8 arrays 'weight', 'open', 'dichronon' and 'accent',
+    plus int64 'offsets' such that line i is [offsets[i]:offsets[i + 1]] of each array.
+    '''
+    vocabulary = vocabulary if vocabulary is not None else SyllableVocabulary()
+    ids, offsets = vocabulary.encode_corpus(lines, syllabified=syllabified)
+    gathered = feature_table(vocabulary)[ids] if len(ids) else np.zeros((0, len(FEATURES)), dtype=np.int8)
+    arrays = {name: np.ascontiguousarray(gathered[:, column]) for column, name in enumerate(FEATURES)}
+    arrays['offsets'] = offsets
+    return arrays
+
+def feature_matrix(lines, max_len=None, pad=-1, syllabified=True, vocabulary=None):
+    '''
+    Padded int8 feature matrix of shape (lines, max_len, 4) for sequence-labelling models,
+    with positions past the end of a line filled with `pad`. Longer lines are truncated to max_len
+    (default: the longest line). Also returns the int64 array of (untruncated) line lengths.
+    '''
+    vocabulary = vocabulary if vocabulary is not None else SyllableVocabulary()
+    ids, offsets = vocabulary.encode_corpus(lines, syllabified=syllabified)
+    lengths = np.diff(offsets)
+    if max_len is None:
+        max_len = int(lengths.max()) if len(lengths) else 0
+
+    # Row-major index of every syllable in the padded matrix
+    line_index = np.repeat(np.arange(len(lengths)), lengths)
+    position = np.arange(len(ids)) - np.repeat(offsets[:-1], lengths)
+    keep = position < max_len
+
+    matrix = np.full((len(lengths), max_len, len(FEATURES)), pad, dtype=np.int8)
+    if len(ids):
+        matrix[line_index[keep], position[keep]] = feature_table(vocabulary)[ids[keep]]
+    return matrix, lengths
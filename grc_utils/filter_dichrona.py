@@ -20,11 +20,19 @@ Note concerning the logical relationship between the five accentuation word clas
     PROPAROXYTONE implies that the vowel in the ultima is short, except for the πόλις declination's εως, which however has no DICHRONA.
     PERISPOMENON implies that the vowel in the ultima is long (as all vowels with circumf.)
     PROPERISPOMENON implies that the vowel in the ultima is short (as per the σωτῆρα-rule) and that the vowel in the penultima is long (as all vowels with circumf.)
+
+Every function that syllabifies takes an optional convention (a name in syllabifier.CONVENTIONS or compiled rules),
+passed on to syllabifier(): where a consonant cluster is divided decides which syllables are open,
+and which letters count as the ultima and penultima.
 '''
 import re
 import unicodedata
+from functools import wraps
 
-from .utils import is_open_syllable_in_word_in_synapheia, open_syllable_in_word, oxia_to_tonos
+from .instrument import INSTRUMENTATION
+from .markup import MARK_CHARS, AnnotatedText, has_long_mark, has_short_mark, parse_markup, strip_markup, to_markup
+from .utils import oxia_to_tonos
+from .weight import is_open_syllable_in_word_in_synapheia, open_syllable_in_word
 from .dichrona import DICHRONA
 from .syllabifier import patterns, syllabifier
 from .vowels_short import short_set
@@ -37,24 +45,24 @@ from .vowels import ACUTES, vowel
 # ultima
 # penultima
 
-def ultima(word):
+def ultima(word, convention=None):
     '''
     >> ultima('ποτιδέρκομαι')
     >> μαι
     '''
-    word = word.replace('_', '').replace('^', '')
-    list_of_syllables = syllabifier(word)
+    word = strip_markup(word)
+    list_of_syllables = syllabifier(word, convention=convention)
     ultima = list_of_syllables[-1]
 
     return ultima
 
-def penultima(word):
+def penultima(word, convention=None):
     '''
     >> penultima('ποτιδέρκομαι')
     >> κο
     '''
-    word = word.replace('_', '').replace('^', '')
-    list_of_syllables = syllabifier(word)
+    word = strip_markup(word)
+    list_of_syllables = syllabifier(word, convention=convention)
     penultima = list_of_syllables[-2]
 
     return penultima
@@ -67,13 +75,13 @@ def penultima(word):
 # paroxytone
 # proparoxytone
 
-def properispomenon(word):
+def properispomenon(word, convention=None):
     '''
     >> properispomenon('ὗσον')
     >> True
     '''
-    word = word.replace('_', '').replace('^', '')
-    list_of_syllables = syllabifier(word)
+    word = strip_markup(word)
+    list_of_syllables = syllabifier(word, convention=convention)
     if len(list_of_syllables) >= 2: 
         penultima = list_of_syllables[-2]
         circumflexes = r'[ᾶῆῖῦῶἇἆἦἧἶἷὖὗὦὧἦἧἆἇὧὦᾆᾇᾷᾖᾗᾦᾧῷῇ]'
@@ -85,13 +93,13 @@ def properispomenon(word):
     else:
         return False
     
-def paroxytone(word):
+def paroxytone(word, convention=None):
     '''
     >> paroxytone('λελῠμένος')
     >> True
     '''
-    word = word.replace('_', '').replace('^', '')
-    list_of_syllables = syllabifier(word)
+    word = strip_markup(word)
+    list_of_syllables = syllabifier(word, convention=convention)
     if len(list_of_syllables) >= 2: 
         penultima = list_of_syllables[-2]
         acutes = r'[άέήίύώἄἅἔἕὄὅἤἥἴἵὔὕὤὥΐΰᾄᾅᾴᾔᾕῄᾤᾥῴ]'
@@ -103,13 +111,13 @@ def paroxytone(word):
     else:
         return False
 
-def proparoxytone(word):
+def proparoxytone(word, convention=None):
     '''
     >> proparoxytone('ποτιδέρκομαι')
     >> True
     '''
-    word = word.replace('_', '').replace('^', '')
-    list_of_syllables = syllabifier(word)
+    word = strip_markup(word)
+    list_of_syllables = syllabifier(word, convention=convention)
     if len(list_of_syllables) >= 3: 
         antepenultima = list_of_syllables[-3]
         acutes = r'[άέήόίύώἄἅἔἕὄὅἤἥἴἵὔὕὤὥΐΰᾄᾅᾴᾔᾕῄᾤᾥῴ]'
@@ -216,17 +224,18 @@ def long_acute(syllable):
     '''
     Function needed to compute the paroxytone version of the σωτῆρα-rule.
     '''
-    if '_' in syllable and any(char in ACUTES for char in syllable):
+    if has_long_mark(syllable) and any(char in ACUTES for char in strip_markup(syllable)):
         return True
-    return bool(re.search(long_acutes, syllable))
+    return bool(re.search(long_acutes, strip_markup(syllable)))
 
 def short_vowel(syllable):
     """
     Determines if a syllable has a short vowel. Compatible with caret markup of brevia.
     """
-    if '^' in syllable:
+    if has_short_mark(syllable):
         return True
 
+    syllable = strip_markup(syllable)
     return any(vowel in syllable for vowel in short_set)
 
 def make_only_greek(string):
@@ -259,7 +268,7 @@ def make_only_greek(string):
 #   properispomenon_with_dichronon_only_in_ultima
 #   proparoxytone_with_dichronon_only_in_ultima
 
-def paroxytone_short_ultima_with_dichronon_only_in_penultima(string):
+def paroxytone_short_ultima_with_dichronon_only_in_penultima(string, convention=None):
     '''
     Is a word disambiguated by the σωτῆρᾰ-rule for penultimae?
 
@@ -268,11 +277,11 @@ def paroxytone_short_ultima_with_dichronon_only_in_penultima(string):
     if not word_with_real_dichrona(string):
         return False
     
-    if not paroxytone(string):
+    if not paroxytone(string, convention):
         return False
     
-    ultima_str = ultima(string)
-    penultima_str = penultima(string)
+    ultima_str = ultima(string, convention)
+    penultima_str = penultima(string, convention)
 
     if not short_vowel(ultima_str):
         return False
@@ -288,7 +297,7 @@ def paroxytone_short_ultima_with_dichronon_only_in_penultima(string):
     return True
 
 
-def paroxytone_long_penultima_with_dichronon_only_in_ultima(string):
+def paroxytone_long_penultima_with_dichronon_only_in_ultima(string, convention=None):
     """
     Is a word disambiguated by the first half of the σωτῆρᾰ-rule for ultimae?
 
@@ -302,11 +311,11 @@ def paroxytone_long_penultima_with_dichronon_only_in_ultima(string):
     if not word_with_real_dichrona(string):
         return False
     
-    if not paroxytone(string):
+    if not paroxytone(string, convention):
         return False
     
-    ultima_str = ultima(string)
-    penultima_str = penultima(string)
+    ultima_str = ultima(string, convention)
+    penultima_str = penultima(string, convention)
     
     if not long_acute(penultima_str):
         return False
@@ -321,7 +330,7 @@ def paroxytone_long_penultima_with_dichronon_only_in_ultima(string):
 
     return True
 
-def properispomenon_with_dichronon_only_in_ultima(string):
+def properispomenon_with_dichronon_only_in_ultima(string, convention=None):
     """
     Is a word disambiguated by the second half of the σωτῆρᾰ-rule for ultimae?
 
@@ -338,11 +347,11 @@ def properispomenon_with_dichronon_only_in_ultima(string):
         return False
     
     # Check if the accent type of the string is properispomenon
-    if not properispomenon(string):
+    if not properispomenon(string, convention):
         return False
     
     # Extract the ultima of the string
-    ultima_str = ultima(string)
+    ultima_str = ultima(string, convention)
 
     # Ensure the ultima itself is recognized by `word_with_real_dichrona`
     if not word_with_real_dichrona(ultima_str):
@@ -358,7 +367,7 @@ def properispomenon_with_dichronon_only_in_ultima(string):
 
     return True
 
-def proparoxytone_with_dichronon_only_in_ultima(string):
+def proparoxytone_with_dichronon_only_in_ultima(string, convention=None):
     """
     Determines if a given string satisfies the following criteria:
     - The entire string is recognized by `word_with_real_dichrona` as containing a real dichrona.
@@ -377,11 +386,11 @@ def proparoxytone_with_dichronon_only_in_ultima(string):
         return False
     
     # Check if the accent type of the string is PROPAROXYTONE
-    if not proparoxytone(string):
+    if not proparoxytone(string, convention):
         return False
     
     # Extract the ultima of the string
-    ultima_str = ultima(string)
+    ultima_str = ultima(string, convention)
 
     # Ensure the ultima itself is recognized by `word_with_real_dichrona`
     if not word_with_real_dichrona(ultima_str):
@@ -400,10 +409,28 @@ def proparoxytone_with_dichronon_only_in_ultima(string):
 # The Actual Filter Functions
 # ============================
 
+def _filter(function):
+    '''
+    Turns a function that returns why it rejects its string (a reason such as 'empty'), or None if it accepts it,
+    into the filter proper, which returns True or False and counts every verdict when instrumentation is enabled
+    (filter.<name>.accepted, filter.<name>.rejected.<reason>).
+    '''
+    accepted = f'filter.{function.__name__}.accepted'
+    rejected = f'filter.{function.__name__}.rejected.'
+
+    @wraps(function)
+    def wrapper(string, convention=None):
+        reason = function(string, convention)
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count(accepted if reason is None else rejected + reason)
+        return reason is None
+    return wrapper
+
 # has_ambiguous_dichrona
 # has_ambiguous_dichrona_in_open_syllables
 
-def has_ambiguous_dichrona(string):
+@_filter
+def has_ambiguous_dichrona(string, convention=None):
     """
     Identifies strings with *truly ambiguous dichrona*. Five criteria must be met:
         - identified by `word_with_real_dichrona` as containing a real dichronon.
@@ -412,30 +439,33 @@ def has_ambiguous_dichrona(string):
         - not be identified by `properispomenon_with_dichronon_only_in_ultima`.
         - not be identified by `proparoxytone_with_dichronon_only_in_ultima`.
     """
-    if string:
-        # Cleanse the string
-        string = make_only_greek(string)
-
-        if not string:
-            return False  # No valid characters left
-
-        # Normalize the string and process
-        tonos = oxia_to_tonos(string)
-        token = unicodedata.normalize('NFC', tonos)
-
-        # Checks
-        word_check = word_with_real_dichrona(token)
-        paroxytone_penultima_check = paroxytone_short_ultima_with_dichronon_only_in_penultima(token)
-        paroxytone_ultima_check = paroxytone_long_penultima_with_dichronon_only_in_ultima(token)
-        properispomenon_check = properispomenon_with_dichronon_only_in_ultima(token)
-        proparoxytone_check = proparoxytone_with_dichronon_only_in_ultima(token)
-
-        # Return True only if all criteria are met
-        return word_check and not (paroxytone_penultima_check or paroxytone_ultima_check or properispomenon_check or proparoxytone_check)
-
-    return False
+    if not string:
+        return 'empty'
 
-def has_ambiguous_dichrona_in_open_syllables(string):
+    # Cleanse the string
+    string = make_only_greek(string)
+    if not string:
+        return 'no_greek'  # No valid characters left
+
+    # Normalize the string and process
+    tonos = oxia_to_tonos(string)
+    token = unicodedata.normalize('NFC', tonos)
+
+    # Checks, in order; the first that fires is the reason for the rejection
+    if not word_with_real_dichrona(token):
+        return 'no_real_dichrona'
+    if paroxytone_short_ultima_with_dichronon_only_in_penultima(token, convention):
+        return 'paroxytone_short_ultima'
+    if paroxytone_long_penultima_with_dichronon_only_in_ultima(token, convention):
+        return 'paroxytone_long_penultima'
+    if properispomenon_with_dichronon_only_in_ultima(token, convention):
+        return 'properispomenon'
+    if proparoxytone_with_dichronon_only_in_ultima(token, convention):
+        return 'proparoxytone'
+    return None
+
+@_filter
+def has_ambiguous_dichrona_in_open_syllables(string, convention=None):
     '''
     Finds strings that have at least one syllable that is both open and has an ambiguous dichronon.
 
@@ -445,16 +475,16 @@ def has_ambiguous_dichrona_in_open_syllables(string):
     Such a case should not be considered ambiguous.
     '''
     if not string:
-        return False
+        return 'empty'
 
     greek = make_only_greek(string)
     tonos = oxia_to_tonos(greek)
     normal = unicodedata.normalize('NFC', tonos)
 
-    if not has_ambiguous_dichrona(normal):
-        return False
+    if not has_ambiguous_dichrona(normal, convention):
+        return 'not_ambiguous'
 
-    list_of_syllables = syllabifier(normal)
+    list_of_syllables = syllabifier(normal, convention=convention)
     total_syllables = len(list_of_syllables)
 
     dichronic_open_syllable_positions = [
@@ -464,50 +494,72 @@ def has_ambiguous_dichrona_in_open_syllables(string):
     ]
 
     if not dichronic_open_syllable_positions:
-        return False
+        return 'no_open_dichronon'
     
     if total_syllables < 2:
-        return True
+        return None
     
     ultima = list_of_syllables[-1]
     penultima = list_of_syllables[-2]
 
     for position, syllable in dichronic_open_syllable_positions:
-        if position == -2 and paroxytone(normal) and short_vowel(ultima):
+        if position == -2 and paroxytone(normal, convention) and short_vowel(ultima):
             continue  # Penultima disambiguated
         if position == -1:
-            if paroxytone(normal) and long_acute(penultima):
+            if paroxytone(normal, convention) and long_acute(penultima):
                 continue  # Ultima disambiguated
-            if properispomenon(normal) or proparoxytone(normal):
+            if properispomenon(normal, convention) or proparoxytone(normal, convention):
                 continue  # Ultima disambiguated
-        return True
+        return None
 
-    return False
+    return 'disambiguated_by_accent'
 
 # ============================
 # Counting 
 # ============================
 
-def count_ambiguous_dichrona_in_open_syllables(string):
+def annotated_words(string):
+    '''
+    Line (string with inline markup, or AnnotatedText of NFC text) -> AnnotatedText of the normalized line,
+    and its words that contain a vowel, as (start, end, AnnotatedText) in bare-text offsets.
+    '''
+    if not isinstance(string, AnnotatedText):
+        string = parse_markup(unicodedata.normalize('NFC', oxia_to_tonos(string)))
+    words = [
+        (match.start(), match.end(), string.slice(match.start(), match.end()))
+        for match in re.finditer(r'\w+', string.text)
+        if any(vowel(char) for char in match.group())
+    ]
+    return string, words
+
+def annotated_syllables(word, convention=None):
+    '''
+    AnnotatedText word -> list of AnnotatedText syllables. Only the bare text is syllabified,
+    which gives the same syllable boundaries as syllabifying the inline markup.
+    '''
+    return word.split(syllabifier(word.text, convention=convention))
+
+def count_ambiguous_dichrona_in_open_syllables(string, convention=None):
+    '''
+    Accepts a string with inline markup or an AnnotatedText.
+    '''
     count = 0
     
     if not string:
         return count
 
-    string = unicodedata.normalize('NFC', oxia_to_tonos(string))
-    if not has_ambiguous_dichrona(string):
+    line, words = annotated_words(string)
+    if not has_ambiguous_dichrona(line.text, convention):
         return count
     
-    words = re.findall(r'[\w_^]+', string)
-    words = [word for word in words if any(vowel(char) for char in word)]
-    for word in words:
-        list_of_syllables = syllabifier(word) # I've updated the syllabifier to support markup (^, _)
+    for _, _, word in words:
+        list_of_syllables = annotated_syllables(word, convention)
         total_syllables = len(list_of_syllables)
 
         dichronic_open_syllable_positions = [
             (-(total_syllables - i), syllable)  # Position from the end
             for i, syllable in enumerate(list_of_syllables)
-            if word_with_real_dichrona(syllable) and open_syllable_in_word(syllable, list_of_syllables)
+            if word_with_real_dichrona(syllable.text) and open_syllable_in_word(syllable, list_of_syllables)
         ]
         #print(dichronic_open_syllable_positions) # debugging
 
@@ -522,104 +574,78 @@ def count_ambiguous_dichrona_in_open_syllables(string):
         penultima = list_of_syllables[-2]
 
         for position, syllable in dichronic_open_syllable_positions:
-            if position == -2 and paroxytone(word) and short_vowel(ultima):
+            if position == -2 and paroxytone(word, convention) and short_vowel(ultima):
                 continue  # Penultima disambiguated
-            elif position == -1 and paroxytone(word) and long_acute(penultima):
+            elif position == -1 and paroxytone(word, convention) and long_acute(penultima):
                 continue  # Ultima disambiguated
-            elif position == -1 and properispomenon(word) or proparoxytone(word):
+            elif position == -1 and properispomenon(word, convention) or proparoxytone(word, convention):
                 continue  # Ultima disambiguated
-            elif any(char in '^_' for char in syllable): # means syllable has been macronized already
+            elif syllable.marked: # means syllable has been macronized already
                 continue
             else:
                 count += 1
 
     return count
 
-def count_dichrona_in_open_syllables(string):
+def count_dichrona_in_open_syllables(string, convention=None):
+    '''
+    Accepts a string with inline markup or an AnnotatedText.
+    '''
     count = 0
     
     if not string:
         return count
 
-    string = unicodedata.normalize('NFC', oxia_to_tonos(string))
-    
-    words = re.findall(r'[\w_^]+', string)
-    words = [word for word in words if any(vowel(char) for char in word)]
-    for i, word in enumerate(words):
-        list_of_syllables = syllabifier(word)
+    _, words = annotated_words(string)
+    for i, (_, _, word) in enumerate(words):
+        list_of_syllables = annotated_syllables(word, convention)
         if i < len(words) - 1:
-            next_word = words[i + 1]
+            next_word = words[i + 1][2]
             for syllable in list_of_syllables:
-                if word_with_real_dichrona(syllable) and is_open_syllable_in_word_in_synapheia(syllable, list_of_syllables, next_word) and not any(char in '^_' for char in syllable): # = unmacronized open dichronon in synapheia
+                if word_with_real_dichrona(syllable.text) and is_open_syllable_in_word_in_synapheia(syllable, list_of_syllables, next_word) and not syllable.marked: # = unmacronized open dichronon in synapheia
                     count += 1
         else:
             for syllable in list_of_syllables:
-                if word_with_real_dichrona(syllable) and open_syllable_in_word(syllable, list_of_syllables) and not any(char in '^_' for char in syllable): # = unmacronized open dichronon at line end
+                if word_with_real_dichrona(syllable.text) and open_syllable_in_word(syllable, list_of_syllables) and not syllable.marked: # = unmacronized open dichronon at line end
                     count += 1
 
     return count
 
-def colour_dichrona_in_open_syllables(string):
+def colour_dichrona_in_open_syllables(string, convention=None):
+    '''
+    Accepts a string with inline markup or an AnnotatedText; returns inline markup with ANSI colours:
+    green for characters with a length mark, red for unmacronized dichrona in open syllables.
+    '''
     if not string:
         return string
 
-    # Normalize and convert oxia to tonos
-    string = unicodedata.normalize('NFC', oxia_to_tonos(string))
-    
-    # Split into words and filter for those with vowels
-    words = re.findall(r'[\w_^]+', string)
-    words = [word for word in words if any(vowel(char) for char in word)]
+    line, words = annotated_words(string)
     
     # Process each word and build the colored output
     result = []
     last_end = 0
     
-    for word in words:
-        # Find the word's position in the original string
-        start = string.index(word, last_end)
-        end = start + len(word)
-        
+    for start, end, word in words:
         # Add any non-word characters before this word
-        result.append(string[last_end:start])
+        result.append(to_markup(line.slice(last_end, start)))
         
-        # Syllabify the word
-        list_of_syllables = syllabifier(word)
-        colored_word = ""
-        
-        # Process each character with look-ahead for _ or ^
-        for i, char in enumerate(word):
-            # Check if this char is followed by _ or ^
-            is_green = (i + 1 < len(word) and word[i + 1] in '_^')
-            
-            # Check if this char is part of a dichrona in an open syllable
-            is_red = False
-            if not is_green and not (char in '_^'):  # Skip if it's _ or ^ itself
-                # Find which syllable this char belongs to
-                char_pos = 0
-                for syllable in list_of_syllables:
-                    syllable_len = len(syllable)
-                    if char_pos <= i < char_pos + syllable_len:
-                        if (word_with_real_dichrona(syllable) and 
-                            open_syllable_in_word(syllable, list_of_syllables) and 
-                            not any(c in '^_' for c in syllable) and 
-                            vowel(char)):
-                            is_red = True
-                        break
-                    char_pos += syllable_len
-            
-            # Apply coloring
-            if is_red:
-                colored_word += f'\033[31m{char}\033[0m'
-            elif is_green:
-                colored_word += f'\033[32m{char}\033[0m'
-            else:
-                colored_word += char
+        list_of_syllables = annotated_syllables(word, convention)
+        for syllable in list_of_syllables:
+            is_red_syllable = (word_with_real_dichrona(syllable.text) and
+                               open_syllable_in_word(syllable, list_of_syllables) and
+                               not syllable.marked)
+            for char, length in zip(syllable.text, syllable.lengths):
+                if length:
+                    result.append(f'\033[32m{char}\033[0m{MARK_CHARS[length]}')
+                elif is_red_syllable and vowel(char):
+                    result.append(f'\033[31m{char}\033[0m')
+                else:
+                    result.append(char)
         
-        result.append(colored_word)
         last_end = end
     
     # Add any remaining characters after the last word
-    result.append(string[last_end:])
+    result.append(to_markup(line.slice(last_end)))
     
     return "".join(result)
 
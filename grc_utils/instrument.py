@@ -0,0 +1,198 @@
+'''
+Lightweight instrumentation: per-stage timers, counters and cache hit rates across the package.
+
+Disabled by default, at the cost of one attribute check per instrumented call. Enable it
+    - for the whole process, with the environment variable GRC_UTILS_INSTRUMENT=1,
+    - for a block, with the instrumented() context manager,
+    - or with enable() / disable().
+What is recorded:
+    timers      calls, total and maximum time of the syllabifier and each of its stages
+                (syllabifier.normalize, .divide, .syllabify, .reshuffle, .final_reshuffle, .definitive)
+    counters    e.g. filter.has_ambiguous_dichrona.rejected.properispomenon, syllable_table.hits,
+                analysis_cache.misses
+    caches      hit rates of the package's lru_caches (always available, read when a snapshot is taken)
+                and of every counter pair <name>.hits / <name>.misses
+
+snapshot() returns all of it as a dict; dump() writes it atomically to a JSON file, and dump_periodically() does so
+every `interval` seconds from a daemon thread and once more at exit. GRC_UTILS_INSTRUMENT_FILE (with
+GRC_UTILS_INSTRUMENT_INTERVAL, default 60 seconds) sets that up from the environment.
+
+>> with instrumented() as instrumentation:
+>>     for line in lines:
+>>         syllabifier(line)
+>> instrumentation.snapshot()['timers']['syllabifier.reshuffle']
+>> {'calls': 15693, 'total_s': 0.41, 'mean_us': 26.1, 'max_us': 311.0}
+'''
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_TRUE = ('1', 'true', 'yes', 'on')
+
+class Instrumentation:
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._timers = {}   # name -> [calls, total ns, max ns]
+        self._counters = {}
+        self._caches = {}   # name -> lru_cache-wrapped function
+        self.started = time.time()
+
+    def record(self, name, nanoseconds):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = [1, nanoseconds, nanoseconds]
+            else:
+                timer[0] += 1
+                timer[1] += nanoseconds
+                if nanoseconds > timer[2]:
+                    timer[2] = nanoseconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        ''' Times a block (if enabled). For hot loops, call record() with your own perf_counter_ns() deltas. '''
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def laps(self, name):
+        ''' A Laps timer for a run of consecutive stages (if enabled; otherwise a timer that does nothing). '''
+        return Laps(self, name) if self.enabled else NO_LAPS
+
+    def register_cache(self, name, function):
+        ''' Reports the hit rate of an lru_cache-wrapped function in every snapshot. '''
+        with self._lock:
+            self._caches[name] = function
+        return function
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            timers = {name: {'calls': calls, 'total_s': total / 1e9, 'mean_us': total / calls / 1e3, 'max_us': longest / 1e3}
+                      for name, (calls, total, longest) in sorted(self._timers.items())}
+            counters = dict(sorted(self._counters.items()))
+            functions = sorted(self._caches.items())
+        caches = {}
+        for name, function in functions:
+            info = function.cache_info()
+            caches[name] = _hit_rate(info.hits, info.misses, size=info.currsize)
+        for name in counters:
+            if name.endswith('.hits'):
+                prefix = name[:-len('.hits')]
+                caches[prefix] = _hit_rate(counters[name], counters.get(f'{prefix}.misses', 0))
+        return {'enabled': self.enabled, 'since': self.started, 'time': time.time(),
+                'timers': timers, 'counters': counters, 'caches': caches}
+
+    def dump(self, path):
+        ''' Writes snapshot() to a JSON file atomically. '''
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+class Laps:
+    '''
+    Times consecutive stages of one call: lap(stage) records the time since the previous lap as 'name.stage',
+    done() the time since the start as 'name'.
+    '''
+
+    __slots__ = ('instrumentation', 'name', 'start', 'last')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = self.last = time.perf_counter_ns()
+
+    def __call__(self, stage):
+        now = time.perf_counter_ns()
+        self.instrumentation.record(f'{self.name}.{stage}', now - self.last)
+        self.last = now
+
+    def done(self):
+        self.instrumentation.record(self.name, time.perf_counter_ns() - self.start)
+
+class _NoLaps:
+
+    __slots__ = ()
+
+    def __call__(self, stage):
+        pass
+
+    def done(self):
+        pass
+
+NO_LAPS = _NoLaps()
+
+def _hit_rate(hits, misses, **extra):
+    total = hits + misses
+    return dict({'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}, **extra)
+
+INSTRUMENTATION = Instrumentation()
+
+def enable():
+    INSTRUMENTATION.enabled = True
+
+def disable():
+    INSTRUMENTATION.enabled = False
+
+def snapshot():
+    return INSTRUMENTATION.snapshot()
+
+def reset():
+    INSTRUMENTATION.reset()
+
+def dump(path):
+    INSTRUMENTATION.dump(path)
+
+@contextmanager
+def instrumented(reset_first=True):
+    ''' Enables instrumentation for a block (starting from zero unless reset_first=False), then restores the previous state. '''
+    previous = INSTRUMENTATION.enabled
+    if reset_first:
+        INSTRUMENTATION.reset()
+    INSTRUMENTATION.enabled = True
+    try:
+        yield INSTRUMENTATION
+    finally:
+        INSTRUMENTATION.enabled = previous
+
+def dump_periodically(path, interval=60.0):
+    '''
+    Enables instrumentation and dumps a snapshot to `path` every `interval` seconds and at exit.
+    Returns a threading.Event; set it to stop.
+    '''
+    enable()
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            INSTRUMENTATION.dump(path)
+
+    threading.Thread(target=loop, name='grc_utils-instrumentation', daemon=True).start()
+    atexit.register(INSTRUMENTATION.dump, path)
+    return stop
+
+if os.environ.get('GRC_UTILS_INSTRUMENT', '').lower() in _TRUE:
+    enable()
+if os.environ.get('GRC_UTILS_INSTRUMENT_FILE'):
+    dump_periodically(os.environ['GRC_UTILS_INSTRUMENT_FILE'], float(os.environ.get('GRC_UTILS_INSTRUMENT_INTERVAL', 60)))
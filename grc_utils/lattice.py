@@ -0,0 +1,168 @@
+'''
+Scansion lattices: every syllable of a line with the set of weights it may have, and why.
+
+Two things leave a syllable's weight open:
+    DICHRONON            an open syllable whose nucleus is an unmarked dichronon
+    MUTA_CUM_LIQUIDA     a syllable closed only by a stop before a liquid or nasal (πατ|ρός), which the syllabifier
+                         treats as heterosyllabic, but which comedy (and often tragedy) treats as homosyllabic (πα|τρός)
+and, with correption=True (for epic and elegy),
+    CORREPTION           a heavy open syllable at the end of a word before a word starting with a vowel (epic correption:
+                         ἄνδρα μοι ἔννεπε, with μοι light)
+Expanding every combination is exponential in the number of such syllables. A lattice instead keeps one
+weight mask per syllable, which a Meter consumes directly (ambiguous syllables are the A of its alphabet)
+and which can be intersected with a meter in time linear in the line.
+
+>> lattice = ScansionLattice.from_line('τέκνον, πατρὸς ἄκουε')
+>> lattice.pattern
+>> '⏓–⏓⏑⏓–⏑'
+>> lattice.ambiguities()
+>> [(0, 'τέκ', ('muta_cum_liquida',), '⏑–'), (2, 'πατ', ('muta_cum_liquida',), '⏑–'), (4, 'ς ἄ', ('dichronon',), '⏑–')]
+>> lattice.intersect(METERS['iambic_trimeter'])
+>> ScansionLattice.from_line('ἄνδρα μοι ἔννεπε, Μοῦσα, πολύτροπον, ὃς μάλα πολλὰ', correption=True).intersect('dactylic_hexameter')
+>> ScansionLattice('–⏑⏑–⏑⏑–⏑⏑–⏑⏑–⏑⏑–⏓')
+
+A syllable the meter leaves no weight for has an empty mask, shown as ∅ (CONTRADICTION) in the pattern,
+not as × (the anceps of the meter definitions). Its weight is undefined, so `weights` refuses such a lattice;
+`options` holds the raw masks and contradictions() lists the syllables.
+'''
+
+import re
+
+import numpy as np
+
+from .consonants import liquida, muta
+from .markup import strip_markup
+from .meter import HEAVY_BIT, LIGHT_BIT, METERS
+from .scansion import scan_line
+from .utils import only_bases
+from .vowels import vowel
+from .weight import AMBIGUOUS, HEAVY, LIGHT, WEIGHT_SYMBOLS, long_nucleus
+
+# Causes of ambiguity (bits)
+DICHRONON = 1
+MUTA_CUM_LIQUIDA = 2
+CORREPTION = 4
+
+CAUSES = {DICHRONON: 'dichronon', MUTA_CUM_LIQUIDA: 'muta_cum_liquida', CORREPTION: 'correption'}
+
+# Symbol of a syllable with no weight left
+CONTRADICTION = '∅'
+
+MASK_SYMBOLS = {
+    0: CONTRADICTION,
+    LIGHT_BIT: WEIGHT_SYMBOLS[LIGHT],
+    HEAVY_BIT: WEIGHT_SYMBOLS[HEAVY],
+    LIGHT_BIT | HEAVY_BIT: WEIGHT_SYMBOLS[AMBIGUOUS],
+}
+
+_MUTA = frozenset(muta)
+_LIQUIDA = re.compile(liquida)
+_WEIGHT_MASKS = {LIGHT: LIGHT_BIT, HEAVY: HEAVY_BIT, AMBIGUOUS: LIGHT_BIT | HEAVY_BIT}
+
+def _muta_cum_liquida(syllable, next_syllable):
+    '''
+    Whether the syllable is closed only by a stop that forms a muta cum liquida with the onset of the next syllable,
+    and would be light if the stop went with the liquid.
+    '''
+    bases = only_bases(strip_markup(syllable))
+    next_bases = only_bases(strip_markup(next_syllable))
+    if len(bases) < 2 or not next_bases:
+        return False
+    if not (bases[-1] in _MUTA and vowel(bases[-2]) and _LIQUIDA.match(next_bases[0])):
+        return False
+    return not long_nucleus(syllable)
+
+def _correption(syllable, next_syllable):
+    ''' Whether the next syllable, and so the next word (the syllable is an ultima), starts with a vowel. '''
+    next_bases = only_bases(strip_markup(next_syllable))
+    return bool(next_bases) and vowel(next_bases[0])
+
+class ScansionLattice:
+    '''
+    syllables   the syllabifier output for the line
+    options     uint8 weight mask per syllable (LIGHT_BIT, HEAVY_BIT; 0 if no weight is left)
+    causes      uint8 cause mask per syllable (DICHRONON, MUTA_CUM_LIQUIDA, CORREPTION)
+    '''
+
+    def __init__(self, syllables, options, causes):
+        self.syllables = syllables
+        self.options = options
+        self.causes = causes
+
+    @classmethod
+    def from_scansion(cls, scansion, correption=False):
+        '''
+        The lattice of a Scansion. With correption=True, a heavy open ultima before a vowel may also be light.
+        '''
+        syllables = scansion.syllables
+        options = np.array([_WEIGHT_MASKS[weight] for weight in scansion.weights.tolist()], dtype=np.uint8)
+        causes = np.where(scansion.weights == AMBIGUOUS, DICHRONON, 0).astype(np.uint8)
+        for i in range(len(syllables) - 1):
+            if not scansion.open[i] and _muta_cum_liquida(syllables[i], syllables[i + 1]):
+                options[i] = LIGHT_BIT | HEAVY_BIT
+                causes[i] |= MUTA_CUM_LIQUIDA
+            elif (correption and scansion.open[i] and scansion.ultima[i] and scansion.weights[i] == HEAVY
+                  and _correption(syllables[i], syllables[i + 1])):
+                options[i] = LIGHT_BIT | HEAVY_BIT
+                causes[i] |= CORREPTION
+        return cls(syllables, options, causes)
+
+    @classmethod
+    def from_line(cls, line, convention=None, correption=False):
+        return cls.from_scansion(scan_line(line, convention=convention), correption)
+
+    def __len__(self):
+        return len(self.syllables)
+
+    def __repr__(self):
+        return f'ScansionLattice({self.pattern!r})'
+
+    @property
+    def weights(self):
+        '''
+        int8 weights with AMBIGUOUS wherever both weights remain possible; what Meter methods read.
+        Raises ValueError if some syllable has no weight left (see contradictions()).
+        '''
+        if not self.fits():
+            raise ValueError(f"No weight left for syllables {[i for i, _ in self.contradictions()]}: {self.pattern}")
+        weights = np.full(len(self.options), AMBIGUOUS, dtype=np.int8)
+        weights[self.options == LIGHT_BIT] = LIGHT
+        weights[self.options == HEAVY_BIT] = HEAVY
+        return weights
+
+    @property
+    def pattern(self):
+        ''' The masks as metrical symbols, with CONTRADICTION for an empty mask, e.g. '–⏓∅⏑'. '''
+        return ''.join(MASK_SYMBOLS[mask] for mask in self.options.tolist())
+
+    def alternatives(self):
+        ''' The number of weight sequences the lattice stands for, i.e. what full expansion would enumerate. '''
+        return 2 ** int(np.count_nonzero(self.options == (LIGHT_BIT | HEAVY_BIT)))
+
+    def ambiguities(self):
+        '''
+        [(syllable index, syllable, cause names, possible weights as symbols), ...] for every syllable still open.
+        '''
+        result = []
+        for i in np.flatnonzero(self.options == (LIGHT_BIT | HEAVY_BIT)).tolist():
+            names = tuple(name for bit, name in CAUSES.items() if self.causes[i] & bit)
+            result.append((i, self.syllables[i], names, WEIGHT_SYMBOLS[LIGHT] + WEIGHT_SYMBOLS[HEAVY]))
+        return result
+
+    def contradictions(self):
+        ''' [(syllable index, syllable), ...] for every syllable with no weight left. '''
+        return [(i, self.syllables[i]) for i in np.flatnonzero(self.options == 0).tolist()]
+
+    def intersect(self, meter):
+        '''
+        The lattice narrowed to the weights that occur in at least one valid scansion in `meter`
+        (a Meter or a name in METERS). Syllables the meter cannot accommodate get an empty mask; check fits().
+        '''
+        if isinstance(meter, str):
+            meter = METERS[meter]
+        options = self.options & meter.possible_weights(self)
+        return ScansionLattice(self.syllables, options, self.causes.copy())
+
+    def fits(self):
+        ''' False if some syllable has no weight left, e.g. after intersecting with a meter the line does not fit. '''
+        return bool(np.all(self.options))
@@ -0,0 +1,375 @@
+'''
+A compact, memory-mapped macron lexicon.
+
+Macronized forms (e.g. from Wiktionary, the source of macrons_map) are keyed by their plain form:
+lowercased with lower_grc, NFC, oxia as tonos, and without macrons and breves (no_macrons). The value of every key
+is its length annotation (see markup.py), one code per character, so that the same entry serves any casing of the word.
+Homographs are merged: a length marked in any of them is kept, unless another marks the same character with the opposite
+length, in which case it is left unmarked.
+
+The keys are stored as a trie whose nodes are numbered level by level, so that the children of a node are a contiguous,
+sorted run of nodes. The whole lexicon is a handful of flat arrays in one file:
+    labels          the character leading into every node (index into the alphabet; uint8 or uint16)
+    first_child     the index of every node's first child, plus one sentinel (uint32)
+    values          the value ID of every node, -1 if no key ends there (int32)
+    value_offsets   offsets of the distinct annotations in value_blob (uint32)
+    value_blob      the distinct length annotations, concatenated
+MacronLexicon maps the file read-only with mmap and reads the arrays through memoryviews, so nothing is unpacked
+into Python objects, and all processes that open the same file share the same pages.
+
+>> build_lexicon(['ᾰ̓́νδρᾰ', 'κᾱλός', 'μοῦσᾰ'], 'macrons.lex')
+>> lexicon = MacronLexicon('macrons.lex')
+>> lexicon.get('Μοῦσα')
+>> 'Μοῦσᾰ'
+>> macronize_text('ἄνδρα μοι ἔννεπε, Μοῦσα,', lexicon, style='markup')
+>> 'ἄ^νδρα^ μοι ἔννεπε, Μοῦσα^,'
+'''
+
+import json
+import mmap
+import os
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from .lower_grc import lower_grc
+from .markup import COMBINING_LENGTHS, LONG, SHORT, UNMARKED, AnnotatedText, parse_lengths, to_markup
+from .utils import oxia_to_tonos
+
+MAGIC = b'GRCLEX01'
+FORMAT_VERSION = 1
+
+_COMBINING_MARKS = {code: mark for mark, code in COMBINING_LENGTHS.items()}
+
+# Merged length of a character marked long in one form and short in another; written to the lexicon as UNMARKED
+CONFLICT = LONG | SHORT
+_SETTLE = bytes(UNMARKED if code == CONFLICT else code for code in range(256))
+# A word: letters, each with its combining diacritics (e.g. a macron over an accented vowel, which has no precomposed
+# form), and the length marks ^ and _ of inline markup after any of them, so that marked words are looked up whole
+_LETTER = r'[^\W\d_][\u0300-\u036F]*'
+_WORD = re.compile(rf'{_LETTER}(?:{_LETTER}|[\^_])*')
+
+# ============================
+# Keys and values
+# ============================
+
+def plain_key(annotated):
+    ''' The lexicon key of an AnnotatedText (see parse_lengths): its bare text, lowercased with lower_grc. '''
+    return lower_grc(oxia_to_tonos(annotated.text))
+
+def merge_lengths(first, second):
+    '''
+    Merges two annotations of the same key: a length marked in either is kept, and a character marked long in one
+    and short in the other becomes CONFLICT, which stays a conflict whatever is merged into it later
+    (the merge is order-independent) and is written to the lexicon as unmarked.
+    >> merge_lengths(b'\\x00\\x01\\x02', b'\\x02\\x00\\x01')
+    >> b'\\x02\\x01\\x03'
+    '''
+    return bytes(a | b for a, b in zip(first, second))
+
+def lexicon_entries(forms):
+    '''
+    Macronized forms, or (word, macronized form) pairs, -> dict of key -> length annotation (bytes), homographs merged
+    with merge_lengths(). Pairs whose macronized form is not a macronization of the word are skipped.
+    '''
+    entries = {}
+    for form in forms:
+        word = None
+        if isinstance(form, tuple):
+            word, form = form
+        annotated = parse_lengths(unicodedata.normalize('NFC', form))
+        key = plain_key(annotated)
+        if word is not None and plain_key(parse_lengths(unicodedata.normalize('NFC', word))) != key:
+            continue
+        lengths = annotated.lengths
+        entries[key] = merge_lengths(entries[key], lengths) if key in entries else lengths
+    return entries
+
+# ============================
+# Building
+# ============================
+
+def _align(file):
+    padding = -file.tell() % 8
+    file.write(b'\0' * padding)
+
+def write_lexicon(items, path):
+    '''
+    Writes (key, length annotation) pairs, sorted by key and without duplicate keys, as a lexicon file.
+    Only the level-wise trie arrays are held in memory, never the items themselves.
+    Returns the number of keys.
+    '''
+    levels = [] # per depth: parents (index within the previous level), labels (codepoints), value IDs
+    value_ids = {}
+    value_blob = bytearray()
+    value_offsets = array('I', [0])
+    alphabet = set()
+    root_value = -1
+    previous = ''
+    count = 0
+
+    for key, lengths in items:
+        if count and key <= previous:
+            raise ValueError(f"Keys must be sorted and unique: {previous!r} before {key!r}")
+        common = 0
+        for a, b in zip(previous, key):
+            if a != b:
+                break
+            common += 1
+        for depth in range(common + 1, len(key) + 1):
+            if len(levels) < depth:
+                levels.append((array('I'), array('I'), array('i')))
+            parents, labels, values = levels[depth - 1]
+            parents.append(len(levels[depth - 2][1]) - 1 if depth > 1 else 0)
+            labels.append(ord(key[depth - 1]))
+            values.append(-1)
+            alphabet.add(key[depth - 1])
+        lengths = bytes(lengths).translate(_SETTLE).rstrip(b'\0') # trailing unmarked characters are implied
+        if lengths not in value_ids:
+            value_ids[lengths] = len(value_ids)
+            value_blob.extend(lengths)
+            value_offsets.append(len(value_blob))
+        if key:
+            levels[len(key) - 1][2][-1] = value_ids[lengths]
+        else:
+            root_value = value_ids[lengths]
+        previous = key
+        count += 1
+
+    alphabet = ''.join(sorted(alphabet))
+    codes = {ord(char): i for i, char in enumerate(alphabet)}
+    label_type = 'B' if len(alphabet) <= 256 else 'H'
+
+    # Level-order node numbering: the root, then every level in turn
+    node_count = 1 + sum(len(level[1]) for level in levels)
+    labels = array(label_type, [0])
+    values = array('i', [root_value])
+    child_counts = [0] * node_count
+    level_start = 1
+    parent_start = 0
+    for parents, level_labels, level_values in levels:
+        labels.extend(codes[code] for code in level_labels)
+        values.extend(level_values)
+        for parent in parents:
+            child_counts[parent_start + parent] += 1
+        parent_start = level_start
+        level_start += len(level_labels)
+    first_child = array('I', [1])
+    for children in child_counts:
+        first_child.append(first_child[-1] + children)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'keys': count,
+        'nodes': node_count,
+        'values': len(value_ids),
+        'label_type': label_type,
+        'alphabet': alphabet,
+    }
+    sections = [('labels', labels), ('first_child', first_child), ('values', values),
+                ('value_offsets', value_offsets), ('value_blob', bytes(value_blob))]
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, 'little'))
+        f.write(encoded)
+        offsets = {}
+        for name, section in sections:
+            _align(f)
+            offsets[name] = f.tell()
+            f.write(section if isinstance(section, bytes) else section.tobytes())
+        _align(f)
+        # Section offsets are only known after writing, so they go in a trailer ending with its own length
+        trailer = json.dumps(offsets).encode('ascii')
+        f.write(trailer)
+        f.write(len(trailer).to_bytes(8, 'little'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+def build_lexicon(forms, path):
+    '''
+    Compiles macronized forms, or (word, macronized form) pairs, into a lexicon file. Returns the number of keys.
+    '''
+    entries = lexicon_entries(forms)
+    return write_lexicon(sorted(entries.items()), path)
+
+# ============================
+# Reading
+# ============================
+
+class MacronLexicon:
+    '''
+    Read-only, memory-mapped lexicon. Picklable (by path), so it can be handed to worker processes,
+    which then map the same file.
+    '''
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = buffer = memoryview(self._mmap)
+        if bytes(buffer[:8]) != MAGIC:
+            raise ValueError(f"{self.path} is not a grc_utils macron lexicon")
+        header_length = int.from_bytes(buffer[8:16], 'little')
+        self.header = json.loads(bytes(buffer[16:16 + header_length]).decode('utf-8'))
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{self.path} was written on a {self.header['byteorder']}-endian machine")
+        trailer_length = int.from_bytes(buffer[-8:], 'little')
+        offsets = json.loads(bytes(buffer[-8 - trailer_length:-8]).decode('ascii'))
+
+        nodes = self.header['nodes']
+        label_size = 1 if self.header['label_type'] == 'B' else 2
+
+        def section(name, size, count, type_code):
+            start = offsets[name]
+            return buffer[start:start + size * count].cast(type_code)
+
+        self._labels = section('labels', label_size, nodes, self.header['label_type'])
+        self._first_child = section('first_child', 4, nodes + 1, 'I')
+        self._values = section('values', 4, nodes, 'i')
+        self._value_offsets = section('value_offsets', 4, self.header['values'] + 1, 'I')
+        start = offsets['value_blob']
+        self._value_blob = buffer[start:start + self._value_offsets[-1]]
+        self._codes = {char: i for i, char in enumerate(self.header['alphabet'])}
+
+    def __reduce__(self):
+        return (MacronLexicon, (self.path,))
+
+    def __len__(self):
+        return self.header['keys']
+
+    def close(self):
+        for view in (self._labels, self._first_child, self._values, self._value_offsets, self._value_blob, self._buffer):
+            view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _node(self, key):
+        labels, first_child, codes = self._labels, self._first_child, self._codes
+        node = 0
+        for char in key:
+            code = codes.get(char)
+            if code is None:
+                return None
+            lo, hi = first_child[node], first_child[node + 1]
+            i = bisect_left(labels, code, lo, hi)
+            if i == hi or labels[i] != code:
+                return None
+            node = i
+        return node
+
+    def lengths(self, key):
+        '''
+        The length annotation (bytes, one code per character of the key) of a plain lowercase key, or None.
+        '''
+        node = self._node(key)
+        if node is None or self._values[node] < 0:
+            return None
+        value = self._values[node]
+        stored = bytes(self._value_blob[self._value_offsets[value]:self._value_offsets[value + 1]])
+        return stored + bytes(len(key) - len(stored))
+
+    def __contains__(self, word):
+        return self.lookup(word) is not None
+
+    def lookup(self, word):
+        '''
+        Word (any case, with or without length marks) -> AnnotatedText of its bare text with the lexicon's lengths
+        (where the lexicon leaves a length unmarked, a length already marked in the word is kept), or None.
+        Words with a grave accent are also looked up with an acute, since lexica list words as oxytone.
+        '''
+        annotated = parse_lengths(unicodedata.normalize('NFC', word))
+        key = plain_key(annotated)
+        lengths = self.lengths(key)
+        if lengths is None and '\u0300' in unicodedata.normalize('NFD', key):
+            lengths = self.lengths(_grave_to_acute(key))
+        if lengths is None:
+            return None
+        merged = bytes(new or old for new, old in zip(lengths, annotated.lengths))
+        return AnnotatedText(annotated.text, merged)
+
+    def get(self, word, default=None, style='diacritic'):
+        ''' The macronized form of a word, in its own casing, or default. '''
+        annotated = self.lookup(word)
+        return default if annotated is None else render(annotated, style)
+
+    def items(self):
+        ''' (key, length annotation) pairs in sorted order, i.e. in the format write_lexicon() takes. '''
+        alphabet = self.header['alphabet']
+        first_child, labels = self._first_child, self._labels
+        stack = [(0, '')]
+        while stack:
+            node, prefix = stack.pop()
+            if self._values[node] >= 0:
+                yield prefix, self.lengths(prefix)
+            children = range(first_child[node], first_child[node + 1])
+            stack.extend((child, prefix + alphabet[labels[child]]) for child in reversed(children))
+
+def _grave_to_acute(string):
+    return unicodedata.normalize('NFC', unicodedata.normalize('NFD', string).replace('\u0300', '\u0301'))
+
+# ============================
+# Applying
+# ============================
+
+def render(annotated, style='diacritic'):
+    '''
+    AnnotatedText -> string, with lengths as inline ^ and _ (style='markup')
+    or as combining macrons and breves composed where Unicode allows (style='diacritic', as on Wiktionary).
+    '''
+    if style == 'markup':
+        return to_markup(annotated)
+    if style != 'diacritic':
+        raise ValueError(f"Unknown style {style!r}; expected 'diacritic' or 'markup'")
+    if not annotated.marked:
+        return annotated.text
+    chars = []
+    for char, length in zip(annotated.text, annotated.lengths):
+        if length:
+            # The length mark goes right after the base letter, before breathings and accents
+            decomposed = unicodedata.normalize('NFD', char)
+            char = unicodedata.normalize('NFC', decomposed[0] + _COMBINING_MARKS[length] + decomposed[1:])
+        chars.append(char)
+    return ''.join(chars)
+
+def macronize_text(text, lexicon, style='diacritic'):
+    '''
+    Macronizes every word of a text found in the lexicon (a MacronLexicon or a path to one), leaving punctuation,
+    spacing, casing and words not in the lexicon as they are.
+    `text` may be a string, which is macronized as a whole, or an iterable of lines (e.g. a file),
+    which is macronized lazily, line by line, in one streaming pass.
+    A lexicon given as a path is opened here and closed again when the text is done (for lines, when the generator
+    is exhausted or closed; it is opened on the first line).
+    '''
+    if not isinstance(text, str):
+        return _macronize_lines(text, lexicon, style)
+    if isinstance(lexicon, MacronLexicon):
+        return _macronize(text, lexicon, style)
+    with MacronLexicon(lexicon) as opened:
+        return _macronize(text, opened, style)
+
+def _macronize(text, lexicon, style):
+    def replace(match):
+        annotated = lexicon.lookup(match.group())
+        return match.group() if annotated is None else render(annotated, style)
+    return _WORD.sub(replace, unicodedata.normalize('NFC', text))
+
+def _macronize_lines(lines, lexicon, style):
+    if not isinstance(lexicon, MacronLexicon):
+        with MacronLexicon(lexicon) as opened:
+            yield from _macronize_lines(lines, opened, style)
+        return
+    for line in lines:
+        yield _macronize(line, lexicon, style)
@@ -37,7 +37,7 @@ CONSONANTS_UPPER_TO_LOWER = {
 
 CONSONANTS_LOWER_TO_UPPER = {CONSONANTS_UPPER_TO_LOWER[key]: key for key in CONSONANTS_UPPER_TO_LOWER}
 
-CONSONANTS = set(CONSONANTS_UPPER_TO_LOWER.keys()) | set(CONSONANTS_UPPER_TO_LOWER.values()) | set(["ῤ", "ρ", "ς"])
+CONSONANTS = frozenset(CONSONANTS_UPPER_TO_LOWER.keys()) | frozenset(CONSONANTS_UPPER_TO_LOWER.values()) | frozenset(["ῤ", "ρ", "ς"])
 
 UPPER_FIRST_IN_DIPHTHONG = list("ΑΕΗΟΥΩ")
 
@@ -0,0 +1,153 @@
+'''
+Length annotations kept out of band.
+
+In inline markup a vowel is marked long by a following "_" and short by a following "^": ἄ_νδρα^.
+An AnnotatedText holds the same information as
+    text        the bare string, ἄνδρα
+    lengths     bytes with one length code per character of text, b'\\x01\\x00\\x00\\x00\\x02'
+so that a token is parsed once, the analysis functions never have to strip or rescan the markup,
+and offsets into the bare text stay valid for the annotations. Inline markup is only produced again by to_markup().
+
+weight.py and filter_dichrona.py accept AnnotatedText wherever they accept a syllable or word with markup.
+
+>> annotated = parse_markup('ἄ_νδρα^')
+>> annotated.text
+>> 'ἄνδρα'
+>> annotated.lengths
+>> b'\\x01\\x00\\x00\\x00\\x02'
+>> str(annotated)
+>> 'ἄ_νδρα^'
+'''
+
+import unicodedata
+from collections import namedtuple
+
+# Length codes
+UNMARKED = 0
+LONG = 1
+SHORT = 2
+
+MARKS = {'_': LONG, '^': SHORT}
+MARK_CHARS = {LONG: '_', SHORT: '^'}
+COMBINING_LENGTHS = {'\u0304': LONG, '\u0306': SHORT} # combining macron and breve (vrachy)
+
+_STRIP = str.maketrans('', '', '_^')
+
+class AnnotatedText(namedtuple('AnnotatedText', ['text', 'lengths'])):
+    '''
+    text        bare string without markup
+    lengths     bytes of UNMARKED, LONG and SHORT, one per character of text
+    '''
+    __slots__ = ()
+
+    def __str__(self):
+        return to_markup(self)
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def marked(self):
+        ''' Whether any character carries a length mark. '''
+        return any(self.lengths)
+
+    def slice(self, start, end=None):
+        end = len(self.text) if end is None else end
+        return AnnotatedText(self.text[start:end], self.lengths[start:end])
+
+    def split(self, parts):
+        '''
+        Splits into consecutive AnnotatedTexts with the lengths of the given strings, e.g. the syllables of the bare text.
+        '''
+        pieces = []
+        start = 0
+        for part in parts:
+            end = start + len(part)
+            pieces.append(AnnotatedText(self.text[start:end], self.lengths[start:end]))
+            start = end
+        return pieces
+
+def parse_markup(string):
+    '''
+    String with inline ^ and _ -> AnnotatedText. A mark applies to the character before it.
+    AnnotatedText input is returned as is.
+    '''
+    if isinstance(string, AnnotatedText):
+        return string
+    if '_' not in string and '^' not in string:
+        return AnnotatedText(string, bytes(len(string)))
+    chars = []
+    lengths = bytearray()
+    for char in string:
+        if char in MARKS:
+            if lengths:
+                lengths[-1] = MARKS[char]
+        else:
+            chars.append(char)
+            lengths.append(UNMARKED)
+    return AnnotatedText(''.join(chars), bytes(lengths))
+
+def parse_lengths(string):
+    '''
+    Like parse_markup, but also takes macrons and breves written as diacritics (precomposed ᾱ, or α + U+0304)
+    as length annotations, so that e.g. Wiktionary-style ᾰ̓́νδρᾰ and inline ἄνδρα^ parse alike.
+    The bare text is NFC with the macrons and breves removed, i.e. no_macrons() of the input.
+    >> parse_lengths('ᾰ̓́νδρᾱ')
+    >> AnnotatedText(text='ἄνδρα', lengths=b'\\x02\\x00\\x00\\x00\\x01')
+    '''
+    if isinstance(string, AnnotatedText):
+        return string
+    chars = []
+    lengths = bytearray()
+    cluster = ''
+    cluster_length = UNMARKED
+
+    def flush():
+        if cluster:
+            composed = unicodedata.normalize('NFC', cluster)
+            chars.append(composed)
+            lengths.extend([UNMARKED] * (len(composed) - 1) + [cluster_length])
+
+    for char in unicodedata.normalize('NFD', string):
+        if char in COMBINING_LENGTHS:
+            cluster_length = COMBINING_LENGTHS[char]
+        elif unicodedata.combining(char):
+            cluster += char
+        elif char in MARKS:
+            if cluster:
+                cluster_length = MARKS[char]
+            elif lengths:
+                lengths[-1] = MARKS[char]
+        else:
+            flush()
+            cluster, cluster_length = char, UNMARKED
+    flush()
+    return AnnotatedText(''.join(chars), bytes(lengths))
+
+def to_markup(annotated):
+    ''' AnnotatedText -> string with inline ^ and _. '''
+    if not annotated.marked:
+        return annotated.text
+    return ''.join(char + MARK_CHARS[length] if length else char for char, length in zip(annotated.text, annotated.lengths))
+
+def strip_markup(string):
+    ''' The bare text of a string with inline markup, or of an AnnotatedText. '''
+    if isinstance(string, AnnotatedText):
+        return string.text
+    return string.translate(_STRIP)
+
+def has_markup(string):
+    ''' Whether a string with inline markup, or an AnnotatedText, carries any length mark. '''
+    if isinstance(string, AnnotatedText):
+        return string.marked
+    return '_' in string or '^' in string
+
+def has_long_mark(string):
+    if isinstance(string, AnnotatedText):
+        return LONG in string.lengths
+    return '_' in string
+
+def has_short_mark(string):
+    if isinstance(string, AnnotatedText):
+        return SHORT in string.lengths
+    return '^' in string
@@ -0,0 +1,249 @@
+'''
+Metrical templates compiled to regular expressions over a weight alphabet.
+
+A scanned line (see scansion.py) is turned into a string over three letters,
+    L   light
+    H   heavy
+    A   ambiguous (an open syllable with an unmarked dichronon), which may be either,
+and every meter is compiled once into a regex over that alphabet, so that whether a line fits is one C-level fullmatch.
+Only lines that fit are then parsed, element by element, to list all their valid scansions.
+
+Meters are written as a sequence of elements (spaces and | are ignored):
+    –  or -     longum
+    ⏑  or u     breve
+    ×  or x     anceps
+    ⏖  or D     biceps: ⏑⏑, or contracted –
+    R           resolvable longum: –, or resolved ⏑⏑
+    X           resolvable anceps: any one syllable, or resolved ⏑⏑
+By default the last element is brevis in longo, i.e. it takes a syllable of any weight.
+
+>> hexameter = METERS['dactylic_hexameter']
+>> hexameter.scansions(scan_line('οὐλομένην, ἣ μυρί᾽ Ἀχαιοῖς ἄλγε᾽ ἔθηκε,'))
+>> [MeterMatch(pattern='–⏑⏑–––⏑⏑–––⏑⏑–⏑', spans=((0, 1), (1, 3), (3, 4), ...))]
+
+Epic correption is modelled by ScansionLattice.from_line(line, correption=True), which any Meter method takes in place
+of a Scansion (see lattice.py); a plain Scansion has no correption, so e.g. Od. 1.1 (ἄνδρα μοι ἔννεπε) fails as a hexameter
+unless scanned as such a lattice. Synizesis is not modelled at all, so e.g. Πηληϊάδεω (synizesis of εω) makes its line fail.
+'''
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from .scansion import scan_line
+from .weight import AMBIGUOUS, HEAVY, LIGHT
+
+# Weight codes -> letters of the matching alphabet
+_LETTERS = bytes.maketrans(bytes([LIGHT, HEAVY, AMBIGUOUS]), b'LHA')
+_SYMBOL_LETTERS = str.maketrans({'⏑': 'L', '–': 'H', '⏓': 'A', 'u': 'L', '-': 'H', 'x': 'A'})
+
+LONGUM, BREVE, ANCEPS, BICEPS, RESOLVABLE_LONGUM, RESOLVABLE_ANCEPS = range(6)
+
+_ELEMENT_SYMBOLS = {
+    '–': LONGUM, '-': LONGUM,
+    '⏑': BREVE, 'u': BREVE,
+    '×': ANCEPS, 'x': ANCEPS,
+    '⏖': BICEPS, 'D': BICEPS,
+    'R': RESOLVABLE_LONGUM,
+    'X': RESOLVABLE_ANCEPS,
+}
+
+# The realizations of every element, as strings of L and H
+_REALIZATIONS = {
+    LONGUM: ('H',),
+    BREVE: ('L',),
+    ANCEPS: ('H', 'L'),
+    BICEPS: ('LL', 'H'),
+    RESOLVABLE_LONGUM: ('H', 'LL'),
+    RESOLVABLE_ANCEPS: ('H', 'L', 'LL'),
+}
+
+_LETTER_CLASSES = {'H': '[HA]', 'L': '[LA]'}
+
+# Bits of a weight mask, as used by possible_weights() and lattice.py
+LIGHT_BIT = 1
+HEAVY_BIT = 2
+_LETTER_BITS = {'L': LIGHT_BIT, 'H': HEAVY_BIT}
+
+MeterMatch = namedtuple('MeterMatch', ['pattern', 'spans'])
+MeterMatch.__doc__ = '''
+pattern     the realized weights of the line, e.g. '–⏑⏑–⏑⏑–––'
+spans       (start, end) syllable range of every element of the meter
+'''
+
+def weight_letters(weights):
+    '''
+    Scansion (or anything else with a `weights` array, like a ScansionLattice), int8 weight array
+    or string of metrical symbols -> string over L, H and A.
+    '''
+    weights = getattr(weights, 'weights', weights)
+    if isinstance(weights, str):
+        return ''.join(weights.split()).translate(_SYMBOL_LETTERS)
+    return np.asarray(weights, dtype=np.int8).tobytes().translate(_LETTERS).decode('ascii')
+
+def parse_meter(definition):
+    '''
+    Meter definition string -> list of element codes.
+    '''
+    elements = []
+    for char in definition:
+        if char.isspace() or char == '|':
+            continue
+        if char not in _ELEMENT_SYMBOLS:
+            raise ValueError(f"Unknown metrical symbol {char!r} in {definition!r}")
+        elements.append(_ELEMENT_SYMBOLS[char])
+    if not elements:
+        raise ValueError("Empty meter definition")
+    return elements
+
+class Meter:
+
+    def __init__(self, name, definition, final_anceps=True):
+        self.name = name
+        self.definition = definition
+        self.elements = parse_meter(definition)
+        if final_anceps and self.elements[-1] in (LONGUM, BREVE):
+            self.elements[-1] = ANCEPS
+        self.regex = re.compile(''.join(self._element_regex(element) for element in self.elements))
+        self._realizations = [
+            [(realization, len(realization)) for realization in _REALIZATIONS[element]] for element in self.elements
+        ]
+
+    @staticmethod
+    def _element_regex(element):
+        if element == ANCEPS:
+            return '[HLA]'
+        alternatives = [''.join(_LETTER_CLASSES[letter] for letter in realization) for realization in _REALIZATIONS[element]]
+        return alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+
+    def __repr__(self):
+        return f'Meter({self.name!r}, {self.definition!r})'
+
+    def matches(self, weights):
+        ''' Whether the line has at least one valid scansion in this meter. '''
+        return self.regex.fullmatch(weight_letters(weights)) is not None
+
+    def scansions(self, weights, limit=None):
+        '''
+        All valid scansions of the line, as MeterMatch tuples, at most `limit` of them.
+        Ambiguous syllables are resolved to whatever weight each scansion needs.
+        '''
+        letters = weight_letters(weights)
+        if self.regex.fullmatch(letters) is None:
+            return []
+
+        count = len(letters)
+        elements = len(self.elements)
+        realizations = self._realizations
+
+        # reachable[e] = positions from which elements e.. can consume the rest of the line
+        reachable = [set() for _ in range(elements + 1)]
+        reachable[elements].add(count)
+        for e in range(elements - 1, -1, -1):
+            for position in range(count):
+                for realization, length in realizations[e]:
+                    if position + length in reachable[e + 1] and _fits(letters, position, realization):
+                        reachable[e].add(position)
+                        break
+
+        results = []
+        pattern, spans = [], []
+
+        def walk(e, position):
+            if limit is not None and len(results) >= limit:
+                return
+            if e == elements:
+                results.append(MeterMatch(''.join(pattern).replace('H', '–').replace('L', '⏑'), tuple(spans)))
+                return
+            for realization, length in realizations[e]:
+                end = position + length
+                if end in reachable[e + 1] and _fits(letters, position, realization):
+                    pattern.append(realization)
+                    spans.append((position, end))
+                    walk(e + 1, end)
+                    pattern.pop()
+                    spans.pop()
+
+        if 0 in reachable[0]:
+            walk(0, 0)
+        return results
+
+    def possible_weights(self, weights):
+        '''
+        For every syllable, the weights it takes in at least one valid scansion, as a uint8 mask
+        (bit LIGHT_BIT for light, HEAVY_BIT for heavy; all zeros if the line does not fit).
+        Computed by forward and backward reachability over (element, syllable) pairs, without enumerating the scansions.
+        '''
+        letters = weight_letters(weights)
+        count = len(letters)
+        masks = np.zeros(count, dtype=np.uint8)
+        if self.regex.fullmatch(letters) is None:
+            return masks
+
+        elements = len(self.elements)
+        realizations = self._realizations
+        forward = [set() for _ in range(elements + 1)]
+        forward[0].add(0)
+        for e in range(elements):
+            for position in forward[e]:
+                for realization, length in realizations[e]:
+                    if _fits(letters, position, realization):
+                        forward[e + 1].add(position + length)
+        backward = [set() for _ in range(elements + 1)]
+        backward[elements].add(count)
+        for e in range(elements - 1, -1, -1):
+            for position in forward[e]:
+                for realization, length in realizations[e]:
+                    if position + length in backward[e + 1] and _fits(letters, position, realization):
+                        backward[e].add(position)
+                        for offset, letter in enumerate(realization):
+                            masks[position + offset] |= _LETTER_BITS[letter]
+        return masks
+
+def _fits(letters, position, realization):
+    segment = letters[position:position + len(realization)]
+    if len(segment) != len(realization):
+        return False
+    return all(letter == wanted or letter == 'A' for letter, wanted in zip(segment, realization))
+
+# ============================
+# Meters
+# ============================
+
+METERS = {meter.name: meter for meter in [
+    Meter('dactylic_hexameter', '– ⏖ | – ⏖ | – ⏖ | – ⏖ | – ⏖ | – ×'),
+    Meter('elegiac_pentameter', '– ⏖ | – ⏖ | – || – ⏑⏑ | – ⏑⏑ | –'),
+    Meter('iambic_trimeter', 'X R ⏑ R | X R ⏑ R | X R ⏑ ×'),
+    Meter('trochaic_tetrameter_catalectic', 'R ⏑ R X | R ⏑ R X | R ⏑ R X | R ⏑ –'),
+    Meter('glyconic', '× × – ⏑ ⏑ – ⏑ –'),
+    Meter('pherecratean', '× × – ⏑ ⏑ – –'),
+    Meter('adonean', '– ⏑ ⏑ – –'),
+    Meter('sapphic_hendecasyllable', '– ⏑ – × – ⏑ ⏑ – ⏑ – –'),
+    Meter('aristophanean', '– ⏑ ⏑ – ⏑ – –'),
+]}
+
+# ============================
+# Batch Interface
+# ============================
+
+def match_lines(lines, meter, limit=None):
+    '''
+    Scans every line and returns, per line, the list of its valid scansions in `meter` (a Meter or a name in METERS).
+    Lines may be raw strings, Scansion objects or ScansionLattice objects.
+    '''
+    if isinstance(meter, str):
+        meter = METERS[meter]
+    results = []
+    for line in lines:
+        scansion = line if hasattr(line, 'weights') else scan_line(line.rstrip('\n'))
+        results.append(meter.scansions(scansion, limit=limit))
+    return results
+
+def identify_meter(line, meters=None):
+    '''
+    Names of the meters (default: all of METERS) that the line fits.
+    '''
+    letters = weight_letters(line if hasattr(line, 'weights') else scan_line(line))
+    meters = METERS.values() if meters is None else meters
+    return [meter.name for meter in meters if meter.regex.fullmatch(letters)]
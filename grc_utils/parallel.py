@@ -0,0 +1,82 @@
+'''
+Thread-parallel batch processing, for free-threaded CPython builds.
+
+Every function of the package may be called from any number of threads at once:
+    - the tables the analyses consult at module level are immutable (tuples, frozensets, read-only mappings such as
+      syllabifier.patterns),
+    - no function changes the lists it is given (final_reshuffle and definitive_syllables return new lists),
+    - the caches shared between calls are lru_caches, or lock-protected (AnalysisCache, the instrumentation),
+    - registering a convention or a syllable table is serialized by syllabifier.REGISTRY_LOCK.
+Objects that are edited in place (MacronizedDocument, SyllableCounts, the writers) are not shared: use one per thread.
+
+What threads buy depends on the interpreter:
+    without the GIL (3.13t and later)   the analyses run on all cores at once, with none of the pickling and
+                                        per-worker warm-up of a process pool
+    with the GIL                        the threads take turns, so they are no faster than a loop; default_workers()
+                                        is 1 there, and with one worker thread_map() is the plain loop, without any pool
+
+The batch APIs take the same `workers` argument: scan_lines(lines, workers=8), run_batch(..., workers=8) and
+corpus_counts(lines, workers=8, executor='thread').
+
+>> syllabify_many(lines, workers=default_workers())
+>> [['μῆ', 'νιν ', 'ἄ', ...], ...]
+'''
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from .syllabifier import syllabifier
+
+def gil_enabled():
+    ''' False only on a free-threaded build running without the GIL. '''
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def default_workers():
+    ''' os.cpu_count() without the GIL, 1 with it. '''
+    return 1 if gil_enabled() else os.cpu_count() or 1
+
+def _chunks(items, chunk_size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _apply(function, chunk):
+    return [function(item) for item in chunk]
+
+def thread_map(function, items, workers=None, chunk_size=64, executor=None):
+    '''
+    Lazily yields function(item) for every item of an iterable, in order, computed by `workers` threads
+    (default: default_workers()) in chunks of `chunk_size` items, with at most 2 * workers chunks in flight.
+    Pass a ThreadPoolExecutor to reuse its threads across calls (or a ProcessPoolExecutor, for picklable functions).
+    '''
+    workers = workers or default_workers()
+    if workers <= 1 and executor is None:
+        for item in items:
+            yield function(item)
+        return
+    pool = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grc_utils')
+    pending = deque()
+    try:
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(_apply, function, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if executor is None:
+            pool.shutdown(wait=True)
+
+def syllabify_many(texts, convention=None, workers=None, chunk_size=64):
+    ''' [syllabifier(text, convention=convention) for text in texts], over `workers` threads. '''
+    return list(thread_map(partial(syllabifier, convention=convention), texts, workers, chunk_size))
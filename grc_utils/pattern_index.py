@@ -0,0 +1,229 @@
+'''
+Searchable index of weight patterns across a scanned corpus.
+
+All lines are scanned once (see scansion.py) and their weights concatenated into one int8 text over
+    0   line separator (one before every line and one at the end)
+    1   light       2   heavy       3   ambiguous (open syllable with an unmarked dichronon)
+A suffix array over this text, built with NumPy by prefix doubling, lists the positions of all suffixes in sorted order,
+so the occurrences of any pattern are one contiguous range of it. A query narrows the range symbol by symbol,
+branching where a query element allows more than one weight, and only ever touches O(log n) entries per branch.
+Because the separators are symbols too, the anchors are simply
+    ^   a separator before the pattern: the pattern starts the line
+    $   a separator after it: the pattern ends the line
+
+Query elements (spaces are ignored):
+    –  or -     heavy
+    ⏑  or u     light
+    ×  or x     either
+    ⏓           an ambiguous syllable, literally
+By default an ambiguous syllable in the corpus also matches – and ⏑; pass strict=True to disallow this.
+With words=True, only matches that span whole words (per the ultima flags of the scansion) are returned.
+
+>> index = PatternIndex.build(open('iliad.txt', encoding='utf-8'))
+>> index.search('– ⏑ ⏑ – – $')              # adonean clausula at verse end
+>> array([[   0,   12], [   1,   11], ...])  # (line, syllable) rows
+>> index.search('⏑ – ⏑', words=True)        # words scanning ⏑ – ⏑
+>> index.save('iliad.patterns'); index = PatternIndex.load('iliad.patterns')
+'''
+
+import json
+import os
+
+import numpy as np
+
+from .scansion import scan_line
+from .weight import AMBIGUOUS, HEAVY, LIGHT
+
+PATTERN_INDEX_VERSION = 1
+
+SEPARATOR = 0
+_CODES = {LIGHT: 1, HEAVY: 2, AMBIGUOUS: 3}
+_CODE_TABLE = np.zeros(max(_CODES) + 1, dtype=np.int8)
+for _weight, _code in _CODES.items():
+    _CODE_TABLE[_weight] = _code
+
+_L, _H, _A = _CODES[LIGHT], _CODES[HEAVY], _CODES[AMBIGUOUS]
+
+# Symbols of the corpus text each query element matches (lenient, strict)
+_ELEMENTS = {
+    '–': ((_H, _A), (_H,)), '-': ((_H, _A), (_H,)),
+    '⏑': ((_L, _A), (_L,)), 'u': ((_L, _A), (_L,)),
+    '×': ((_L, _H, _A), (_L, _H, _A)), 'x': ((_L, _H, _A), (_L, _H, _A)),
+    '⏓': ((_A,), (_A,)),
+}
+
+_FILES = {'text.bin': np.int8, 'suffixes.bin': np.int64, 'lines.bin': np.int64, 'word_ends.bin': np.bool_}
+
+def suffix_array(text):
+    '''
+    Suffix array of an integer array by prefix doubling: O(n log² n) with NumPy sorts.
+    Past the end of the text counts as smaller than any symbol.
+    '''
+    n = len(text)
+    rank = text.astype(np.int64)
+    suffixes = np.argsort(rank, kind='stable')
+    k = 1
+    while n > 1:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - k] = rank[k:]
+        suffixes = np.lexsort((second, rank))
+        first_sorted, second_sorted = rank[suffixes], second[suffixes]
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        new_group[1:] = (first_sorted[1:] != first_sorted[:-1]) | (second_sorted[1:] != second_sorted[:-1])
+        rank = np.empty(n, dtype=np.int64)
+        rank[suffixes] = np.cumsum(new_group) - 1
+        if rank[suffixes[-1]] == n - 1 or k >= n:
+            break
+        k *= 2
+    return suffixes
+
+def parse_pattern(pattern, strict=False):
+    '''
+    Query string -> list of tuples of allowed corpus symbols (SEPARATOR for the anchors).
+    '''
+    elements = []
+    body = ''.join(pattern.split())
+    for i, char in enumerate(body):
+        if char == '^' and i == 0 or char == '$' and i == len(body) - 1:
+            elements.append((SEPARATOR,))
+        elif char in _ELEMENTS:
+            elements.append(_ELEMENTS[char][1 if strict else 0])
+        else:
+            raise ValueError(f"Unknown pattern symbol {char!r} in {pattern!r}")
+    if not any(element != (SEPARATOR,) for element in elements):
+        raise ValueError(f"Empty pattern {pattern!r}")
+    return elements
+
+class PatternIndex:
+    '''
+    text        int8 corpus text (see above)
+    suffixes    int64 suffix array of text
+    lines       int64 position in text of the first syllable of every line, plus a final end position
+    word_ends   bool per text position: the syllable is the last of its word
+    '''
+
+    def __init__(self, text, suffixes, lines, word_ends):
+        self.text = text
+        self.suffixes = suffixes
+        self.lines = lines
+        self.word_ends = word_ends
+
+    @classmethod
+    def build(cls, lines, convention=None):
+        '''
+        Indexes an iterable of raw lines (scanned with scan_line) or Scansion objects.
+        '''
+        chunks = [np.zeros(1, dtype=np.int8)]
+        ends = [np.zeros(1, dtype=bool)]
+        starts = []
+        position = 1
+        for line in lines:
+            scansion = line if hasattr(line, 'weights') else scan_line(line.rstrip('\n'), convention=convention)
+            starts.append(position)
+            chunks.append(_CODE_TABLE[scansion.weights])
+            chunks.append(np.zeros(1, dtype=np.int8))
+            ends.append(np.asarray(scansion.ultima, dtype=bool))
+            ends.append(np.zeros(1, dtype=bool))
+            position += len(scansion.weights) + 1
+        starts.append(position)
+        text = np.concatenate(chunks)
+        return cls(text, suffix_array(text), np.array(starts, dtype=np.int64), np.concatenate(ends))
+
+    def __len__(self):
+        ''' Number of lines. '''
+        return len(self.lines) - 1
+
+    def line_weights(self, i):
+        ''' The corpus symbols of line i. '''
+        return self.text[self.lines[i]:self.lines[i + 1] - 1]
+
+    # ============================
+    # Search
+    # ============================
+
+    def _symbol(self, i, depth):
+        position = int(self.suffixes[i]) + depth
+        return int(self.text[position]) if position < len(self.text) else -1
+
+    def _lower_bound(self, lo, hi, depth, symbol):
+        ''' First index in [lo, hi) whose suffix has a symbol >= `symbol` at `depth`. '''
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._symbol(mid, depth) < symbol:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _ranges(self, elements):
+        ranges = [(0, len(self.suffixes))]
+        for depth, allowed in enumerate(elements):
+            narrowed = []
+            for lo, hi in ranges:
+                for symbol in allowed:
+                    start = self._lower_bound(lo, hi, depth, symbol)
+                    end = self._lower_bound(start, hi, depth, symbol + 1)
+                    if start < end:
+                        narrowed.append((start, end))
+            ranges = narrowed
+            if not ranges:
+                break
+        return ranges
+
+    def positions(self, pattern, strict=False, words=False):
+        ''' Sorted text positions of the first syllable of every match. '''
+        elements = parse_pattern(pattern, strict=strict)
+        anchored_start = elements[0] == (SEPARATOR,)
+        length = len(elements) - anchored_start - (elements[-1] == (SEPARATOR,))
+        ranges = self._ranges(elements)
+        if not ranges:
+            return np.zeros(0, dtype=np.int64)
+        found = np.sort(np.concatenate([self.suffixes[lo:hi] for lo, hi in ranges])) + anchored_start
+        if words:
+            # Starts a word (previous syllable ends one, or is the separator) and spans exactly whole words
+            previous = found - 1
+            starts_word = self.word_ends[previous] | (self.text[previous] == SEPARATOR)
+            inside = np.zeros(len(found), dtype=bool)
+            for offset in range(length - 1):
+                inside |= self.word_ends[found + offset]
+            found = found[starts_word & self.word_ends[found + length - 1] & ~inside]
+        return found
+
+    def search(self, pattern, strict=False, words=False):
+        '''
+        (line, syllable) rows, in corpus order, of every match of the pattern. See the module docstring for the syntax.
+        '''
+        found = self.positions(pattern, strict=strict, words=words)
+        line = np.searchsorted(self.lines, found, side='right') - 1
+        return np.stack([line, found - self.lines[line]], axis=1)
+
+    def count(self, pattern, strict=False, words=False):
+        if words:
+            return len(self.positions(pattern, strict=strict, words=True))
+        return sum(hi - lo for lo, hi in self._ranges(parse_pattern(pattern, strict=strict)))
+
+    # ============================
+    # Persistence
+    # ============================
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        arrays = {'text.bin': self.text, 'suffixes.bin': self.suffixes, 'lines.bin': self.lines, 'word_ends.bin': self.word_ends}
+        for name, dtype in _FILES.items():
+            np.ascontiguousarray(arrays[name], dtype=dtype).tofile(os.path.join(path, name))
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': PATTERN_INDEX_VERSION, 'syllables': len(self.text), 'lines': len(self)}, f)
+
+    @classmethod
+    def load(cls, path):
+        ''' Memory-maps a saved index; nothing is read until queried. '''
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != PATTERN_INDEX_VERSION:
+            raise ValueError(f"Unsupported pattern index version {meta['version']}")
+        shapes = {'text.bin': meta['syllables'], 'suffixes.bin': meta['syllables'],
+                  'lines.bin': meta['lines'] + 1, 'word_ends.bin': meta['syllables']}
+        arrays = [np.memmap(os.path.join(path, name), dtype=dtype, mode='r', shape=(shapes[name],))
+                  for name, dtype in _FILES.items()]
+        return cls(*arrays)
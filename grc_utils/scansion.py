@@ -0,0 +1,108 @@
+'''
+Line-level scansion: weight and openness of every syllable of a verse line in one left-to-right pass.
+
+The whole line is syllabified at once, so consonants have already been moved across word boundaries
+(μῆνιν ἄειδε -> 'μῆ', 'νι', 'ν ἄ', ...) and the openness of every syllable, ultimae included,
+can be read off the syllable itself. The only look-ahead needed is for a double consonant opening
+the next syllable, which closes the current one. Ultimae are found by position, i.e. by which word
+the nucleus of each syllable belongs to, and never by comparing syllable strings.
+
+>>> scan = scan_line('μῆνιν ἄειδε θεὰ Πηληϊάδεω Ἀχιλῆος')
+>>> scan.syllables
+['μῆ', 'νι', 'ν ἄ', 'ει', 'δε ', 'θε', 'ὰ ', 'Πη', 'λη', 'ϊ', 'ά', 'δε', 'ω ', 'Ἀ', 'χι', 'λῆ', 'ος']
+>>> scan.pattern
+'–⏓⏓–⏑⏑⏓––⏓⏓⏑–⏓⏓––'
+>>> [i for i, ultima in enumerate(scan.ultima) if ultima]
+[1, 4, 6, 12, 16]
+
+(This docstring is run as a doctest by tests/test_scansion.py.)
+'''
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .features import syllable_features
+from .instrument import INSTRUMENTATION
+from .parallel import thread_map
+from .syllabifier import syllabifier
+from .utils import only_bases
+from .vowels import vowel
+from .weight import HEAVY, WEIGHT_SYMBOLS
+
+DOUBLE_CONSONANTS = frozenset('ζξψΖΞΨ')
+
+class Scansion(namedtuple('Scansion', ['syllables', 'weights', 'open', 'ultima'])):
+    '''
+    syllables   the syllabifier output for the line
+    weights     int8 array of LIGHT, HEAVY and AMBIGUOUS (see weight.py)
+    open        bool array
+    ultima      bool array, True for the last syllable of every word
+    '''
+    __slots__ = ()
+
+    @property
+    def pattern(self):
+        ''' The weights as a string of metrical symbols, e.g. '–⏑⏑–⏓'. '''
+        return ''.join(WEIGHT_SYMBOLS[weight] for weight in self.weights.tolist())
+
+    def __len__(self):
+        return len(self.syllables)
+
+@lru_cache(maxsize=65536)
+def _syllable_info(syllable):
+    '''
+    (weight, open, starts with a double consonant, word boundary before the nucleus, word boundary after it)
+    '''
+    weight, is_open, _, _ = syllable_features(syllable)
+    base_form = only_bases(syllable)
+    nucleus = next((i for i, char in enumerate(syllable) if vowel(char)), len(syllable))
+    onset, rest = syllable[:nucleus], syllable[nucleus:]
+    return (
+        weight,
+        bool(is_open),
+        bool(base_form) and base_form[0] in DOUBLE_CONSONANTS,
+        any(char.isspace() for char in onset),
+        any(char.isspace() for char in rest),
+    )
+
+INSTRUMENTATION.register_cache('scansion.syllable_info', _syllable_info)
+
+def scan_syllables(syllables):
+    '''
+    Scans a line that has already been syllabified (as a whole, not word by word).
+    '''
+    count = len(syllables)
+    weights = np.zeros(count, dtype=np.int8)
+    is_open = np.zeros(count, dtype=bool)
+    ultima = np.zeros(count, dtype=bool)
+
+    info = [_syllable_info(syllable) for syllable in syllables]
+    for i in range(count):
+        weight, open_syllable, _, _, boundary_after = info[i]
+        if i + 1 < count:
+            _, _, next_double, next_boundary_before, _ = info[i + 1]
+            # a double consonant in the next onset makes position
+            if open_syllable and next_double:
+                weight, open_syllable = HEAVY, False
+            ultima[i] = boundary_after or next_boundary_before
+        else:
+            ultima[i] = True
+        weights[i] = weight
+        is_open[i] = open_syllable
+
+    return Scansion(list(syllables), weights, is_open, ultima)
+
+def scan_line(line, convention=None):
+    '''
+    Syllabifies a verse line across word boundaries (under the given syllabifier convention) and scans it. See Scansion.
+    '''
+    return scan_syllables(syllabifier(line, convention=convention) or [])
+
+def scan_lines(lines, convention=None, workers=None):
+    '''
+    Lazily scans an iterable of lines (trailing newlines are dropped), in order.
+    With workers > 1 the lines are scanned by that many threads (see parallel.py).
+    '''
+    return thread_map(lambda line: scan_line(line.rstrip('\n'), convention=convention), lines, workers or 1)
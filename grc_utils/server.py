@@ -0,0 +1,319 @@
+'''
+Local analysis server: one warm process serving syllabification and dichrona verdicts as JSON over HTTP,
+on a TCP port or a Unix socket. Standard library only.
+
+Services share one process, so the import cost, the lru_caches and any syllable table (--syllable-table)
+are paid and warmed once. Requests go through an AsyncAnalyzer (see aio.py): concurrent requests are merged into
+micro-batches within a latency window (--max-delay, in milliseconds) and fanned out over a thread or process pool.
+
+Endpoints:
+    POST /analyze   {"task": "syllabify", "text": "...", "convention": "comic"}      -> {"result": [...]}
+                    {"task": "has_ambiguous_dichrona", "texts": ["...", "..."]}     -> {"results": [...]}
+                    (failed texts get null and an entry in "errors": {index: message})
+    GET  /tasks     the task names (see aio.TASKS)
+    GET  /health    {"status": "ok"}
+    GET  /stats     requests and batches per task, and the instrumentation snapshot (see instrument.py)
+
+    python -m grc_utils.server --port 8765 --executor process --workers 8 --max-delay 2
+    python -m grc_utils.server --unix /tmp/grc.sock
+
+>>> import threading
+>>> listening = []
+>>> def ready(server):
+...     listening.append((asyncio.get_running_loop(), server))
+>>> thread = threading.Thread(target=asyncio.run, args=(AnalysisServer().serve_forever(port=0, ready=ready),))
+>>> thread.start()
+>>> while not listening: thread.join(0.01)
+>>> loop, server = listening[0]
+>>> port = server.sockets[0].getsockname()[1]
+>>> with AnalysisClient(f'http://127.0.0.1:{port}') as client:     # or AnalysisClient(unix='/tmp/grc.sock')
+...     client.syllabify('ἄνδρα μοι ἔννεπε')
+['ἄν', 'δρα ', 'μοι ', 'ἔν', 'νε', 'πε']
+>>> _ = loop.call_soon_threadsafe(server.close)
+>>> thread.join()
+
+Word-final syllables keep the space that follows them, as syllabifier() returns them.
+'''
+
+import argparse
+import asyncio
+import http.client
+import json
+import signal
+import socket
+import sys
+from urllib.parse import urlsplit
+
+from .aio import TASKS, AsyncAnalyzer
+from .instrument import INSTRUMENTATION
+from .syllabifier import get_rules
+
+MAX_BODY = 16 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class AnalysisServer:
+
+    def __init__(self, analyzer=None, max_body=MAX_BODY):
+        self.analyzer = analyzer or AsyncAnalyzer()
+        self.max_body = max_body
+        self.requests = 0
+
+    # ============================
+    # Dispatch
+    # ============================
+
+    async def analyze(self, request):
+        task = request.get('task')
+        if task not in TASKS:
+            raise RequestError(400, f"Unknown task {task!r}; choose one of {', '.join(TASKS)}")
+        convention = request.get('convention')
+        if convention is not None and not isinstance(convention, str):
+            raise RequestError(400, "'convention' must be a string")
+        try:
+            convention = get_rules(convention)
+        except ValueError as error:
+            raise RequestError(400, str(error)) from error
+        if 'texts' in request:
+            texts = request['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise RequestError(400, "'texts' must be a list of strings")
+            outcomes = await asyncio.gather(*(self.analyzer.run(task, text, convention) for text in texts),
+                                            return_exceptions=True)
+            response = {'results': [None if isinstance(outcome, Exception) else outcome for outcome in outcomes]}
+            errors = {str(i): str(outcome) for i, outcome in enumerate(outcomes) if isinstance(outcome, Exception)}
+            if errors:
+                response['errors'] = errors
+            return response
+        text = request.get('text')
+        if not isinstance(text, str):
+            raise RequestError(400, "Give 'text' (a string) or 'texts' (a list of strings)")
+        try:
+            return {'result': await self.analyzer.run(task, text, convention)}
+        except Exception as error:
+            raise RequestError(400, str(error)) from error
+
+    async def dispatch(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/analyze':
+            if method != 'POST':
+                raise RequestError(405, "Use POST")
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError as error:
+                raise RequestError(400, f"Invalid JSON: {error}") from error
+            if not isinstance(request, dict):
+                raise RequestError(400, "The request must be a JSON object")
+            return await self.analyze(request)
+        if method != 'GET':
+            raise RequestError(405, "Use GET")
+        if path == '/health':
+            return {'status': 'ok'}
+        if path == '/tasks':
+            return {'tasks': list(TASKS)}
+        if path == '/stats':
+            return {'requests': self.requests, 'batching': self.analyzer.stats(), 'instrumentation': INSTRUMENTATION.snapshot()}
+        raise RequestError(404, f"No such endpoint {path}")
+
+    # ============================
+    # HTTP/1.1
+    # ============================
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.requests += 1
+                try:
+                    parts = request_line.decode('latin-1').split()
+                    if len(parts) != 3:
+                        keep_alive = False
+                        raise RequestError(400, "Malformed request line")
+                    method, path, version = parts
+                    keep_alive = keep_alive and version == 'HTTP/1.1'
+                    try:
+                        length = int(headers.get('content-length') or 0)
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        raise RequestError(400, "Content-Length must be a non-negative integer")
+                    if length > self.max_body:
+                        keep_alive = False
+                        raise RequestError(413, f"Bodies are limited to {self.max_body} bytes")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except RequestError as error:
+                    status, payload = error.status, {'error': str(error)}
+                encoded = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(encoded)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + encoded)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765, unix=None):
+        if unix:
+            return await asyncio.start_unix_server(self.handle, path=unix)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve_forever(self, host='127.0.0.1', port=8765, unix=None, ready=None):
+        '''
+        Serves until SIGINT or SIGTERM (where the loop supports signal handlers), then shuts the worker pool down.
+        '''
+        server = await self.start(host, port, unix)
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, server.close)
+            except (NotImplementedError, RuntimeError):
+                pass
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.analyzer.close(wait=True)
+
+# ============================
+# Client
+# ============================
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+class AnalysisClient:
+    '''
+    Blocking client keeping one persistent connection. Not thread-safe: use one client per thread.
+    '''
+
+    def __init__(self, url='http://127.0.0.1:8765', unix=None, timeout=60.0):
+        if unix:
+            self._connect = lambda: _UnixHTTPConnection(unix, timeout)
+        else:
+            parts = urlsplit(url)
+            self._connect = lambda: http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        self._connection = None
+
+    def _request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in (0, 1):
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                data = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                self.close()
+                if attempt:
+                    raise # the server went away; a closed idle connection is retried once
+        if response.status != 200:
+            raise ValueError(f"{response.status}: {data.get('error')}")
+        return data
+
+    def analyze(self, task, text=None, texts=None, convention=None):
+        ''' One text -> its result; a list of texts -> the list of results (None for failed ones). '''
+        request = {'task': task, 'convention': convention}
+        if texts is not None:
+            request['texts'] = list(texts)
+            return self._request('POST', '/analyze', request)['results']
+        request['text'] = text
+        return self._request('POST', '/analyze', request)['result']
+
+    def syllabify(self, text, convention=None):
+        return self.analyze('syllabify', text, convention=convention)
+
+    def has_ambiguous_dichrona_in_open_syllables(self, text):
+        return self.analyze('has_ambiguous_dichrona_in_open_syllables', text)
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def stats(self):
+        return self._request('GET', '/stats')
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# ============================
+# CLI
+# ============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve grc_utils analyses as JSON over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="listen on a Unix socket instead")
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-delay', type=float, default=2.0, help="batching window in milliseconds")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--syllable-table', default=None, help="precomputed syllable table to consult (see syllable_table.py)")
+    parser.add_argument('--instrument', action='store_true', help="enable instrumentation (reported by /stats; thread executor only)")
+    args = parser.parse_args(argv)
+    if args.instrument and args.executor == 'process':
+        parser.error("--instrument needs --executor thread: process workers record into their own instrumentation")
+
+    initializer, initargs = None, ()
+    if args.syllable_table:
+        from .syllable_table import use_syllable_table
+        use_syllable_table(args.syllable_table)
+        if args.executor == 'process': # workers map the table too
+            initializer, initargs = use_syllable_table, (args.syllable_table,)
+    if args.instrument:
+        INSTRUMENTATION.enabled = True
+    analyzer = AsyncAnalyzer(executor=args.executor, max_workers=args.workers, initializer=initializer, initargs=initargs,
+                             max_batch=args.max_batch, max_delay=args.max_delay / 1000)
+    server = AnalysisServer(analyzer)
+    where = args.unix or f'http://{args.host}:{args.port}'
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix,
+                                         ready=lambda _: print(f"serving on {where}", file=sys.stderr, flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
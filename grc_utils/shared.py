@@ -0,0 +1,165 @@
+'''
+Zero-copy tables for process-pool workers.
+
+A parent process publishes named NumPy arrays (precomputed analyses, pattern indexes, feature matrices...) once
+into a single memory-mapped file, in /dev/shm where there is one, so it lives in RAM. Workers map the same file
+read-only: the pages are shared by every process, nothing is copied or rebuilt, and attaching costs one mmap call
+however large the tables are.
+
+A SharedTables pickles as its layout (file path, names, dtypes, shapes, offsets) and unpickles by attaching,
+so it can be passed as-is to a worker initializer or in a task. shared_pool() wraps this up: a ProcessPoolExecutor
+(spawn by default) whose workers attach at startup and reach the tables through worker_tables().
+
+>> tables = SharedTables({'text': index.text, 'suffixes': index.suffixes, 'lines': index.lines, 'word_ends': index.word_ends})
+>> with tables, shared_pool(tables, max_workers=16) as pool:
+>>     results = list(pool.map(search, patterns))     # where search() does PatternIndex(**worker_tables())...
+
+The file is deleted when the publishing SharedTables is closed (or garbage collected); workers that still have it
+mapped keep their mapping until they exit.
+
+Precomputed syllabifications are shared the same way: syllable_table_arrays() turns a syllable table into arrays
+for SharedTables, and use_syllable_table as the pool initializer makes every worker consult the one copy
+(see syllable_table.py). What is not shared are the package's small tables, i.e. the vowel, dichrona and clitic
+tables, syllabifier.patterns and the compiled conventions: these are Python objects (frozensets, tuples, compiled
+regexes) that every worker builds again when it imports grc_utils, and every worker's lru_caches warm up on their own.
+Files written by MacronLexicon, WordIndex, AnnotationStore and PatternIndex.save() are memory-mapped already
+and pickle by path, so they are shared by all workers through the page cache without any of this.
+'''
+
+import mmap
+import os
+import tempfile
+import weakref
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+_ALIGNMENT = 64
+
+# tables is a tuple of (name, dtype string, shape, byte offset)
+TablesLayout = namedtuple('TablesLayout', ['path', 'tables'])
+
+def _shared_directory():
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class SharedTables:
+    '''
+    Read-only mapping of names to NumPy arrays backed by one shared memory-mapped file.
+    SharedTables(arrays) publishes (and owns) a new file; attach_tables(layout) maps an existing one.
+    '''
+
+    def __init__(self, arrays=None, directory=None, layout=None):
+        if layout is None:
+            layout = self._publish(arrays or {}, directory)
+            self._finalizer = weakref.finalize(self, _remove, layout.path)
+        else:
+            self._finalizer = None
+        self.layout = layout
+        with open(layout.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._arrays = {}
+        for name, dtype, shape, offset in layout.tables:
+            count = int(np.prod(shape, dtype=np.int64))
+            if count:
+                array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset).reshape(shape)
+            else:
+                array = np.zeros(shape, dtype=dtype)
+            self._arrays[name] = array
+
+    @staticmethod
+    def _publish(arrays, directory):
+        descriptor, path = tempfile.mkstemp(prefix='grc_utils-', suffix='.tables', dir=directory or _shared_directory())
+        tables = []
+        with os.fdopen(descriptor, 'wb') as f:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(np.frombuffer(array, dtype=np.uint8) if isinstance(array, bytes) else array)
+                if array.dtype.hasobject:
+                    raise TypeError(f"Table {name!r} holds Python objects, which cannot be shared")
+                f.write(b'\0' * (-f.tell() % _ALIGNMENT))
+                tables.append((name, array.dtype.str, array.shape, f.tell()))
+                f.write(array.tobytes())
+        return TablesLayout(path, tuple(tables))
+
+    def __reduce__(self):
+        return (attach_tables, (self.layout,))
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def __iter__(self):
+        return iter(self._arrays)
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def keys(self):
+        return self._arrays.keys()
+
+    def items(self):
+        return self._arrays.items()
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def close(self):
+        ''' Unmaps the file, and deletes it if this is the publishing process. '''
+        self._arrays = {}
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # arrays handed out are still alive; the mapping goes with them
+            self._mmap = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def attach_tables(layout):
+    ''' Maps tables published by another process. '''
+    return SharedTables(layout=TablesLayout(*layout))
+
+# ============================
+# Process pools
+# ============================
+
+_worker_tables = None
+
+def _initialize_worker(tables, initializer, initargs):
+    global _worker_tables
+    _worker_tables = tables # attached when unpickled
+    if initializer is not None:
+        initializer(*initargs)
+
+def worker_tables():
+    ''' The tables the current shared_pool() worker attached at startup. '''
+    if _worker_tables is None:
+        raise RuntimeError("No shared tables attached in this process; use shared_pool()")
+    return _worker_tables
+
+def shared_pool(tables, max_workers=None, mp_context=None, initializer=None, initargs=()):
+    '''
+    ProcessPoolExecutor whose workers attach `tables` at startup, before running `initializer(*initargs)`.
+    Uses the spawn start method unless another multiprocessing context is given.
+    '''
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context or get_context('spawn'),
+                               initializer=_initialize_worker, initargs=(tables, initializer, initargs))
@@ -0,0 +1,235 @@
+'''
+Syllable and syllable n-gram frequency statistics over whole corpora.
+
+Lines are syllabified and encoded with a SyllableVocabulary, and n-grams are counted with NumPy
+over the flat ID array (n-grams never straddle two lines). Counts can optionally be split by
+    - weight:     every syllable labelled H (heavy, as per weight.heavy) or L
+    - dichronon:  every syllable labelled D (contains a real dichronon) or - (does not)
+in which case each n-gram is counted together with its label pattern, e.g. ('θε', 'ὰ ') with 'LL'.
+
+Partial counts from separate chunks or worker processes are combined with SyllableCounts.merge().
+Batches are queued and summed into the tables when these are read, or when the queue has grown as large as the
+table, so that counting a corpus batch by batch stays O(N log N) overall.
+
+>> counts = corpus_counts(open('iliad.txt'), n=(1, 2), split='weight', workers=8)     # or executor='thread' (see parallel.py)
+>> counts.top(2, 3)
+>> [(('τε ', 'καὶ '), 'LH', 512), ...]
+>> counts.to_tsv('iliad.bigrams.tsv', 2)
+'''
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from .filter_dichrona import word_with_real_dichrona
+from .parallel import thread_map
+from .syllabifier import syllabifier
+from .vocabulary import SyllableVocabulary
+from .weight import heavy
+
+# Queued rows summed into a table at once, at the least
+MIN_CONSOLIDATE = 1 << 16
+
+# Per-syllable label functions and the symbols for label 0 and label 1
+SPLITS = {
+    'weight': (heavy, 'LH'),
+    'dichronon': (word_with_real_dichrona, '-D'),
+}
+
+def _label_array(syllables, split):
+    if split is None:
+        return np.zeros(len(syllables), dtype=np.int64)
+    label = SPLITS[split][0]
+    return np.fromiter((bool(label(syllable)) for syllable in syllables), dtype=np.int64, count=len(syllables))
+
+def _unique_rows(labels, grams, counts):
+    '''
+    Sums counts over identical (label, n-gram) rows.
+    '''
+    if len(counts) == 0:
+        return labels, grams, counts
+    rows = np.column_stack([labels.astype(np.int64), grams.astype(np.int64)])
+    unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+    summed = np.zeros(len(unique), dtype=np.int64)
+    np.add.at(summed, inverse.reshape(-1), counts)
+    return unique[:, 0].astype(np.int32), unique[:, 1:].astype(np.int32), summed
+
+class SyllableCounts:
+    '''
+    Counts of syllable n-grams for one or more orders n, optionally split by label pattern.
+    For each n the table is three parallel arrays: label codes (int32), n-gram IDs (int32, shape (m, n)) and counts (int64).
+    Label code bit k is the label of the k-th syllable of the n-gram.
+    '''
+
+    def __init__(self, orders=(1,), split=None, vocabulary=None):
+        if split is not None and split not in SPLITS:
+            raise ValueError(f"Unknown split {split!r}; choose one of {', '.join(SPLITS)}")
+        self.orders = tuple(orders)
+        self.split = split
+        self.vocabulary = vocabulary if vocabulary is not None else SyllableVocabulary()
+        self._tables = {
+            n: (np.zeros(0, dtype=np.int32), np.zeros((0, n), dtype=np.int32), np.zeros(0, dtype=np.int64))
+            for n in self.orders
+        }
+        self._pending = {n: [] for n in self.orders}
+        self._pending_rows = {n: 0 for n in self.orders}
+
+    @property
+    def tables(self):
+        '''
+        n -> (label codes, n-gram IDs, counts), with identical rows summed.
+        '''
+        for n in self.orders:
+            self._consolidate(n)
+        return self._tables
+
+    # ============================
+    # Counting
+    # ============================
+
+    def add_lines(self, lines, syllabified=False):
+        '''
+        Counts a batch of raw lines (or, with syllabified=True, lists of syllables).
+        '''
+        ids, labels, offsets = [], [], [0]
+        for line in lines:
+            syllables = line if syllabified else (syllabifier(line.rstrip('\n')) or [])
+            ids.append(self.vocabulary.encode_numpy(syllables))
+            labels.append(_label_array(syllables, self.split))
+            offsets.append(offsets[-1] + len(syllables))
+        if not ids:
+            return self
+        ids = np.concatenate(ids)
+        labels = np.concatenate(labels)
+        offsets = np.array(offsets, dtype=np.int64)
+
+        # Distance from every position to the end of its line
+        line_ends = np.repeat(offsets[1:], np.diff(offsets))
+        remaining = line_ends - np.arange(len(ids))
+
+        for n in self.orders:
+            starts = np.flatnonzero(remaining >= n)
+            grams = np.stack([ids[starts + k] for k in range(n)], axis=1) if len(starts) else np.zeros((0, n), dtype=np.int32)
+            codes = sum(labels[starts + k] << k for k in range(n)) if len(starts) else np.zeros(0, dtype=np.int64)
+            self._extend(n, *_unique_rows(np.asarray(codes, dtype=np.int32), grams, np.ones(len(starts), dtype=np.int64)))
+        return self
+
+    def _extend(self, n, labels, grams, counts):
+        '''
+        Queues rows for order n. They are summed into the table when it is read, or once the queue is as large as the table,
+        so that every row is re-sorted O(log N) times rather than once per batch.
+        '''
+        if len(counts) == 0:
+            return
+        self._pending[n].append((labels, grams, counts))
+        self._pending_rows[n] += len(counts)
+        if self._pending_rows[n] >= max(len(self._tables[n][2]), MIN_CONSOLIDATE):
+            self._consolidate(n)
+
+    def _consolidate(self, n):
+        pending = self._pending[n]
+        if not pending:
+            return
+        parts = [self._tables[n]] + pending
+        self._tables[n] = _unique_rows(
+            np.concatenate([part[0] for part in parts]),
+            np.concatenate([part[1] for part in parts]),
+            np.concatenate([part[2] for part in parts]),
+        )
+        self._pending[n] = []
+        self._pending_rows[n] = 0
+
+    def merge(self, other):
+        '''
+        Adds the counts of another SyllableCounts (e.g. from a worker process) to this one.
+        '''
+        if other.orders != self.orders or other.split != self.split:
+            raise ValueError("Cannot merge counts with different orders or splits")
+        remap = self.vocabulary.merge(other.vocabulary)
+        for n in self.orders:
+            labels, grams, counts = other.tables[n]
+            self._extend(n, labels, remap[grams] if len(grams) else grams, counts)
+        return self
+
+    # ============================
+    # Export
+    # ============================
+
+    def label_pattern(self, code, n):
+        if self.split is None:
+            return ''
+        symbols = SPLITS[self.split][1]
+        return ''.join(symbols[(code >> k) & 1] for k in range(n))
+
+    def to_arrays(self, n, top_k=None):
+        '''
+        The table for order n sorted by descending count (ties by ID), optionally cut to the top_k rows.
+        Returns a dict of NumPy arrays: 'ids' (m, n), 'labels' (m,), 'counts' (m,). Decode IDs with self.vocabulary.
+        '''
+        labels, grams, counts = self.tables[n]
+        order = np.lexsort(tuple(grams.T[::-1]) + (labels, -counts)) if len(counts) else np.zeros(0, dtype=np.int64)
+        if top_k is not None:
+            order = order[:top_k]
+        return {'ids': grams[order], 'labels': labels[order], 'counts': counts[order]}
+
+    def top(self, n, top_k=None):
+        '''
+        [(n-gram as tuple of syllables, label pattern, count), ...] sorted by descending count.
+        '''
+        arrays = self.to_arrays(n, top_k)
+        return [
+            (tuple(self.vocabulary.iter_decode(gram)), self.label_pattern(int(code), n), int(count))
+            for gram, code, count in zip(arrays['ids'], arrays['labels'], arrays['counts'])
+        ]
+
+    def to_tsv(self, path, n, top_k=None):
+        '''
+        Writes one row per n-gram: the n syllables, the label pattern (if split) and the count, tab-separated.
+        Tabs and newlines inside syllables are escaped as \\t and \\n.
+        '''
+        with open(path, 'w', encoding='utf-8') as f:
+            for gram, pattern, count in self.top(n, top_k):
+                fields = [syllable.replace('\t', '\\t').replace('\n', '\\n') for syllable in gram]
+                if self.split is not None:
+                    fields.append(pattern)
+                fields.append(str(count))
+                f.write('\t'.join(fields) + '\n')
+
+# ============================
+# Corpus-Level Counting
+# ============================
+
+def _chunks(lines, chunk_size):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _count_chunk(args):
+    chunk, orders, split, syllabified = args
+    return SyllableCounts(orders, split).add_lines(chunk, syllabified=syllabified)
+
+def corpus_counts(lines, n=(1, 2), split=None, workers=None, chunk_size=10000, syllabified=False, executor='process'):
+    '''
+    Counts syllable n-grams of every order in `n` over an iterable of lines.
+    With workers > 1, chunks of chunk_size lines are counted in worker processes (executor='process')
+    or threads (executor='thread', for free-threaded builds) and merged in order, with at most 2 * workers chunks
+    in flight, so that the corpus is read as it is counted rather than all at once.
+    '''
+    if executor not in ('process', 'thread'):
+        raise ValueError(f"executor must be 'process' or 'thread', not {executor!r}")
+    orders = (n,) if isinstance(n, int) else tuple(n)
+    total = SyllableCounts(orders, split)
+    jobs = ((chunk, orders, split, syllabified) for chunk in _chunks(lines, chunk_size))
+    if not workers or workers <= 1:
+        for job in jobs:
+            total.merge(_count_chunk(job))
+        return total
+    Pool = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with Pool(max_workers=workers) as pool:
+        for partial in thread_map(_count_chunk, jobs, workers, chunk_size=1, executor=pool):
+            total.merge(partial)
+    return total
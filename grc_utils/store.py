@@ -0,0 +1,192 @@
+'''
+Compact on-disk store for syllabified corpora, read back through numpy.memmap.
+
+A store is a directory holding
+    text.bin        the normalized text of every line, UTF-8, concatenated
+    syllables.bin   int64 byte offsets into text.bin, one per syllable plus a final end offset
+    lines.bin       int64 syllable indexes, one per line plus a final end index
+    flags.bin       uint8 flags per syllable (HEAVY, OPEN, DICHRONON below)
+    meta.json       counts and format version
+
+Nothing is loaded up front: any line's syllables are found in O(1) by two lookups in lines.bin and syllables.bin.
+
+>> write_store('iliad.store', open('iliad.txt'))
+>> store = AnnotationStore('iliad.store')
+>> store[0]
+>> ['μῆ', 'νι', 'ν ἄ', 'ει', 'δε ', 'θε', 'ὰ ', 'Πη', 'λη', 'ϊ', 'ά', 'δε', 'ω ', 'Ἀ', 'χι', 'λῆ', 'ος']
+>> store.heavy(0)
+>> array([ True, False, ...])
+'''
+
+import json
+import os
+
+import numpy as np
+
+from .filter_dichrona import word_with_real_dichrona
+from .markup import strip_markup
+from .syllabifier import syllabifier
+from .utils import only_bases
+from .vowels import vowel
+from .weight import heavy
+
+STORE_VERSION = 1
+
+# Flag bits
+HEAVY = 1
+OPEN = 2
+DICHRONON = 4
+
+_FILES = ('text.bin', 'syllables.bin', 'lines.bin', 'flags.bin')
+
+def syllable_flags(syllable):
+    '''
+    The flag byte stored for a syllable of a syllabified line.
+    Since the syllabifier has already moved consonants across word boundaries, a syllable is open iff it ends in a vowel.
+    '''
+    flags = 0
+    if heavy(syllable):
+        flags |= HEAVY
+    bases = only_bases(strip_markup(syllable))
+    if bases and vowel(bases[-1]):
+        flags |= OPEN
+    if word_with_real_dichrona(syllable):
+        flags |= DICHRONON
+    return flags
+
+# ============================
+# Writing
+# ============================
+
+class AnnotationStoreWriter:
+    '''
+    Streams syllabified lines into a store directory; memory use does not grow with the corpus.
+    Use as a context manager, or call close() to write meta.json.
+    '''
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._files = {name: open(os.path.join(path, name), 'wb') for name in _FILES}
+        self._text_offset = 0
+        self._syllable_count = 0
+        self._line_count = 0
+        self._files['syllables.bin'].write(np.zeros(1, dtype=np.int64).tobytes())
+        self._files['lines.bin'].write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def add_line(self, syllables):
+        '''
+        Appends one line, given as syllabifier output (None counts as an empty line).
+        '''
+        syllables = syllables or []
+        encoded = [syllable.encode('utf-8') for syllable in syllables]
+        ends = self._text_offset + np.cumsum([len(chunk) for chunk in encoded], dtype=np.int64)
+        flags = np.fromiter((syllable_flags(syllable) for syllable in syllables), dtype=np.uint8, count=len(syllables))
+
+        self._files['text.bin'].write(b''.join(encoded))
+        self._files['syllables.bin'].write(ends.tobytes())
+        self._files['flags.bin'].write(flags.tobytes())
+        if len(ends):
+            self._text_offset = int(ends[-1])
+        self._syllable_count += len(syllables)
+        self._line_count += 1
+        self._files['lines.bin'].write(np.array([self._syllable_count], dtype=np.int64).tobytes())
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        meta = {
+            'version': STORE_VERSION,
+            'lines': self._line_count,
+            'syllables': self._syllable_count,
+            'text_bytes': self._text_offset,
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_store(path, lines, syllabified=False):
+    '''
+    Writes a store from an iterable of lines.
+    Lines are raw strings to be syllabified, or, with syllabified=True, lists of syllables.
+    Trailing newlines of raw lines are dropped.
+    '''
+    with AnnotationStoreWriter(path) as writer:
+        for line in lines:
+            if not syllabified:
+                line = syllabifier(line.rstrip('\n'))
+            writer.add_line(line)
+    return path
+
+# ============================
+# Reading
+# ============================
+
+class AnnotationStore:
+    '''
+    Read-only, memory-mapped view of a store written by AnnotationStoreWriter.
+    '''
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != STORE_VERSION:
+            raise ValueError(f"Unsupported store version {self.meta['version']} in {path}")
+        self.path = path
+        self.text = self._map('text.bin', np.uint8, self.meta['text_bytes'])
+        self.syllable_offsets = self._map('syllables.bin', np.int64, self.meta['syllables'] + 1)
+        self.line_offsets = self._map('lines.bin', np.int64, self.meta['lines'] + 1)
+        self.flags = self._map('flags.bin', np.uint8, self.meta['syllables'])
+
+    def _map(self, name, dtype, length):
+        if length == 0: # numpy cannot map empty files
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=(length,))
+
+    def __len__(self):
+        return self.meta['lines']
+
+    def syllable_range(self, i):
+        '''
+        (first, end) syllable indexes of line i.
+        '''
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"line {i} out of range")
+        i %= len(self)
+        return int(self.line_offsets[i]), int(self.line_offsets[i + 1])
+
+    def __getitem__(self, i):
+        '''
+        The syllables of line i, as syllabifier returned them.
+        '''
+        first, end = self.syllable_range(i)
+        offsets = self.syllable_offsets[first:end + 1]
+        blob = self.text[offsets[0]:offsets[-1]].tobytes() if end > first else b''
+        starts = offsets - offsets[0]
+        return [blob[starts[j]:starts[j + 1]].decode('utf-8') for j in range(end - first)]
+
+    def line_text(self, i):
+        first, end = self.syllable_range(i)
+        return self.text[self.syllable_offsets[first]:self.syllable_offsets[end]].tobytes().decode('utf-8')
+
+    def line_flags(self, i):
+        first, end = self.syllable_range(i)
+        return self.flags[first:end]
+
+    def heavy(self, i):
+        return (self.line_flags(i) & HEAVY).astype(bool)
+
+    def open(self, i):
+        return (self.line_flags(i) & OPEN).astype(bool)
+
+    def dichronon(self, i):
+        return (self.line_flags(i) & DICHRONON).astype(bool)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
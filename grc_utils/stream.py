@@ -0,0 +1,77 @@
+'''
+Streaming syllabification of unbounded text, e.g. papyri or inscriptions transcribed as one huge line.
+
+stream_syllables() reads a string, a file object or any iterable of chunks, and yields syllables as it goes,
+holding only a bounded buffer. The buffer is cut, and its head syllabified, at a safe boundary:
+whitespace between a word ending in a vowel and a word starting with a single consonant followed by a vowel (τε | δέ).
+No consonant can move across such a boundary and no diphthong can form across it, so syllabifying the two sides
+separately gives exactly the syllables of the whole. Clusters (τε σ|τρα-), double consonants (τε ζ|εύς) and
+mutae cum liquidae never produce a safe boundary, since there the consonants are redistributed across the space.
+
+If no safe boundary turns up within max_buffer characters, the buffer is cut at its last whitespace instead,
+which may (rarely) syllabify that one word boundary differently from the whole text. A buffer without any whitespace
+is never cut inside a word: it keeps growing until whitespace turns up, so a text without spaces is held whole.
+
+>> with open('papyrus.txt', encoding='utf-8') as f:
+>>     for syllable in stream_syllables(f):
+>>         ...
+'''
+
+import re
+
+from .syllabifier import get_rules, patterns, syllabifier
+from .vowels import VOWELS
+
+_VOWEL_CHARS = ''.join(sorted(VOWELS))
+# The consonants of the syllabifier itself, so that the two cannot drift apart; no ζ, ξ, ψ (double_cons),
+# which close the preceding syllable
+_SINGLE_CONSONANTS = ''.join(patterns[kind][1:-1] for kind in ('stops', 'liquids', 'nasals', 'sibilants'))
+_MARKS = '̀-ͯ^_'
+_PUNCTUATION = re.escape(".,·;:!?·;·'’᾽ʼ\"»)]}")
+
+SAFE_BOUNDARY = re.compile(
+    f'[{_VOWEL_CHARS}][{_MARKS}]*[{_PUNCTUATION}]*\\s+(?=[{_SINGLE_CONSONANTS}][{_MARKS}]*[{_VOWEL_CHARS}])'
+)
+
+def _chunks(source, chunk_size):
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+def _cut(buffer, max_buffer):
+    '''
+    Index at which to cut the buffer, or 0 if it should keep growing (also past max_buffer, if it has no whitespace).
+    '''
+    cut = 0
+    for match in SAFE_BOUNDARY.finditer(buffer):
+        cut = match.end()
+    if cut or len(buffer) <= max_buffer:
+        return cut
+    whitespace = [match.end() for match in re.finditer(r'\s+', buffer) if match.end() < len(buffer)]
+    return whitespace[-1] if whitespace else 0
+
+def stream_syllables(source, convention=None, chunk_size=65536, max_buffer=1 << 20):
+    '''
+    Yields the syllables of `source` (str, text file object or iterable of str chunks) one by one.
+    Joined, they equal normalize_word() of the whole text, as with syllabifier().
+    Memory stays within about chunk_size + max_buffer characters, whatever the input length,
+    unless the input runs on for longer than that without whitespace.
+    '''
+    rules = get_rules(convention)
+    buffer = ''
+    for chunk in _chunks(source, chunk_size):
+        buffer += chunk
+        cut = _cut(buffer, max_buffer)
+        if cut:
+            yield from syllabifier(buffer[:cut], convention=rules) or []
+            buffer = buffer[cut:]
+    if buffer:
+        yield from syllabifier(buffer, convention=rules) or []
@@ -15,10 +15,13 @@ This script is extremely good and well tested, but a few bugs remain.
 The goal is to keep punctuation as "second class citizens" that always attach to previous alphabet chars 
 and that we have the sanity check that the joined output should always be the same as the input.
 
+3) conventions are named profiles compiled ahead of time into rule tables (see CONVENTIONS), e.g.
+>>syllabifier('πατρός', convention='comic')
+>>['πα', 'τρός']
+
 NOTE requires corpus normalized to not include the oxia variants of άέήίόύώ, only tonos
 NOTE since wiktionary has macrons, I added vowels with macra and brevia from macrons_map.py
 
-TODO Add option for comic homosyllabic mutae cum liquidae.
 TODO 27/3 -25 I'm getting some shitty split diphthongs like: [(-4, 'δα'), (-3, 'ρε'), (-2, 'ῖ'), (-1, 'ος')]
 
 BUG
@@ -38,17 +41,28 @@ Final reshuffled text: ['τ', 'οῖ', 'ος· ', 'ἀλλ']
 ['τοῖ', 'ος· ', 'ἀλλ']
 '''
 
+import hashlib
+import json
+import logging
 import re
+import threading
 import unicodedata
+from collections import namedtuple
+from types import MappingProxyType
 
+from .instrument import INSTRUMENTATION, NO_LAPS
 from .lower_grc import VOWELS_LOWER_TO_UPPER
 from .macrons_map import macrons_map
+from .markup import strip_markup
 from .utils import normalize_word
 from .vowels import vowel
 
 SHORT = '̆'
 LONG = '̄'
 
+# syllabifier(debug=True) logs every stage here at DEBUG level, e.g. after logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
 # ============================
 # Prepare Character Patterns
 # ============================
@@ -59,16 +73,18 @@ unmacronized_vowels = list('αεηιουωἀἁἐἑἠἡἰἱὀὁὐὑ
                           'ᾶῆῖῦῶἇἆἦἧἶἷὖὗὦὧϋϊΐῒϋῢΰῗῧ')
 
 # Combine initial vowel sets and expand with uppercase forms
-initial_vowels = set(macronized_vowels + unmacronized_vowels)
+initial_vowels = frozenset(macronized_vowels + unmacronized_vowels)
 all_vowels_expanded = set()
 for char in initial_vowels:
     all_vowels_expanded.add(char)
     if char in VOWELS_LOWER_TO_UPPER:
         all_vowels_expanded.add(VOWELS_LOWER_TO_UPPER[char])
+all_vowels_expanded = frozenset(all_vowels_expanded)
 all_vowels = '(' + '|'.join(re.escape(char) for char in all_vowels_expanded) + ')' + f'[{SHORT}{LONG}]?'
 
 #   - NB: regexes of several combining characters together like '\u03B1\u0306' and '\u0391\u0306' must use alternation, i.e. ( | )
-patterns = {
+#   - read-only (MappingProxyType), like every table the syllabifier consults, so that it is safe to share between threads
+patterns = MappingProxyType({
     'diphth_y': r'(α|ε|η|ο|Α|Ε|Η|Ο)(ὐ|ὔ|υ|ὑ|ύ|ὖ|ῦ|ὕ|ὗ|ὺ|ὒ|ὓ)',
     'diphth_i': r'(α|ε|υ|ο|Α|Ε|Υ|Ο)(ἰ|ί|ι|ῖ|ἴ|ἶ|ἵ|ἱ|ἷ|ὶ|ἲ|ἳ)',
     'adscr_i': r'(α_|η|ω|ἀ|ἠ|ὠ|ἁ|ἡ|ὡ|ά|ή|ώ|ὰ|ὴ|ὼ|ᾶ|ῆ|ῶ|ὤ|ὥ|ὢ|ὣ|ἄ|ἅ|ἂ|ἃ|ἤ|ἥ|ἣ|ἢ|ἦ|ἧ|ἆ|ἇ|ὧ|ὦ)(ι)', # 'αι' can be dipth or adscr. since diph is commoner, we default to that
@@ -79,7 +95,107 @@ patterns = {
     'double_cons': r'[ζξψΖΞΨ]',
     'sibilants': r'[σςΣ]',
     'vowels': all_vowels
-}
+})
+
+# ============================
+# Conventions
+# ============================
+
+# muta_cum_liquida:  'heterosyllabic' (πατ|ρός) or 'homosyllabic' (πα|τρός)
+# double_consonants: 'coda' (ἄξ|ων) or 'onset' (ἄ|ξων)
+Convention = namedtuple('Convention', ['name', 'muta_cum_liquida', 'double_consonants'])
+
+# What the reshuffling stages actually consult:
+#   onsets        consonant pairs that go together into the next syllable instead of being split
+#   coda_doubles  double consonants that stay at the end of their syllable before a vowel
+SyllabificationRules = namedtuple('SyllabificationRules', ['name', 'onsets', 'coda_doubles'])
+
+def compile_convention(convention):
+    '''
+    Convention -> SyllabificationRules. Done once per convention, never per call.
+    Homosyllabic mutae cum liquidae are those of correptio Attica: voiceless and aspirated stops before any liquid or nasal,
+    voiced stops only before ρ.
+    '''
+    if convention.muta_cum_liquida not in ('heterosyllabic', 'homosyllabic'):
+        raise ValueError(f"muta_cum_liquida must be 'heterosyllabic' or 'homosyllabic', not {convention.muta_cum_liquida!r}")
+    if convention.double_consonants not in ('coda', 'onset'):
+        raise ValueError(f"double_consonants must be 'coda' or 'onset', not {convention.double_consonants!r}")
+
+    onsets = set()
+    if convention.muta_cum_liquida == 'homosyllabic':
+        pairs = [(stop, liquid) for stop in 'πτκφθχ' for liquid in 'λρμν'] + [(stop, 'ρ') for stop in 'βγδ']
+        for stop, liquid in pairs:
+            for first in (stop, stop.upper()):
+                onsets.update({first + liquid, first + liquid.upper(), first + 'ῥ', first + 'ῤ'} if liquid == 'ρ' else {first + liquid})
+    coda_doubles = set('ζξψΖΞΨ') if convention.double_consonants == 'coda' else set()
+
+    return SyllabificationRules(convention.name, frozenset(onsets), frozenset(coda_doubles))
+
+CONVENTIONS = {}
+
+# alias -> name of the convention whose rules it selects
+ALIASES = {}
+
+# Serializes changes to CONVENTIONS, ALIASES and SYLLABLE_TABLES; lookups need no lock, as these only ever have
+# whole entries added, replaced or removed, never changed in place
+REGISTRY_LOCK = threading.Lock()
+
+def register_convention(convention):
+    '''
+    Compiles a (custom) Convention and makes it selectable by name, and by the names that alias it. Returns its rules.
+    '''
+    rules = compile_convention(convention)
+    with REGISTRY_LOCK:
+        ALIASES.pop(convention.name, None)
+        CONVENTIONS[convention.name] = rules
+        for alias, name in ALIASES.items():
+            if name == convention.name:
+                CONVENTIONS[alias] = rules
+    return rules
+
+def register_alias(alias, name):
+    '''
+    Makes `alias` select the rules of the convention `name` (the very same rules, so also its syllable table),
+    including after `name` is redefined.
+    '''
+    with REGISTRY_LOCK:
+        if name not in CONVENTIONS or name in ALIASES:
+            raise ValueError(f"Unknown convention {name!r}; choose one of {', '.join(n for n in CONVENTIONS if n not in ALIASES)}")
+        ALIASES[alias] = name
+        CONVENTIONS[alias] = CONVENTIONS[name]
+
+register_convention(Convention('tragic', 'heterosyllabic', 'coda'))
+register_convention(Convention('comic', 'homosyllabic', 'coda'))
+
+# Homer makes position before muta cum liquida as a rule and has ξ, ψ, ζ close the syllable, as tragedy does;
+# his own licences (epic correption, synizesis) are not a matter of syllable division (see meter.py)
+register_alias('homeric', 'tragic')
+
+DEFAULT_CONVENTION = 'tragic'
+
+# Precomputed syllabification tables in use, by the SyllabificationRules they were built with (see syllable_table.py)
+SYLLABLE_TABLES = {}
+
+def get_rules(convention=None):
+    '''
+    Convention name (default: DEFAULT_CONVENTION) or already compiled SyllabificationRules -> SyllabificationRules.
+    '''
+    if convention is None:
+        return CONVENTIONS[DEFAULT_CONVENTION]
+    if isinstance(convention, SyllabificationRules):
+        return convention
+    try:
+        return CONVENTIONS[convention]
+    except KeyError:
+        raise ValueError(f"Unknown convention {convention!r}; choose one of {', '.join(CONVENTIONS)}") from None
+
+def convention_key(rules):
+    '''
+    SyllabificationRules -> 'name:digest' of everything the rules consult,
+    which tells apart conventions redefined under the same name.
+    '''
+    content = json.dumps([sorted(rules.onsets), sorted(rules.coda_doubles)], ensure_ascii=False)
+    return f"{rules.name}:{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}"
 
 # ============================
 # Auxiliary Functions
@@ -176,12 +292,12 @@ def divide_into_elements(text):
 
 def is_vowel(element):
     # Strip markup characters for pattern matching
-    clean_element = element.replace('^', '').replace('_', '')
+    clean_element = strip_markup(element)
     return any(re.match(patterns[vowel_type], clean_element) for vowel_type in ['vowels', 'diphth_y', 'diphth_i', 'adscr_i', 'subscr_i'])
 
 def is_consonant(element):
     # Strip markup characters for pattern matching
-    clean_element = element.replace('^', '').replace('_', '')
+    clean_element = strip_markup(element)
     return any(re.match(patterns[consonant_type], clean_element) for consonant_type in ['stops', 'liquids', 'nasals', 'double_cons', 'sibilants'])
 
 def syllabify(divided_text):
@@ -201,8 +317,8 @@ def syllabify(divided_text):
             if i + 1 < len(elements) and is_vowel(elements[i + 1]):
                 potential_diphthong = element + elements[i + 1]
                 # Strip markup characters for pattern matching but preserve them in the result
-                clean_element = element.replace('^', '').replace('_', '')
-                clean_next = elements[i + 1].replace('^', '').replace('_', '')
+                clean_element = strip_markup(element)
+                clean_next = strip_markup(elements[i + 1])
                 clean_diphthong = clean_element + clean_next
                 
                 if (re.match(patterns['diphth_y'], clean_diphthong) or 
@@ -232,11 +348,12 @@ def syllabify(divided_text):
     #syllables = [syl for syl in syllables if any(is_vowel(char) for char in syl)]  # UPDATE: Remove if not a real syllable (had errors here from Pindar)
     return syllables
 
-def reshuffle_consonants(syllables):
+def reshuffle_consonants(syllables, rules=None):
     '''
     Reshuffles consonants between syllables.
     Now properly handles spaces and punctuation at syllable boundaries.
     '''
+    rules = rules or get_rules()
     syllables = [syl for syl in syllables if syl]
     
     reshuffled_syllables = []
@@ -270,8 +387,8 @@ def reshuffle_consonants(syllables):
         if i < len(syllables) - 1 and is_consonant(syllable[-1]):
             next_syllable = syllables[i + 1].rstrip()  # ignore trailing space in peek
             if is_vowel(next_syllable[0]):
-                # Check if the last character is a double consonant
-                if re.match(patterns['double_cons'], syllable[-1]):
+                # Check if the last character is a double consonant that stays in the coda
+                if syllable[-1] in rules.coda_doubles:
                     carry_over = ''
                 else:
                     carry_over = syllable[-1] + trailing_chars  # Move trailing chars with the consonant
@@ -293,7 +410,12 @@ def reshuffle_consonants(syllables):
 
     return reshuffled_syllables
 
-def final_reshuffle(reshuffled_syllables):
+def final_reshuffle(reshuffled_syllables, rules=None):
+    '''
+    Leaves at most one consonant at the end of each syllable. Returns a new list; the argument is left as it is.
+    '''
+    rules = rules or get_rules()
+    reshuffled_syllables = list(reshuffled_syllables) # the next syllable is rewritten below
     final_syllables = []
     
     for i, syllable in enumerate(reshuffled_syllables):
@@ -317,6 +439,10 @@ def final_reshuffle(reshuffled_syllables):
                 split_index = consonant_count - 1
                 final_syllables.append(syllable[:-split_index] + trailing_chars)
                 reshuffled_syllables[i + 1] = syllable[-split_index:] + next_syllable
+            elif not trailing_chars and next_syllable and syllable[-1] + next_syllable[0] in rules.onsets:
+                # Homosyllabic muta cum liquida: the stop goes with the liquid
+                final_syllables.append(syllable[:-1])
+                reshuffled_syllables[i + 1] = syllable[-1] + next_syllable
             else:
                 final_syllables.append(original_syllable)
         else:
@@ -325,59 +451,107 @@ def final_reshuffle(reshuffled_syllables):
     return final_syllables
 
 def definitive_syllables(reshuffled_syllables):
+    '''
+    Joins a leading syllable without a vowel to the next one. Returns a new list; the argument is left as it is.
+    '''
     if not reshuffled_syllables:
-        return reshuffled_syllables
+        return []
     
     # If the first syllable is all consonants, join it with the second syllable
     if reshuffled_syllables[0] and not is_vowel(reshuffled_syllables[0][0]):
         if len(reshuffled_syllables) > 1:
-            reshuffled_syllables[0] += reshuffled_syllables[1]
-            reshuffled_syllables.pop(1)
-    return reshuffled_syllables
+            return [reshuffled_syllables[0] + reshuffled_syllables[1]] + list(reshuffled_syllables[2:])
+    return list(reshuffled_syllables)
 
 # ============================
 # Syllabifier
 # ============================
 
-def syllabifier(string, debug=False):
+def syllabifier(string, debug=False, convention=None):
     '''
-    all double consonants and mutae-cum-liquidae are treated as closed, i.e.
+    By default (the tragic convention) all double consonants and mutae-cum-liquidae are treated as closed, i.e.
     >>syllabifier('πατρός')
     >>['πατ', 'ρός']
 
+    convention is a name in CONVENTIONS or compiled SyllabificationRules.
+    If a precomputed table is in use for the convention (see syllable_table.py), it is consulted first.
+    debug=True bypasses the table and logs the output of every stage to `logger` at DEBUG level.
+
     string -> list
     '''
     if not string:
         return None
 
+    rules = get_rules(convention)
+    laps = NO_LAPS if debug else INSTRUMENTATION.laps('syllabifier')
     normalized_text = normalize_word(string)
+    laps('normalize')
+    if SYLLABLE_TABLES and not debug:
+        table = SYLLABLE_TABLES.get(rules)
+        if table is not None:
+            syllables = table.syllables(normalized_text)
+            if INSTRUMENTATION.enabled:
+                INSTRUMENTATION.count('syllable_table.misses' if syllables is None else 'syllable_table.hits')
+            if syllables is not None:
+                laps.done()
+                return syllables
+    return compute_syllables(normalized_text, rules, debug, laps)
+
+def compute_syllables(normalized_text, rules, debug=False, laps=NO_LAPS):
+    '''
+    The syllabification algorithm proper, on normalize_word() output, never consulting a table.
+    laps (see instrument.py) times each stage; the default times nothing.
+    '''
     if debug:
-        print(f"Normalized text: {normalized_text}")
+        logger.debug("Normalized text: %s", normalized_text)
     divided_text = divide_into_elements(normalized_text)
     if debug:
-        print(f"Divided text: {divided_text}")
+        logger.debug("Divided text: %s", divided_text)
     joined_text = '⋮'.join(divided_text)
     if debug:
-        print(f"Joined text: {joined_text}")
+        logger.debug("Joined text: %s", joined_text)
+    laps('divide')
     syllabified_text = syllabify(joined_text)
+    laps('syllabify')
     if debug:
-        print(f"Syllabified text: {syllabified_text}")
-    reshuffled_text = reshuffle_consonants(syllabified_text)
+        logger.debug("Syllabified text: %s", syllabified_text)
+    reshuffled_text = reshuffle_consonants(syllabified_text, rules)
+    laps('reshuffle')
     if debug:
-        print(f"Reshuffled text: {reshuffled_text}")
-    final_reshuffled_text = final_reshuffle(reshuffled_text)
+        logger.debug("Reshuffled text: %s", reshuffled_text)
+    final_reshuffled_text = final_reshuffle(reshuffled_text, rules)
+    laps('final_reshuffle')
     if debug:
-        print(f"Final reshuffled text: {final_reshuffled_text}")
+        logger.debug("Final reshuffled text: %s", final_reshuffled_text)
     definitive_text = definitive_syllables(final_reshuffled_text)
+    laps('definitive')
+    laps.done()
 
     # Sanity checks
     if debug:
         joined_output = "".join(definitive_text)
         if joined_output != normalized_text:
-            print(f"Syllabification perverted the text: {joined_output} != {normalized_text}")
+            logger.warning("Syllabification perverted the text: %s != %s", joined_output, normalized_text)
 
     return definitive_text
 
+def syllabify_conventions(string, conventions=('tragic', 'comic')):
+    '''
+    Syllabifies a string under several conventions side by side, sharing the normalizing and dividing stages.
+    >>syllabify_conventions('πατρός')
+    >>{'tragic': ['πατ', 'ρός'], 'comic': ['πα', 'τρός']}
+    '''
+    if not string:
+        return {convention: None for convention in conventions}
+
+    syllabified_text = syllabify('⋮'.join(divide_into_elements(normalize_word(string))))
+    results = {}
+    for convention in conventions:
+        rules = get_rules(convention)
+        reshuffled_text = reshuffle_consonants(syllabified_text, rules)
+        results[rules.name] = definitive_syllables(final_reshuffle(reshuffled_text, rules))
+    return results
+
 leading_punct = "· πατρός"
 assert syllabifier(leading_punct) == ['· πατ', 'ρός'], f"Failed leading punctuation test: {syllabifier(leading_punct)}"
 
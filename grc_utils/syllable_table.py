@@ -0,0 +1,357 @@
+'''
+Precomputed syllabification of a closed vocabulary, in a hashed, memory-mapped table.
+
+Most of what is syllabified comes from a known vocabulary (e.g. all the forms of a lexicon). The table stores,
+for every form normalized as syllabifier() normalizes it (normalize_word), the character offsets at which its
+syllables end, computed once with the live algorithm under one convention. The file holds a few flat arrays:
+    slots               open-addressing hash table (linear probing, at most half full) of entry numbers, -1 if empty
+    hashes              64-bit BLAKE2 hash of every entry's key
+    key_offsets         offsets of the UTF-8 keys in key_blob
+    key_blob            the keys, concatenated
+    boundary_offsets    offsets of every entry's syllable ends in boundaries
+    boundaries          character offsets at which every syllable but the last ends (uint16)
+SyllableTable maps the file read-only and reads the arrays through memoryviews, so a lookup is one hash,
+a probe or two and one decode: a few microseconds.
+
+Once a table is in use (use_syllable_table), syllabifier() consults it for its convention before computing;
+forms not in the table (and whole lines) are computed as before, so the output never changes, only gets faster.
+verify_syllable_table() checks every entry against the live algorithm.
+
+>> build_syllable_table(open('forms.txt', encoding='utf-8'), 'forms.syl', convention='tragic')
+>> use_syllable_table('forms.syl')
+>> syllabifier('πατρός')     # from the table
+>> ['πατ', 'ρός']
+
+From the shell:
+    python -m grc_utils.syllable_table build forms.txt forms.syl --convention tragic
+    python -m grc_utils.syllable_table build --lexicon macrons.lex forms.syl
+    python -m grc_utils.syllable_table verify forms.syl
+'''
+
+import argparse
+import json
+import mmap
+import os
+import sys
+from array import array
+from hashlib import blake2b
+
+from .syllabifier import CONVENTIONS, REGISTRY_LOCK, SYLLABLE_TABLES, compute_syllables, convention_key, get_rules
+from .utils import normalize_word
+
+MAGIC = b'GRCSYL01'
+FORMAT_VERSION = 1
+
+# (name, item size, memoryview type code) of the arrays, in file order
+SECTIONS = (('slots', 4, 'i'), ('hashes', 8, 'Q'), ('key_offsets', 8, 'Q'), ('key_blob', 1, 'B'),
+            ('boundary_offsets', 4, 'I'), ('boundaries', 2, 'H'))
+
+# Names of the arrays in a SharedTables
+PREFIX = 'syllable_table.'
+
+def key_hash(encoded):
+    return int.from_bytes(blake2b(encoded, digest_size=8).digest(), 'little')
+
+def _align(file):
+    file.write(b'\0' * (-file.tell() % 8))
+
+# ============================
+# Building
+# ============================
+
+def build_syllable_table(words, path, convention=None):
+    '''
+    Syllabifies every distinct (normalized) word of an iterable with the live algorithm and writes the table.
+    Returns the number of entries.
+    '''
+    rules = get_rules(convention)
+    seen = set()
+    hashes = array('Q')
+    key_offsets = array('Q', [0])
+    key_blob = bytearray()
+    boundary_offsets = array('I', [0])
+    boundaries = array('H')
+
+    for word in words:
+        key = normalize_word(word.strip())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        syllables = compute_syllables(key, rules)
+        if ''.join(syllables) != key or len(key) > 0xFFFF:
+            continue # never store what the algorithm itself would not return
+        encoded = key.encode('utf-8')
+        hashes.append(key_hash(encoded))
+        key_blob.extend(encoded)
+        key_offsets.append(len(key_blob))
+        end = 0
+        for syllable in syllables[:-1]:
+            end += len(syllable)
+            boundaries.append(end)
+        boundary_offsets.append(len(boundaries))
+
+    count = len(hashes)
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    slots = array('i', [-1]) * size
+    mask = size - 1
+    for entry, value in enumerate(hashes):
+        slot = value & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = entry
+
+    header = {
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'convention': rules.name,
+        'convention_key': convention_key(rules),
+        'entries': count,
+        'slots': size,
+        'boundaries': len(boundaries),
+    }
+    sections = [('slots', slots), ('hashes', hashes), ('key_offsets', key_offsets), ('key_blob', bytes(key_blob)),
+                ('boundary_offsets', boundary_offsets), ('boundaries', boundaries)]
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, 'little'))
+        f.write(encoded)
+        offsets = {}
+        for name, section in sections:
+            _align(f)
+            offsets[name] = f.tell()
+            f.write(section if isinstance(section, bytes) else section.tobytes())
+        _align(f)
+        trailer = json.dumps(offsets).encode('ascii')
+        f.write(trailer)
+        f.write(len(trailer).to_bytes(8, 'little'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+# ============================
+# Reading
+# ============================
+
+class SyllableTable:
+    '''
+    Read-only, memory-mapped syllabification table: a file, or the arrays of syllable_table_arrays() published in
+    a SharedTables (see shared.py). Picklable (by path, or as the shared tables, which workers attach).
+    '''
+
+    def __init__(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            self.path, self.shared = os.fspath(source), None
+            header, views = self._map(self.path)
+        else:
+            self.path, self.shared = None, source
+            header = json.loads(bytes(source[f'{PREFIX}header']).decode('utf-8'))
+            views = {name: memoryview(source[f'{PREFIX}{name}']).cast('B') for name, _, _ in SECTIONS}
+            self._mmap = self._buffer = None
+        self.header = header
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{self.path or 'The shared table'} was written on a {header['byteorder']}-endian machine")
+
+        entries = header['entries']
+        counts = {'slots': header['slots'], 'hashes': entries, 'key_offsets': entries + 1, 'key_blob': None,
+                  'boundary_offsets': entries + 1, 'boundaries': header['boundaries']}
+        sections = {}
+        for name, size, type_code in SECTIONS:
+            view = views[name]
+            if name != 'key_blob':
+                view = view[:size * counts[name]].cast(type_code)
+            sections[name] = view
+        self._slots = sections['slots']
+        self._hashes = sections['hashes']
+        self._key_offsets = sections['key_offsets']
+        self._key_blob = sections['key_blob'][:self._key_offsets[-1]]
+        self._boundary_offsets = sections['boundary_offsets']
+        self._boundaries = sections['boundaries']
+        self._mask = header['slots'] - 1
+
+    def _map(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = buffer = memoryview(self._mmap)
+        if bytes(buffer[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a grc_utils syllable table")
+        header_length = int.from_bytes(buffer[8:16], 'little')
+        header = json.loads(bytes(buffer[16:16 + header_length]).decode('utf-8'))
+        trailer_length = int.from_bytes(buffer[-8:], 'little')
+        offsets = json.loads(bytes(buffer[-8 - trailer_length:-8]).decode('ascii'))
+        return header, {name: buffer[offset:] for name, offset in offsets.items()}
+
+    def __reduce__(self):
+        return (SyllableTable, (self.path or self.shared,))
+
+    def __len__(self):
+        return self.header['entries']
+
+    @property
+    def convention(self):
+        return self.header['convention']
+
+    def close(self):
+        ''' Unmaps the file. Shared tables are left to whoever published or attached them. '''
+        for view in (self._slots, self._hashes, self._key_offsets, self._key_blob, self._boundary_offsets,
+                     self._boundaries, self._buffer):
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _entry(self, key):
+        encoded = key.encode('utf-8')
+        value = key_hash(encoded)
+        slots, hashes, key_offsets = self._slots, self._hashes, self._key_offsets
+        slot = value & self._mask
+        while True:
+            entry = slots[slot]
+            if entry < 0:
+                return None
+            if hashes[entry] == value and self._key_blob[key_offsets[entry]:key_offsets[entry + 1]] == encoded:
+                return entry
+            slot = (slot + 1) & self._mask
+
+    def _split(self, key, entry):
+        syllables = []
+        start = 0
+        for i in range(self._boundary_offsets[entry], self._boundary_offsets[entry + 1]):
+            end = self._boundaries[i]
+            syllables.append(key[start:end])
+            start = end
+        syllables.append(key[start:])
+        return syllables
+
+    def syllables(self, key):
+        ''' Syllables of a form already normalized with normalize_word(), or None if it is not in the table. '''
+        entry = self._entry(key)
+        return None if entry is None else self._split(key, entry)
+
+    def __contains__(self, word):
+        return self._entry(normalize_word(word)) is not None
+
+    def get(self, word, default=None):
+        syllables = self.syllables(normalize_word(word))
+        return default if syllables is None else syllables
+
+    def items(self):
+        ''' (key, syllables) of every entry, in table order. '''
+        for entry in range(len(self)):
+            key = bytes(self._key_blob[self._key_offsets[entry]:self._key_offsets[entry + 1]]).decode('utf-8')
+            yield key, self._split(key, entry)
+
+# ============================
+# Sharing
+# ============================
+
+def syllable_table_arrays(table):
+    '''
+    The arrays of a table (SyllableTable or path), copied out and named for SharedTables (see shared.py),
+    where they can sit next to other tables. SyllableTable(shared_tables) reads them back.
+    '''
+    import numpy as np
+
+    if not isinstance(table, SyllableTable):
+        with SyllableTable(table) as opened:
+            return syllable_table_arrays(opened)
+    arrays = {f'{PREFIX}header': json.dumps(table.header, ensure_ascii=False).encode('utf-8')}
+    for name, _, _ in SECTIONS:
+        arrays[f'{PREFIX}{name}'] = np.array(getattr(table, f'_{name}'))
+    return arrays
+
+# ============================
+# Using and verifying
+# ============================
+
+def use_syllable_table(table):
+    '''
+    Makes syllabifier() consult a table (SyllableTable, path or SharedTables) for the convention it was built with.
+    Raises ValueError if that convention has since been redefined with other rules.
+    As a pool initializer, with initargs=(shared_tables,), every worker attaches the one copy in shared memory:
+    >> tables = SharedTables(syllable_table_arrays('forms.syl'))
+    >> with tables, shared_pool(tables, initializer=use_syllable_table, initargs=(tables,)) as pool:
+    >>     results = list(pool.map(syllabifier, lines))
+    '''
+    if not isinstance(table, SyllableTable):
+        table = SyllableTable(table)
+    with REGISTRY_LOCK:
+        rules = CONVENTIONS.get(table.convention)
+        if rules is None or convention_key(rules) != table.header['convention_key']:
+            raise ValueError(f"{table.path or 'The shared table'} was built for other rules than the current "
+                             f"{table.convention!r} convention")
+        SYLLABLE_TABLES[rules] = table
+    return table
+
+def stop_using_syllable_tables(convention=None):
+    ''' Stops consulting the table of one convention (by name), or of all. '''
+    with REGISTRY_LOCK:
+        for rules in list(SYLLABLE_TABLES):
+            if convention is None or rules.name == convention:
+                del SYLLABLE_TABLES[rules]
+
+def verify_syllable_table(table, limit=None):
+    '''
+    Recomputes entries (all, or the first `limit`) with the live algorithm.
+    Returns the list of (key, stored syllables, live syllables) that differ.
+    '''
+    if not isinstance(table, SyllableTable):
+        table = SyllableTable(table)
+    rules = get_rules(table.convention)
+    mismatches = []
+    for i, (key, stored) in enumerate(table.items()):
+        if limit is not None and i >= limit:
+            break
+        live = compute_syllables(key, rules)
+        if live != stored:
+            mismatches.append((key, stored, live))
+    return mismatches
+
+# ============================
+# CLI
+# ============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or verify a precomputed syllabification table.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="syllabify a word list (one word per line) or the keys of a lexicon")
+    build.add_argument('words', nargs='?', help="word list file")
+    build.add_argument('table', help="table file to write")
+    build.add_argument('--lexicon', help="take the words from a macron lexicon file instead")
+    build.add_argument('--convention', default=None, choices=sorted(CONVENTIONS))
+    verify = commands.add_parser('verify', help="check a table against the live algorithm")
+    verify.add_argument('table')
+    verify.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.lexicon:
+            from .lexicon import MacronLexicon
+            with MacronLexicon(args.lexicon) as lexicon:
+                count = build_syllable_table((key for key, _ in lexicon.items()), args.table, args.convention)
+        elif args.words:
+            with open(args.words, encoding='utf-8') as f:
+                count = build_syllable_table(f, args.table, args.convention)
+        else:
+            parser.error("give a word list or --lexicon")
+        print(f"{count} entries")
+    else:
+        mismatches = verify_syllable_table(args.table, args.limit)
+        for key, stored, live in mismatches:
+            print(f"{key}\t{stored}\t{live}")
+        print(f"{len(mismatches)} mismatches", file=sys.stderr)
+        sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
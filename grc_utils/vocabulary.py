@@ -0,0 +1,129 @@
+'''
+Interned syllable vocabulary: maps syllable strings to dense integer IDs and back.
+
+A syllabified corpus repeats a few thousand syllable strings millions of times,
+so a line is far cheaper to hold as an array('I') or int32 array of IDs than as a list of str.
+IDs are assigned in order of first appearance, starting at 0.
+
+>> vocab = SyllableVocabulary()
+>> vocab.encode(syllabifier('μῆνιν ἄειδε θεά'))
+>> array('I', [0, 1, 2, 3, 4, 5, 6])
+>> vocab.decode([0, 1])
+>> ['μῆ', 'νι']
+
+Vocabularies built by parallel workers are combined with merge(), which returns
+the array translating the other vocabulary's IDs into this one's.
+'''
+
+import json
+from array import array
+
+import numpy as np
+
+from .syllabifier import syllabifier
+
+class SyllableVocabulary:
+
+    def __init__(self, syllables=()):
+        self._ids = {}
+        self._syllables = []
+        for syllable in syllables:
+            self.add(syllable)
+
+    def __len__(self):
+        return len(self._syllables)
+
+    def __contains__(self, syllable):
+        return syllable in self._ids
+
+    def __iter__(self):
+        return iter(self._syllables)
+
+    def __repr__(self):
+        return f'SyllableVocabulary({len(self)} syllables)'
+
+    def add(self, syllable):
+        '''
+        Returns the ID of the syllable, interning it first if it is new.
+        '''
+        syllable_id = self._ids.get(syllable)
+        if syllable_id is None:
+            syllable_id = len(self._syllables)
+            self._ids[syllable] = syllable_id
+            self._syllables.append(syllable)
+        return syllable_id
+
+    def id(self, syllable):
+        ''' Raises KeyError for unknown syllables. '''
+        return self._ids[syllable]
+
+    def syllable(self, syllable_id):
+        return self._syllables[syllable_id]
+
+    # ============================
+    # Encoding and Decoding
+    # ============================
+
+    def encode(self, syllables, add=True):
+        '''
+        list of syllables -> array('I') of IDs.
+        With add=False unknown syllables raise KeyError instead of being interned.
+        '''
+        lookup = self.add if add else self._ids.__getitem__
+        return array('I', map(lookup, syllables))
+
+    def encode_numpy(self, syllables, add=True):
+        ''' Like encode, but returns an int32 NumPy array. '''
+        return np.frombuffer(self.encode(syllables, add=add), dtype=np.uint32).astype(np.int32)
+
+    def encode_line(self, line, add=True):
+        ''' Syllabifies a raw line and encodes it. '''
+        return self.encode(syllabifier(line) or [], add=add)
+
+    def encode_corpus(self, lines, syllabified=False, add=True):
+        '''
+        Encodes a whole corpus into one flat int32 array of IDs plus int64 line offsets,
+        so that line i is ids[offsets[i]:offsets[i + 1]].
+        '''
+        ids = array('I')
+        offsets = array('q', [0])
+        for line in lines:
+            syllables = line if syllabified else (syllabifier(line.rstrip('\n')) or [])
+            ids.extend(self.encode(syllables, add=add))
+            offsets.append(len(ids))
+        return np.frombuffer(ids, dtype=np.uint32).astype(np.int32), np.frombuffer(offsets, dtype=np.int64).copy()
+
+    def iter_decode(self, ids):
+        ''' Lazily yields the syllables of a sequence of IDs. '''
+        return map(self._syllables.__getitem__, ids)
+
+    def decode(self, ids):
+        return list(self.iter_decode(ids))
+
+    def decode_text(self, ids):
+        ''' The (normalized) text of an encoded line, i.e. its syllables joined. '''
+        return ''.join(self.iter_decode(ids))
+
+    # ============================
+    # Merging and Persistence
+    # ============================
+
+    def merge(self, other):
+        '''
+        Adds every syllable of `other` to this vocabulary and returns an int32 array `remap`
+        such that remap[other_id] is the corresponding ID here; `remap[ids]` translates a whole encoded array.
+        '''
+        return np.fromiter((self.add(syllable) for syllable in other._syllables), dtype=np.int32, count=len(other))
+
+    def to_list(self):
+        ''' The syllables in ID order; SyllableVocabulary(vocab.to_list()) restores the same IDs. '''
+        return list(self._syllables)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self._syllables, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
@@ -333,7 +333,7 @@ LOWER_BREVE = [  #
     "\u1fe0",  # ῠ Greek Small Letter Upsilon With Vrachy
 ]
 
-VOWELS = set(
+VOWELS = frozenset(
     UPPER + UPPER_ACUTE + UPPER_GRAVE + UPPER_SMOOTH + UPPER_SMOOTH_ACUTE +
     UPPER_SMOOTH_GRAVE + UPPER_SMOOTH_CIRCUMFLEX + UPPER_ROUGH + UPPER_ROUGH_ACUTE +
     UPPER_ROUGH_GRAVE + UPPER_ROUGH_CIRCUMFLEX + UPPER_DIAERESIS + UPPER_MACRON +
@@ -348,36 +348,36 @@ def vowel(char):
     """Returns True if the character is a vowel, False otherwise."""
     return char in VOWELS
 
-ACUTES = set(
+ACUTES = frozenset(
     UPPER_ACUTE + UPPER_SMOOTH_ACUTE + UPPER_ROUGH_ACUTE + LOWER_ACUTE +
     LOWER_SMOOTH_ACUTE + LOWER_ROUGH_ACUTE + LOWER_DIAERESIS_ACUTE
 )
 
-GRAVES = set(
+GRAVES = frozenset(
     UPPER_GRAVE + UPPER_SMOOTH_GRAVE + UPPER_ROUGH_GRAVE + LOWER_GRAVE +
     LOWER_SMOOTH_GRAVE + LOWER_ROUGH_GRAVE + LOWER_DIAERESIS_GRAVE
 )
 
-CIRCUMFLEXES = set(
+CIRCUMFLEXES = frozenset(
     UPPER_SMOOTH_CIRCUMFLEX + UPPER_ROUGH_CIRCUMFLEX + LOWER_CIRCUMFLEX +
     LOWER_SMOOTH_CIRCUMFLEX + LOWER_ROUGH_CIRCUMFLEX + LOWER_DIAERESIS_CIRCUMFLEX
 )
 
-ACCENTS = set(
+ACCENTS = frozenset(
     ACUTES | GRAVES | CIRCUMFLEXES
 )
 
-ROUGHS = set(
+ROUGHS = frozenset(
     UPPER_ROUGH + LOWER_ROUGH + LOWER_ROUGH_ACUTE + LOWER_ROUGH_GRAVE +
     LOWER_ROUGH_CIRCUMFLEX
 )
 
-SMOOTHS = set(
+SMOOTHS = frozenset(
     UPPER_SMOOTH + LOWER_SMOOTH + LOWER_SMOOTH_ACUTE + LOWER_SMOOTH_GRAVE +
     LOWER_SMOOTH_CIRCUMFLEX
 )
 
-DIAERESIS = set(
+DIAERESIS = frozenset(
     UPPER_DIAERESIS + LOWER_DIAERESIS + LOWER_DIAERESIS_ACUTE +
     LOWER_DIAERESIS_GRAVE + LOWER_DIAERESIS_CIRCUMFLEX
 )
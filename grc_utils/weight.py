@@ -1,7 +1,44 @@
+import unicodedata
+
+from .markup import has_long_mark, strip_markup
 from .utils import only_bases
 from .vowels import vowel
 from .vowels_long import long_set
 
+# Syllable weights
+LIGHT = 0
+HEAVY = 1
+AMBIGUOUS = 2 # open syllable with an unmarked dichronon
+
+WEIGHT_SYMBOLS = {LIGHT: '⏑', HEAVY: '–', AMBIGUOUS: '⏓'}
+
+# Built once rather than per call
+LONG_BASES = frozenset('ηωΗΩ')
+LONG_MARKS = frozenset(long_set)
+LONG_COMBINING = frozenset({'\u0304', '\u0342', '\u0345'}) # macron, perispomeni, ypogegrammeni
+
+def long_nucleus(syllable):
+    '''
+    Whether the last vowel of a syllable is long by nature: η and ω, diphthongs, circumflexes, iota subscripts,
+    macrons and the long markup "_". Unmarked dichrona count as not long.
+    Accepts a string with inline markup or an AnnotatedText.
+    '''
+    if has_long_mark(syllable):
+        return True
+    syllable = strip_markup(syllable)
+    if any(mark in syllable for mark in LONG_MARKS):
+        return True
+    vowels = [char for char in syllable if vowel(char)]
+    if not vowels:
+        return False
+    base_form = only_bases(syllable)
+    base_form = base_form[:max((i for i, char in enumerate(base_form) if vowel(char)), default=-1) + 1] # drop the coda
+    if not base_form:
+        return False
+    if base_form[-1] in LONG_BASES or (len(base_form) > 1 and vowel(base_form[-2])):
+        return True
+    return any(mark in LONG_COMBINING for mark in unicodedata.normalize('NFD', vowels[-1]))
+
 def heavy(syllable):
     '''
     Input is considered in abstracto, and assuming no interplay with the following syllable.
@@ -18,14 +55,13 @@ def heavy(syllable):
     False
     '''
     
-    syllable = syllable.replace('_', '').replace('^', '')
-    base_form = only_bases(syllable)
+    base_form = only_bases(strip_markup(syllable))
 
     if not base_form:
         return False
 
     if vowel(base_form[-1]):
-        return base_form[-1] in long_set | set('_')
+        return long_nucleus(syllable)
     else:
         return True
 
@@ -38,9 +74,9 @@ def open_syllable_in_word(syllable, list_of_syllables):
     - "True" for ultimae with single final consonant (i.e. open in abstracto and in hiatus), e.g. both syllables in ἰσχύς return True.
     - False for ultimae with any of the three double consonants 'ζ','ξ','ψ'.
 
-    TODO problem with words where the ultima is identical to some earlier syllable
+    TODO problem with words where the ultima is identical to some earlier syllable (scansion.scan_line does not have it)
     '''
-    syllable = syllable.replace('_', '').replace('^', '')
+    syllable = strip_markup(syllable)
     base_form = only_bases(syllable)
 
     if base_form[-1] in {'ζ','ξ','ψ'}:
@@ -48,7 +84,7 @@ def open_syllable_in_word(syllable, list_of_syllables):
     if base_form and vowel(base_form[-1]):
         return True
     elif len(base_form) > 1: 
-        if syllable == list_of_syllables[-1].replace('_', '').replace('^', '') and vowel(base_form[-2]):
+        if syllable == strip_markup(list_of_syllables[-1]) and vowel(base_form[-2]):
             return True
     else:
         return False
@@ -61,8 +97,8 @@ def is_open_syllable_in_word_in_synapheia(syllable, list_of_syllables, next_word
     >>> True
 
     '''
-    syllable = syllable.replace('_', '').replace('^', '')
-    final_syllable = list_of_syllables[-1].replace('_', '').replace('^', '')
+    syllable = strip_markup(syllable)
+    final_syllable = strip_markup(list_of_syllables[-1])
 
     syll_base = only_bases(syllable)
     if not syll_base:
@@ -77,7 +113,8 @@ def is_open_syllable_in_word_in_synapheia(syllable, list_of_syllables, next_word
     # The only way a closed syll can be opened by synapheia
     # is if it's the ultima and the following word starts with a vowel:
     if syllable == final_syllable:
-        if next_word and vowel(next_word[0]):
+        stripped = strip_markup(next_word) if next_word else ''
+        if stripped and vowel(stripped[0]):
             return True
     else:
         return False
\ No newline at end of file
@@ -0,0 +1,246 @@
+'''
+Streaming ingest of a local Wiktionary XML dump (e.g. enwiktionary-latest-pages-articles.xml.bz2) into a macron lexicon.
+
+The dump is read with ElementTree.iterparse, one <page> at a time, and every page is cleared as soon as it has been read,
+so memory does not grow with the size of the dump. From the Ancient Greek section of every page, the Greek arguments of
+the grc-* headword and inflection templates (and of {{head|grc|...}}) that carry vowel-length marks are extracted,
+and normalized (normalize_word, no_macrons, lower_grc; see lexicon.py) in worker processes.
+
+Normalized entries are collected in a dict of bounded size, spilled to sorted run files whenever it fills up,
+and the runs are finally merged (homographs with merge_lengths(), which keeps every length no other form contradicts)
+straight into write_lexicon(), so the whole vocabulary is never held in memory at once.
+
+>> ingest_dump('enwiktionary-latest-pages-articles.xml.bz2', 'macrons.lex', workers=8)
+>> {'pages': 8103245, 'greek_pages': 142332, 'forms': 611204, 'keys': 498310}
+
+From the shell:
+    python -m grc_utils.wiktionary enwiktionary-latest-pages-articles.xml.bz2 macrons.lex --workers 8
+'''
+
+import argparse
+import bz2
+import gzip
+import heapq
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from .lexicon import merge_lengths, plain_key, write_lexicon
+from .markup import parse_lengths
+from .utils import normalize_word
+
+_SECTION = re.compile(r'^==\s*Ancient Greek\s*==\s*$(.*?)(?=^==[^=]|\Z)', re.MULTILINE | re.DOTALL)
+_TEMPLATE = re.compile(r'\{\{((?:grc-[^|{}]+)|head\|grc)\|([^{}]*)\}\}')
+_GREEK_WORD = re.compile('^[\u0370-\u03ff\u1f00-\u1fff\u0300-\u036f]+$')
+_LENGTH_MARKS = re.compile('[\u0304\u0306ᾰᾱᾸᾹῐῑῘῙῠῡῨῩ]')
+
+# ============================
+# Reading the dump
+# ============================
+
+def _open_dump(path):
+    ''' (raw file, decompressed stream): the raw file's position is what progress reports. '''
+    raw = open(path, 'rb')
+    if path.endswith('.bz2'):
+        return raw, bz2.BZ2File(raw)
+    if path.endswith('.gz'):
+        return raw, gzip.GzipFile(fileobj=raw)
+    return raw, raw
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def iter_pages(path, namespace='0'):
+    '''
+    Yields (title, wikitext) of every page of the dump in the given namespace (main by default; None for all).
+    '''
+    raw, stream = _open_dump(path)
+    try:
+        for title, text, page_namespace in _iter_page_elements(stream):
+            if namespace is None or page_namespace == namespace:
+                yield title, text
+    finally:
+        stream.close()
+        raw.close()
+
+def _iter_page_elements(stream):
+    context = ET.iterparse(stream, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if root is None:
+            root = elem
+        if event != 'end' or _local(elem.tag) != 'page':
+            continue
+        title = text = page_namespace = None
+        for child in elem.iter():
+            name = _local(child.tag)
+            if name == 'title':
+                title = child.text
+            elif name == 'ns':
+                page_namespace = child.text
+            elif name == 'text':
+                text = child.text or ''
+        yield title, text, page_namespace
+        elem.clear()
+        root.clear() # drop the cleared pages the root still holds
+
+# ============================
+# Extraction and normalization
+# ============================
+
+def ancient_greek_forms(wikitext):
+    '''
+    Greek words with vowel-length marks among the template arguments of the Ancient Greek section of a page.
+    '''
+    forms = []
+    for section in _SECTION.findall(wikitext or ''):
+        for _, arguments in _TEMPLATE.findall(section):
+            for argument in arguments.split('|'):
+                value = argument.split('=', 1)[-1].strip()
+                if value and _GREEK_WORD.match(value) and _LENGTH_MARKS.search(value):
+                    forms.append(value)
+    return forms
+
+def normalize_form(form):
+    ''' Macronized form -> (lexicon key, length annotation). '''
+    annotated = parse_lengths(normalize_word(form))
+    return plain_key(annotated), annotated.lengths
+
+def _process_batch(texts):
+    ''' Worker: page wikitexts -> (number of Greek pages, [(key, lengths), ...]). '''
+    entries = []
+    greek_pages = 0
+    for text in texts:
+        forms = ancient_greek_forms(text)
+        if forms:
+            greek_pages += 1
+            entries.extend(normalize_form(form) for form in forms)
+    return greek_pages, entries
+
+# ============================
+# Sorted runs
+# ============================
+
+def _write_run(entries, directory):
+    run = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.run', delete=False)
+    with run:
+        for key in sorted(entries):
+            run.write(f'{key}\t{entries[key].hex()}\n')
+    return run.name
+
+def _read_run(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            key, lengths = line.rstrip('\n').split('\t')
+            yield key, bytes.fromhex(lengths)
+
+def _merge_runs(paths):
+    ''' Sorted, deduplicated (key, lengths) over all runs. '''
+    merged = heapq.merge(*(_read_run(path) for path in paths), key=lambda entry: entry[0])
+    for key, group in groupby(merged, key=lambda entry: entry[0]):
+        lengths = None
+        for _, other in group:
+            lengths = other if lengths is None else merge_lengths(lengths, other)
+        yield key, lengths
+
+# ============================
+# Ingest
+# ============================
+
+def ingest_dump(dump_path, lexicon_path, workers=None, batch_size=2000, run_size=500000, progress=None, progress_every=100000):
+    '''
+    Builds a lexicon file from a Wiktionary dump (.xml, .xml.bz2 or .xml.gz).
+
+    workers         normalizing processes (default: os.cpu_count(); 1 to work in-process)
+    batch_size      pages per task sent to a worker
+    run_size        distinct keys held in memory before spilling a sorted run to disk
+    progress        callable taking a dict of the running statistics (and the 'fraction' of the dump read),
+                    called every `progress_every` pages
+    Returns the final statistics.
+    '''
+    workers = workers or os.cpu_count() or 1
+    stats = {'pages': 0, 'greek_pages': 0, 'forms': 0, 'keys': 0}
+    entries = {}
+    runs = []
+    size = os.path.getsize(dump_path)
+    directory = os.path.dirname(os.path.abspath(lexicon_path))
+
+    raw, stream = _open_dump(dump_path)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def batches():
+        batch = []
+        for _, text, namespace in _iter_page_elements(stream):
+            stats['pages'] += 1
+            if namespace == '0' and 'Ancient Greek' in (text or ''):
+                batch.append(text)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+            if progress and stats['pages'] % progress_every == 0:
+                progress(dict(stats, fraction=raw.tell() / size if size else 1.0))
+        if batch:
+            yield batch
+
+    def collect(result):
+        greek_pages, new_entries = result
+        stats['greek_pages'] += greek_pages
+        stats['forms'] += len(new_entries)
+        for key, lengths in new_entries:
+            entries[key] = merge_lengths(entries[key], lengths) if key in entries else lengths
+        if len(entries) >= run_size:
+            runs.append(_write_run(entries, directory))
+            entries.clear()
+
+    try:
+        if executor is None:
+            for batch in batches():
+                collect(_process_batch(batch))
+        else:
+            # At most 2 * workers batches in flight, so that parsing cannot run far ahead of normalizing
+            pending = []
+            for batch in batches():
+                pending.append(executor.submit(_process_batch, batch))
+                if len(pending) >= 2 * workers:
+                    collect(pending.pop(0).result())
+            for future in pending:
+                collect(future.result())
+        if entries:
+            runs.append(_write_run(entries, directory))
+            entries.clear()
+        stats['keys'] = write_lexicon(_merge_runs(runs), lexicon_path)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        stream.close()
+        raw.close()
+        for run in runs:
+            os.remove(run)
+
+    if progress:
+        progress(dict(stats, fraction=1.0))
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a macron lexicon from a local Wiktionary XML dump.")
+    parser.add_argument('dump', help="enwiktionary pages-articles dump (.xml, .xml.bz2 or .xml.gz)")
+    parser.add_argument('lexicon', help="lexicon file to write")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--run-size', type=int, default=500000)
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        print(f"{stats['fraction']:6.1%}  {stats['pages']} pages, {stats['greek_pages']} Ancient Greek, "
+              f"{stats['forms']} forms", file=sys.stderr)
+
+    stats = ingest_dump(args.dump, args.lexicon, workers=args.workers, batch_size=args.batch_size,
+                        run_size=args.run_size, progress=report)
+    print(stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+'''
+Inverted index of a corpus by folded word form, for searching regardless of accents, breathings, length marks and case.
+
+Every token is reduced to a fold key at one of three strictness levels:
+    'bases'         base letters only: ἄνδρᾰ, Ἀνδρὰ and ανδρα all fold to ανδρα
+    'breathings'    base letters and breathings: ἄνδρᾰ and Ἀνδρὰ fold to ἀνδρα
+    'accents'       base letters, breathings, accents (grave as acute), diaeresis and iota subscript:
+                    ἄνδρᾰ and Ἀνδρὰ fold to ἀνδρά
+Case, length marks (macrons, breves, ^ and _) and final sigma are always folded.
+
+The corpus is tokenized once; every key gets a postings list of (line, character offset) pairs, sorted,
+stored as LEB128 varints with the line numbers delta-encoded. The index file holds the sorted keys, an offset array
+and the postings blob, which is memory-mapped. A query is a dict lookup; prefix and suffix queries bisect the sorted
+keys and the sorted reversed keys.
+
+>> build_word_index(open('iliad.txt', encoding='utf-8'), 'iliad.idx', strictness='bases')
+>> index = WordIndex('iliad.idx')
+>> index.lookup('Ἀχιλλεύς')
+>> array([[  0,  26], [  6,  33], ...])     # (line, offset) rows
+>> index.prefix('ἀχιλ')
+>> index.suffix('ηος')
+'''
+
+import json
+import mmap
+import os
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from .lower_grc import lower_grc
+
+MAGIC = b'GRCIDX01'
+
+PSILI = '\u0313'
+DASIA = '\u0314'
+ACUTE = '\u0301'
+GRAVE = '\u0300'
+CIRCUMFLEX = '\u0342'
+DIAERESIS = '\u0308'
+YPOGEGRAMMENI = '\u0345'
+
+# Combining marks kept at each strictness level
+STRICTNESS = {
+    'bases': frozenset(),
+    'breathings': frozenset({PSILI, DASIA}),
+    'accents': frozenset({PSILI, DASIA, ACUTE, CIRCUMFLEX, DIAERESIS, YPOGEGRAMMENI}),
+}
+
+_TOKEN = re.compile('[\\w\u0300-\u036f^]+')
+_DROP = str.maketrans({'^': None, '_': None, 'ς': 'σ', GRAVE: ACUTE})
+
+def fold(word, strictness='bases'):
+    '''
+    >> fold('Ἀνδρὰ', 'bases'), fold('Ἀνδρὰ', 'breathings'), fold('Ἀνδρὰ', 'accents')
+    >> ('ανδρα', 'ἀνδρα', 'ἀνδρά')
+    '''
+    keep = STRICTNESS[strictness]
+    decomposed = unicodedata.normalize('NFD', lower_grc(unicodedata.normalize('NFC', word))).translate(_DROP)
+    kept = ''.join(char for char in decomposed if not unicodedata.combining(char) or char in keep)
+    return unicodedata.normalize('NFC', kept)
+
+def tokenize(line):
+    ''' (offset, token) for every word of a line. Digits and underscores-only tokens are skipped. '''
+    for match in _TOKEN.finditer(line):
+        token = match.group()
+        if any(char.isalpha() for char in token):
+            yield match.start(), token
+
+# ============================
+# Varints
+# ============================
+
+def encode_postings(postings):
+    '''
+    Flat sequence line0, offset0, line1, offset1, ... (sorted) -> bytes: LEB128 varints of the line deltas and offsets.
+    '''
+    out = bytearray()
+    previous = 0
+    for i in range(0, len(postings), 2):
+        for value in (postings[i] - previous, postings[i + 1]):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = postings[i]
+    return bytes(out)
+
+def decode_postings(data):
+    ''' Inverse of encode_postings -> int64 array of shape (n, 2). '''
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    pairs = np.array(values, dtype=np.int64).reshape(-1, 2)
+    np.cumsum(pairs[:, 0], out=pairs[:, 0])
+    return pairs
+
+# ============================
+# Building
+# ============================
+
+def build_word_index(lines, path, strictness='bases'):
+    '''
+    Tokenizes an iterable of lines once and writes the index. Returns the number of distinct keys.
+    '''
+    if strictness not in STRICTNESS:
+        raise ValueError(f"Unknown strictness {strictness!r}; expected one of {sorted(STRICTNESS)}")
+    postings = {}
+    line_count = 0
+    token_count = 0
+    fold_cache = {}
+    for line_number, line in enumerate(lines):
+        line_count += 1
+        for offset, token in tokenize(line.rstrip('\n')):
+            key = fold_cache.get(token)
+            if key is None:
+                key = fold_cache[token] = fold(token, strictness)
+            if not key:
+                continue
+            if key not in postings:
+                postings[key] = array('I')
+            postings[key].extend((line_number, offset))
+            token_count += 1
+
+    keys = sorted(postings)
+    offsets = array('Q', [0])
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        header = {'strictness': strictness, 'lines': line_count, 'tokens': token_count, 'keys': len(keys), 'byteorder': sys.byteorder}
+        encoded_keys = '\n'.join(keys).encode('utf-8')
+        encoded_header = json.dumps(header).encode('ascii')
+        f.write(MAGIC)
+        f.write(len(encoded_header).to_bytes(8, 'little'))
+        f.write(encoded_header)
+        f.write(len(encoded_keys).to_bytes(8, 'little'))
+        f.write(encoded_keys)
+        # offsets go after the postings, whose sizes are only known once they are written
+        blob_start = f.tell()
+        for key in keys:
+            f.write(encode_postings(postings[key]))
+            offsets.append(f.tell() - blob_start)
+        f.write(offsets.tobytes())
+        f.write(blob_start.to_bytes(8, 'little'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(keys)
+
+# ============================
+# Querying
+# ============================
+
+class WordIndex:
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._mmap
+        if data[:8] != MAGIC:
+            raise ValueError(f"{self.path} is not a grc_utils word index")
+        header_length = int.from_bytes(data[8:16], 'little')
+        self.header = json.loads(data[16:16 + header_length].decode('ascii'))
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{self.path} was written on a {self.header['byteorder']}-endian machine")
+        position = 16 + header_length
+        keys_length = int.from_bytes(data[position:position + 8], 'little')
+        position += 8
+        keys = data[position:position + keys_length].decode('utf-8')
+        self.keys = keys.split('\n') if self.header['keys'] else []
+        self._blob_start = int.from_bytes(data[-8:], 'little')
+        offsets_start = len(data) - 8 - 8 * (len(self.keys) + 1)
+        self._offsets = np.frombuffer(data, dtype=np.uint64, count=len(self.keys) + 1, offset=offsets_start)
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+        self._reversed = None
+
+    def __reduce__(self):
+        return (WordIndex, (self.path,))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def strictness(self):
+        return self.header['strictness']
+
+    def fold(self, word):
+        return fold(word, self.strictness)
+
+    def _postings(self, i):
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return decode_postings(self._mmap[start:end])
+
+    def lookup(self, word):
+        ''' (line, offset) rows of every occurrence of the word, folded at the index's strictness. '''
+        i = self._positions.get(self.fold(word))
+        return np.zeros((0, 2), dtype=np.int64) if i is None else self._postings(i)
+
+    def count(self, word):
+        return len(self.lookup(word))
+
+    def keys_with_prefix(self, prefix):
+        prefix = self.fold(prefix)
+        start = bisect_left(self.keys, prefix)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(prefix):
+            end += 1
+        return self.keys[start:end]
+
+    def keys_with_suffix(self, suffix):
+        if self._reversed is None:
+            self._reversed = sorted((key[::-1], key) for key in self.keys)
+        reversed_suffix = self.fold(suffix)[::-1]
+        start = bisect_left(self._reversed, (reversed_suffix,))
+        keys = []
+        for reversed_key, key in self._reversed[start:]:
+            if not reversed_key.startswith(reversed_suffix):
+                break
+            keys.append(key)
+        return sorted(keys)
+
+    def _merged(self, keys):
+        if not keys:
+            return np.zeros((0, 2), dtype=np.int64)
+        rows = np.concatenate([self._postings(self._positions[key]) for key in keys])
+        return rows[np.lexsort((rows[:, 1], rows[:, 0]))]
+
+    def prefix(self, prefix):
+        ''' (line, offset) rows, in corpus order, of every word starting with the prefix. '''
+        return self._merged(self.keys_with_prefix(prefix))
+
+    def suffix(self, suffix):
+        ''' (line, offset) rows, in corpus order, of every word ending with the suffix. '''
+        return self._merged(self.keys_with_suffix(suffix))
+
+    def close(self):
+        self._offsets = None
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
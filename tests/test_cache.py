@@ -0,0 +1,34 @@
+from grc_utils.cache import AnalysisCache
+
+def test_other_versions_are_kept_until_pruned(tmp_path):
+    path = tmp_path / 'analyses.sqlite'
+    with AnalysisCache(path, version='old') as old:
+        old.analyse_many(['ἄνδρα', 'μοι'])
+    with AnalysisCache(path, version='new') as new:
+        new.analyse_many(['ἔννεπε'])
+    with AnalysisCache(path, version='old') as old:
+        assert len(old) == 2
+        old.syllables('ἄνδρα')
+        assert old.misses == 0
+    with AnalysisCache(path, version='new') as new:
+        assert new.prune() == 2
+        assert len(new) == 1
+    with AnalysisCache(path, version='old') as old:
+        assert len(old) == 0
+
+def test_prune_keeps_the_given_versions(tmp_path):
+    path = tmp_path / 'analyses.sqlite'
+    for version in ('a', 'b', 'c'):
+        with AnalysisCache(path, version=version) as cache:
+            cache.analyse('ἄνδρα')
+    with AnalysisCache(path, version='c') as cache:
+        assert cache.prune(keep=['a', 'c']) == 1
+        assert cache.prune(keep=['a', 'c']) == 0
+
+def test_verdicts_follow_the_convention(tmp_path):
+    path = tmp_path / 'analyses.sqlite'
+    with AnalysisCache(path) as tragic, AnalysisCache(path, convention='comic') as comic:
+        assert tragic.analyse('πατρός') == (('πατ', 'ρός'), True, False, 0)
+        assert comic.analyse('πατρός') == (('πα', 'τρός'), True, True, 1)
+        assert tragic.analyse('στύθρο').ambiguous is False
+        assert comic.analyse('στύθρο').ambiguous is True
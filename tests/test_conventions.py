@@ -0,0 +1,24 @@
+import pytest
+
+from grc_utils.syllabifier import ALIASES, CONVENTIONS, Convention, register_alias, register_convention, syllabifier
+
+def test_homeric_is_an_alias_of_tragic():
+    assert ALIASES['homeric'] == 'tragic'
+    assert CONVENTIONS['homeric'] is CONVENTIONS['tragic']
+    assert syllabifier('πατρός', convention='homeric') == ['πατ', 'ρός']
+
+def test_alias_follows_redefinition():
+    register_convention(Convention('aliased', 'heterosyllabic', 'coda'))
+    register_alias('alias', 'aliased')
+    try:
+        rules = register_convention(Convention('aliased', 'homosyllabic', 'coda'))
+        assert CONVENTIONS['alias'] is rules
+        assert syllabifier('πατρός', convention='alias') == ['πα', 'τρός']
+    finally:
+        del CONVENTIONS['alias'], CONVENTIONS['aliased'], ALIASES['alias']
+
+def test_alias_of_unknown_convention():
+    with pytest.raises(ValueError):
+        register_alias('alias', 'unknown')
+    with pytest.raises(ValueError):
+        register_alias('alias', 'homeric') # aliases of aliases are not followed on redefinition
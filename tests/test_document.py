@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from corpus import ZipfianCorpus
+
+from grc_utils.document import MacronizedDocument, analyse_line, normalize_line
+from grc_utils.filter_dichrona import count_dichrona_in_open_syllables
+
+def _check(doc, index):
+    annotated, words = analyse_line(doc[index])
+    assert doc._annotated[index] == annotated
+    assert doc._words[index] == words
+    assert doc.line_count(index) == count_dichrona_in_open_syllables(doc[index])
+    assert doc.count == sum(doc.counts())
+
+def test_docstring_example():
+    doc = MacronizedDocument('μῆνιν ἄειδε θεὰ\nΠηληϊάδεω Ἀχιλῆος')
+    assert doc.count == 7
+    doc.splice(0, 4, 4, '^')
+    assert doc.count == 6
+    assert doc.colour_spans(0) == [(3, 4, 'green'), (7, 8, 'red'), (15, 16, 'red')]
+
+@pytest.mark.parametrize('seed', range(12))
+def test_edits_match_full_analysis(seed):
+    rng = random.Random(seed)
+    lines = ZipfianCorpus(seed).lines(20, marked=0.3)
+    doc = MacronizedDocument('\n'.join(lines))
+    pieces = ['^', '_', ' ', 'α', 'ε', 'ν', 'σ', 'ὁ ', ', ', '']
+    for _ in range(300):
+        index = rng.randrange(len(doc))
+        line = doc[index]
+        start = rng.randint(0, len(line))
+        end = min(len(line), start + rng.choice([0, 0, 1, 2, 5]))
+        doc.splice(index, start, end, rng.choice(pieces))
+        _check(doc, index)
+
+@pytest.mark.parametrize('old, new', [
+    ('μῆνιν ἄειδε', 'μῆνιν ἄειδε θεὰ'),       # word appended
+    ('μῆνιν ἄειδε', 'μῆνινἄειδε'),            # words merged
+    ('μῆνινἄειδε', 'μῆνιν ἄειδε'),            # word split
+    ('ἄειδε θεὰ', 'βειδε θεὰ'),               # first letter of a word no longer a vowel
+    ('ἄνδρα μοι', 'ἄνδρα^ μοι'),
+    ('ἄνδρα^ μοι', 'ἄνδρα_ μοι'),
+    ('ἄνδρα', ''),
+    ('', 'ἄνδρα μοι'),
+])
+def test_set_line(old, new):
+    doc = MacronizedDocument(old)
+    doc.set_line(0, new)
+    assert doc[0] == normalize_line(new)
+    _check(doc, 0)
@@ -0,0 +1,37 @@
+import logging
+
+from grc_utils.filter_dichrona import has_ambiguous_dichrona, has_ambiguous_dichrona_in_open_syllables
+from grc_utils.instrument import instrumented
+from grc_utils.syllabifier import syllabifier
+
+def test_filter_verdicts_are_counted():
+    with instrumented() as instrumentation:
+        assert has_ambiguous_dichrona('ἄνδρα') is True
+        assert has_ambiguous_dichrona('') is False
+        assert has_ambiguous_dichrona('abc') is False
+        assert has_ambiguous_dichrona_in_open_syllables('') is False
+        counters = instrumentation.snapshot()['counters']
+    assert counters['filter.has_ambiguous_dichrona.accepted'] == 1
+    assert counters['filter.has_ambiguous_dichrona.rejected.empty'] == 1
+    assert counters['filter.has_ambiguous_dichrona.rejected.no_greek'] == 1
+    assert counters['filter.has_ambiguous_dichrona_in_open_syllables.rejected.empty'] == 1
+
+def test_filter_keeps_its_name_and_docstring():
+    assert has_ambiguous_dichrona.__name__ == 'has_ambiguous_dichrona'
+    assert 'truly ambiguous dichrona' in has_ambiguous_dichrona.__doc__
+
+def test_debug_logs_instead_of_printing(caplog, capsys):
+    with caplog.at_level(logging.DEBUG, logger='grc_utils.syllabifier'):
+        assert syllabifier('τοῖος ἀλλ', debug=True) == syllabifier('τοῖος ἀλλ')
+    assert capsys.readouterr().out == ''
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == 'Normalized text: τοῖος ἀλλ'
+    assert any(message.startswith('Final reshuffled text: ') for message in messages)
+
+def test_syllabifier_stages_are_timed():
+    with instrumented() as instrumentation:
+        assert syllabifier('πατρός') == ['πατ', 'ρός']
+        timers = instrumentation.snapshot()['timers']
+    stages = ('normalize', 'divide', 'syllabify', 'reshuffle', 'final_reshuffle', 'definitive')
+    assert {f'syllabifier.{stage}' for stage in stages} | {'syllabifier'} <= set(timers)
+    assert all(timers[name]['calls'] == 1 for name in timers if name.startswith('syllabifier'))
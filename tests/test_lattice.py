@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from grc_utils.lattice import CONTRADICTION, ScansionLattice
+from grc_utils.meter import HEAVY_BIT, LIGHT_BIT, METERS
+from grc_utils.weight import AMBIGUOUS, HEAVY, LIGHT
+
+def test_pattern_and_weights():
+    lattice = ScansionLattice.from_line('τέκνον, πατρὸς ἄκουε')
+    assert lattice.pattern == '⏓–⏓⏑⏓–⏑'
+    assert lattice.weights.tolist() == [AMBIGUOUS, HEAVY, AMBIGUOUS, LIGHT, AMBIGUOUS, HEAVY, LIGHT]
+    assert lattice.alternatives() == 8
+
+def test_contradiction_is_not_anceps():
+    lattice = ScansionLattice(['α', 'β', 'γ'], np.array([HEAVY_BIT, 0, LIGHT_BIT | HEAVY_BIT], dtype=np.uint8), np.zeros(3, dtype=np.uint8))
+    assert lattice.pattern == '–' + CONTRADICTION + '⏓'
+    assert not lattice.fits()
+    assert lattice.contradictions() == [(1, 'β')]
+    assert lattice.options.tolist() == [HEAVY_BIT, 0, LIGHT_BIT | HEAVY_BIT]
+    with pytest.raises(ValueError):
+        lattice.weights
+
+def test_intersect_with_a_meter_that_does_not_fit():
+    lattice = ScansionLattice.from_line('τέκνον, πατρὸς ἄκουε').intersect('iambic_trimeter')
+    assert lattice.pattern == CONTRADICTION * len(lattice)
+    assert len(lattice.contradictions()) == len(lattice)
+
+OD_1_1 = 'ἄνδρα μοι ἔννεπε, Μοῦσα, πολύτροπον, ὃς μάλα πολλὰ'
+
+def test_epic_correption():
+    assert METERS['dactylic_hexameter'].scansions(ScansionLattice.from_line(OD_1_1)) == [] # μοι is heavy
+    lattice = ScansionLattice.from_line(OD_1_1, correption=True)
+    assert (2, 'μοι ', ('correption',), '⏑–') in lattice.ambiguities()
+    assert lattice.intersect('dactylic_hexameter').pattern == '–⏑⏑–⏑⏑–⏑⏑–⏑⏑–⏑⏑–⏓'
+
+def test_correption_only_before_a_vowel():
+    lattice = ScansionLattice.from_line('μοι δὸς καὶ ἔπος', correption=True)
+    assert [(i, causes) for i, _, causes, _ in lattice.ambiguities()] == [(2, ('correption',))]
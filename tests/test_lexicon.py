@@ -0,0 +1,57 @@
+from itertools import permutations
+
+import pytest
+
+from grc_utils import lexicon as lexicon_module
+from grc_utils.lexicon import MacronLexicon, build_lexicon, lexicon_entries, macronize_text, merge_lengths
+from grc_utils.markup import LONG, SHORT, UNMARKED
+
+def test_merge_keeps_a_known_length():
+    assert merge_lengths(bytes([UNMARKED, SHORT]), bytes([LONG, UNMARKED])) == bytes([LONG, SHORT])
+
+def test_merge_is_order_independent():
+    annotations = [bytes([LONG, UNMARKED]), bytes([SHORT, UNMARKED]), bytes([UNMARKED, LONG])]
+    results = set()
+    for order in permutations(annotations):
+        merged = order[0]
+        for other in order[1:]:
+            merged = merge_lengths(merged, other)
+        results.add(merged)
+    assert len(results) == 1
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'macrons.lex')
+    build_lexicon(['ᾰ̓́νδρᾰ', 'ἀνδρα', 'κᾱλός', 'κᾰλός', 'μοῦσᾰ'], path)
+    return path
+
+def test_unmarked_homograph_does_not_erase_lengths(path):
+    with MacronLexicon(path) as lexicon:
+        assert lexicon.get('ἄνδρα', style='markup') == 'ἄ^νδρα^'
+        assert lexicon.get('καλός', style='markup') == 'καλός' # a real conflict stays unmarked
+
+def test_conflict_is_not_written_as_a_length(path):
+    entries = lexicon_entries(['κᾱλός', 'κᾰλός'])
+    assert entries['καλός'][1] == lexicon_module.CONFLICT
+    with MacronLexicon(path) as lexicon:
+        assert lexicon.lengths('καλός') == bytes(5)
+
+def test_lexicon_opened_from_a_path_is_closed(path, monkeypatch):
+    closed = []
+    original = MacronLexicon.close
+    def close(self):
+        closed.append(self)
+        original(self)
+    monkeypatch.setattr(MacronLexicon, 'close', close)
+    assert macronize_text('ἄνδρα μοι', path, style='markup') == 'ἄ^νδρα^ μοι'
+    assert len(closed) == 1
+    lines = macronize_text(['ἄνδρα\n', 'Μοῦσα\n'], path, style='markup')
+    assert list(lines) == ['ἄ^νδρα^\n', 'Μοῦσα^\n']
+    assert len(closed) == 2
+    with MacronLexicon(path) as lexicon:
+        macronize_text('ἄνδρα', lexicon)
+        assert len(closed) == 2 # a lexicon passed in is left open
+
+def test_marked_words_are_looked_up_whole(path):
+    assert macronize_text('ἄ^νδρα, μοῦ_σα· Μοῦσα^', path, style='markup') == 'ἄ^νδρα^, μοῦ_σα^· Μοῦσα^'
+    assert macronize_text('ᾰ̓́νδρα μοῦσα', path) == 'ᾰ̓́νδρᾰ μοῦσᾰ'
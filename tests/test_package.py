@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+import grc_utils
+
+def test_star_import_exports_the_lazy_names():
+    namespace = {}
+    exec('from grc_utils import *', namespace)
+    for name in grc_utils._LAZY:
+        assert name in namespace, name
+    assert 'dactylic_hexameter' in namespace['METERS']
+    assert namespace['syllabifier']('ἄνδρα') == ['ἄν', 'δρα']
+
+def test_import_stays_lazy():
+    code = "import sys, grc_utils; print(any(name in sys.modules for name in ('numpy', 'sqlite3', 'asyncio')))"
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True).stdout.strip() == 'False'
@@ -0,0 +1,7 @@
+import doctest
+
+from grc_utils import scansion
+
+def test_docstring_examples():
+    failures, tests = doctest.testmod(scansion)
+    assert tests and not failures
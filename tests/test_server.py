@@ -0,0 +1,38 @@
+import asyncio
+import doctest
+import json
+
+import pytest
+
+from grc_utils.server import AnalysisServer, RequestError
+
+def _analyze(server, request):
+    return asyncio.run(server.dispatch('POST', '/analyze', json.dumps(request).encode('utf-8')))
+
+@pytest.fixture
+def server():
+    server = AnalysisServer()
+    yield server
+    server.analyzer.close()
+
+def test_conventions_share_batchers_by_their_rules(server):
+    assert _analyze(server, {'task': 'syllabify', 'text': 'πατρός', 'convention': 'comic'}) == {'result': ['πα', 'τρός']}
+    for convention in (None, 'tragic', 'homeric'):
+        request = {'task': 'syllabify', 'text': 'πατρός'}
+        if convention:
+            request['convention'] = convention
+        assert _analyze(server, request) == {'result': ['πατ', 'ρός']}
+    assert len(server.analyzer.stats()) == 2
+
+@pytest.mark.parametrize('convention', ['no-such-convention', 3, ['comic']])
+def test_unknown_convention_is_rejected(server, convention):
+    for request in ({'task': 'syllabify', 'text': 'πατρός'}, {'task': 'syllabify', 'texts': ['πατρός']}):
+        with pytest.raises(RequestError) as error:
+            _analyze(server, dict(request, convention=convention))
+        assert error.value.status == 400
+    assert server.analyzer.stats() == {}
+
+def test_docstring_examples():
+    from grc_utils import server
+    failures, tests = doctest.testmod(server)
+    assert tests and not failures
@@ -0,0 +1,60 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from corpus import ZipfianCorpus
+
+from grc_utils import stats
+from grc_utils.stats import SyllableCounts, corpus_counts
+from grc_utils.syllabifier import syllabifier
+
+LINES = ZipfianCorpus(0).lines(600, marked=0.2)
+
+def _counted(counts, n):
+    return {(gram, pattern): count for gram, pattern, count in counts.top(n)}
+
+def test_counts_match_a_counter():
+    counts = SyllableCounts((1, 2))
+    for start in range(0, len(LINES), 50):
+        counts.add_lines(LINES[start:start + 50])
+    expected = Counter()
+    for line in LINES:
+        syllables = syllabifier(line)
+        expected.update((tuple(syllables[i:i + 2]), '') for i in range(len(syllables) - 1))
+    assert _counted(counts, 2) == dict(expected)
+
+def test_queued_batches_are_summed(monkeypatch):
+    monkeypatch.setattr(stats, 'MIN_CONSOLIDATE', 10)
+    queued = SyllableCounts((2,), split='weight')
+    for start in range(0, len(LINES), 7):
+        queued.add_lines(LINES[start:start + 7])
+    whole = SyllableCounts((2,), split='weight').add_lines(LINES)
+    assert _counted(queued, 2) == _counted(whole, 2)
+    labels, grams, counts = queued.tables[2]
+    assert len(counts) == len(set(zip(labels.tolist(), map(tuple, grams.tolist()))))
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_workers_match_serial(executor):
+    serial = corpus_counts(LINES, n=(1, 2), split='dichronon', chunk_size=64)
+    parallel = corpus_counts(iter(LINES), n=(1, 2), split='dichronon', workers=2, chunk_size=64, executor=executor)
+    for n in (1, 2):
+        assert _counted(parallel, n) == _counted(serial, n)
+
+def test_corpus_is_read_as_it_is_counted(monkeypatch):
+    read = []
+    def lines():
+        for line in LINES:
+            read.append(line)
+            yield line
+    seen = []
+    original = stats._count_chunk
+    def count_chunk(job):
+        seen.append(len(read))
+        return original(job)
+    monkeypatch.setattr(stats, '_count_chunk', count_chunk)
+    corpus_counts(lines(), workers=2, chunk_size=10, executor='thread')
+    assert min(seen) < len(LINES) # the first chunks were counted before the whole corpus had been read
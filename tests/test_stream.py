@@ -0,0 +1,34 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from corpus import ZipfianCorpus
+
+from grc_utils.stream import stream_syllables
+from grc_utils.syllabifier import syllabifier
+
+def _text(seed, lines=40):
+    return ' '.join(ZipfianCorpus(seed).lines(lines, marked=0.2))
+
+@pytest.mark.parametrize('seed', range(8))
+def test_stream_matches_syllabifier(seed):
+    text = _text(seed)
+    whole = syllabifier(text)
+    rng = random.Random(seed)
+    for _ in range(5):
+        chunk_size = rng.randint(1, 200)
+        assert list(stream_syllables(text, chunk_size=chunk_size)) == whole, chunk_size
+
+@pytest.mark.parametrize('text', ['καὶ Ρὶ', 'τε Ῥόδος', 'τε σέ', 'ἄνδρα μοι ἔννεπε', 'τε Λάχης δέ'])
+def test_stream_matches_syllabifier_at_word_starts(text):
+    whole = syllabifier(text)
+    for chunk_size in range(1, len(text) + 1):
+        assert list(stream_syllables(text, chunk_size=chunk_size)) == whole, chunk_size
+
+def test_stream_never_cuts_inside_a_word():
+    text = 'πολυπαιπαλοσ' * 50
+    assert list(stream_syllables(text, chunk_size=7, max_buffer=20)) == syllabifier(text)
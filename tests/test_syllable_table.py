@@ -0,0 +1,40 @@
+import pickle
+
+from grc_utils.shared import SharedTables, shared_pool
+from grc_utils.syllabifier import SYLLABLE_TABLES, syllabifier
+from grc_utils.syllable_table import (SyllableTable, build_syllable_table, stop_using_syllable_tables,
+                                      syllable_table_arrays, use_syllable_table, verify_syllable_table)
+
+WORDS = ['πατρός', 'ἄνδρα', 'μοι', 'ἔννεπε', 'Μοῦσα', 'πολύτροπον']
+
+def _tables_in_use(_):
+    return sorted(rules.name for rules in SYLLABLE_TABLES), syllabifier('πατρός', convention='comic')
+
+def test_shared_table_matches_the_file(tmp_path):
+    path = tmp_path / 'forms.syl'
+    assert build_syllable_table(WORDS, path, convention='comic') == len(WORDS)
+    with SyllableTable(path) as table, SharedTables(syllable_table_arrays(path)) as tables:
+        shared = SyllableTable(tables)
+        assert shared.convention == 'comic'
+        assert list(shared.items()) == list(table.items())
+        assert verify_syllable_table(shared) == []
+        assert pickle.loads(pickle.dumps(shared)).get('πατρός') == ['πα', 'τρός']
+        shared.close()
+
+def test_pool_workers_use_the_shared_table(tmp_path):
+    path = tmp_path / 'forms.syl'
+    build_syllable_table(WORDS, path, convention='comic')
+    with SharedTables(syllable_table_arrays(path)) as tables:
+        with shared_pool(tables, max_workers=2, initializer=use_syllable_table, initargs=(tables,)) as pool:
+            assert list(pool.map(_tables_in_use, range(2))) == [(['comic'], ['πα', 'τρός'])] * 2
+
+def test_use_and_stop_using(tmp_path):
+    path = tmp_path / 'forms.syl'
+    build_syllable_table(WORDS, path, convention='comic')
+    with SharedTables(syllable_table_arrays(path)) as tables:
+        table = use_syllable_table(tables)
+        try:
+            assert table.shared is tables and table in SYLLABLE_TABLES.values()
+            assert syllabifier('πατρός', convention='comic') == ['πα', 'τρός']
+        finally:
+            stop_using_syllable_tables('comic')
@@ -0,0 +1,20 @@
+from grc_utils.clitics import ENCLITICS, PROCLITICS, is_enclitic, is_proclitic
+from grc_utils.dichrona import DICHRONA
+from grc_utils.vowels import ACCENTS, ACUTES, CIRCUMFLEXES, GRAVES, VOWELS, vowel
+
+def test_clitics_are_ordered_tuples():
+    for table in (ENCLITICS, PROCLITICS):
+        assert isinstance(table, tuple)
+    assert ENCLITICS[:3] == ('μου', 'μοι', 'με')
+
+def test_character_tables_are_frozensets():
+    for table in (VOWELS, ACUTES, GRAVES, CIRCUMFLEXES, ACCENTS, DICHRONA):
+        assert isinstance(table, frozenset)
+    assert ACCENTS == ACUTES | GRAVES | CIRCUMFLEXES
+
+def test_membership():
+    assert is_enclitic('τε,') and not is_enclitic('καί')
+    assert is_proclitic('ἐν') and not is_proclitic('τε')
+    assert vowel('α') and not vowel('β')
+    assert 'ά' in ACUTES and 'ὰ' not in ACUTES
+    assert 'α' in DICHRONA and 'η' not in DICHRONA
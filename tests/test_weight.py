@@ -0,0 +1,11 @@
+import pytest
+
+from grc_utils.weight import is_open_syllable_in_word_in_synapheia
+
+def test_vowel_after_markup_opens_the_ultima():
+    assert is_open_syllable_in_word_in_synapheia('πὶς', ['ἐλ', 'πὶς'], 'ἀ^νθρώπου') is True
+    assert is_open_syllable_in_word_in_synapheia('πὶς', ['ἐλ', 'πὶς'], 'α_') is True
+
+@pytest.mark.parametrize('next_word', ['^', '_', '', None])
+def test_markup_only_next_word_does_not_open_the_ultima(next_word):
+    assert not is_open_syllable_in_word_in_synapheia('πὶς', ['ἐλ', 'πὶς'], next_word)